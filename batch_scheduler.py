@@ -0,0 +1,187 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 是可选依赖，只有批量操作需要
+    np = None
+
+import config
+from review_system import sm2_update
+
+SECONDS_PER_DAY = 86400.0
+
+# Naive local datetimes are converted against this origin instead of via .timestamp(),
+# so adding interval * 86400 matches `datetime + timedelta(days=interval)` exactly.
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch(value):
+    """把 ISO 字符串或 datetime 转换为相对 1970-01-01 的秒数（不做时区换算）"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return (value - _EPOCH).total_seconds()
+
+
+def from_epoch(seconds):
+    """to_epoch 的逆运算"""
+    return _EPOCH + timedelta(seconds=float(seconds))
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("批量调度需要安装 NumPy: pip install numpy")
+
+
+class BatchScheduler:
+    """基于 NumPy 的批量 SM-2 调度器
+
+    把一个题库的间隔、难度系数和下次复习时间载入数组，对所有卡片一次性执行
+    SM-2 更新、整体顺延和复习量预测，结果与逐题调用 sm2_update 一致。
+    """
+
+    def __init__(self, data_handler):
+        _require_numpy()
+        self.data_handler = data_handler
+        self.load()
+
+    def load(self):
+        """从统计数据载入数组"""
+        all_stats = self.data_handler.get_all_stats()
+        all_events = self.data_handler.get_all_events()
+        self.questions = [q for q in all_stats if q in all_events]
+
+        count = len(self.questions)
+        self.interval = np.empty(count, dtype=np.float64)
+        self.ease_factor = np.empty(count, dtype=np.float64)
+        self.last_review = np.empty(count, dtype=np.float64)
+        self.next_review = np.empty(count, dtype=np.float64)
+        for i, question in enumerate(self.questions):
+            stats = all_stats[question]
+            self.interval[i] = stats["interval"]
+            self.ease_factor[i] = stats["ease_factor"]
+            self.last_review[i] = to_epoch(stats["last_review"])
+            self.next_review[i] = to_epoch(stats["next_review"])
+
+    def apply_reviews(self, performance, now=None, mask=None):
+        """对所有（或 mask 选中的）卡片应用一次评分为 performance 的复习
+
+        performance 可以是标量，也可以是与卡片数等长的数组。
+        """
+        now = to_epoch(now or datetime.now())
+        performance = np.broadcast_to(np.asarray(performance, dtype=np.float64), self.interval.shape)
+        if mask is None:
+            mask = np.ones(self.interval.shape, dtype=bool)
+
+        interval, ease_factor = sm2_arrays(self.interval, self.ease_factor, performance)
+        self.interval = np.where(mask, interval, self.interval)
+        self.ease_factor = np.where(mask, ease_factor, self.ease_factor)
+        self.last_review = np.where(mask, now, self.last_review)
+        self.next_review = np.where(mask, now + self.interval * SECONDS_PER_DAY, self.next_review)
+
+    def shift(self, days, mask=None):
+        """把所有（或 mask 选中的）卡片的下次复习时间顺延 days 天，例如假期之后"""
+        offset = days * SECONDS_PER_DAY
+        if mask is None:
+            self.next_review = self.next_review + offset
+        else:
+            self.next_review = np.where(mask, self.next_review + offset, self.next_review)
+
+    def rebase_ease_factors(self, old_initial, new_initial=None, min_ease=None):
+        """修改 INITIAL_EASE_FACTOR / MIN_EASE_FACTOR 后整体平移并截断难度系数"""
+        new_initial = config.INITIAL_EASE_FACTOR if new_initial is None else new_initial
+        min_ease = config.MIN_EASE_FACTOR if min_ease is None else min_ease
+        self.ease_factor = np.maximum(self.ease_factor + (new_initial - old_initial), min_ease)
+
+    def due_histogram(self, days=90, now=None):
+        """返回未来 days 天每天到期的卡片数，已过期的计入今天"""
+        now = now or datetime.now()
+        today = to_epoch(datetime(now.year, now.month, now.day))
+        offsets = np.floor((self.next_review - today) / SECONDS_PER_DAY).astype(np.int64)
+        offsets = offsets[offsets < days]
+        return np.bincount(np.maximum(offsets, 0), minlength=days)[:days]
+
+    def write_back(self):
+        """把数组写回统计数据并保存一次快照"""
+        all_stats = self.data_handler.get_all_stats()
+        for i, question in enumerate(self.questions):
+            stats = all_stats[question]
+            stats["interval"] = float(self.interval[i])
+            stats["ease_factor"] = float(self.ease_factor[i])
+            stats["last_review"] = from_epoch(self.last_review[i]).isoformat()
+            stats["next_review"] = from_epoch(self.next_review[i]).isoformat()
+            self.data_handler.notify_stats_updated(question)
+        self.data_handler.save_stats()
+
+
+def sm2_arrays(interval, ease_factor, performance):
+    """sm2_update 的向量化版本"""
+    _require_numpy()
+    correct = performance >= 3
+    q = 5 - performance
+
+    correct_interval = np.where(interval == 1, float(config.INTERVAL_AFTER_FIRST),
+                                np.where(interval == 2, 6.0,
+                                         np.minimum(interval * ease_factor, config.MAX_INTERVAL)))
+    correct_ease = np.maximum(ease_factor + (0.1 - q * (0.08 + q * 0.02)), config.MIN_EASE_FACTOR)
+    wrong_ease = np.where(ease_factor >= config.MIN_EASE_FACTOR, ease_factor - 0.2, ease_factor)
+
+    return (np.where(correct, correct_interval, 1.0),
+            np.where(correct, correct_ease, wrong_ease))
+
+
+def verify_against_scalar(interval, ease_factor, performance):
+    """用逐题的 sm2_update 校验向量化结果，返回最大绝对误差"""
+    batch_interval, batch_ease = sm2_arrays(
+        np.asarray(interval, dtype=np.float64),
+        np.asarray(ease_factor, dtype=np.float64),
+        np.asarray(performance, dtype=np.float64))
+    max_error = 0.0
+    for i in range(len(batch_interval)):
+        scalar_interval, scalar_ease = sm2_update(interval[i], ease_factor[i], performance[i])
+        max_error = max(max_error,
+                        abs(scalar_interval - batch_interval[i]),
+                        abs(scalar_ease - batch_ease[i]))
+    return max_error
+
+
+def benchmark(num_cards=100_000, seed=0):
+    """比较逐题调度与批量调度在 num_cards 张卡片上的耗时"""
+    _require_numpy()
+    rng = random.Random(seed)
+    interval = [rng.choice([1, 2, 6, 15.0, 37.5, 90.2]) for _ in range(num_cards)]
+    ease_factor = [round(rng.uniform(1.1, 3.0), 2) for _ in range(num_cards)]
+    performance = [rng.randint(0, 5) for _ in range(num_cards)]
+    now = datetime.now()
+
+    start = time.perf_counter()
+    for i in range(num_cards):
+        new_interval, _ = sm2_update(interval[i], ease_factor[i], performance[i])
+        (now + timedelta(days=new_interval)).isoformat()
+    scalar_seconds = time.perf_counter() - start
+
+    interval_array = np.array(interval, dtype=np.float64)
+    ease_array = np.array(ease_factor, dtype=np.float64)
+    performance_array = np.array(performance, dtype=np.float64)
+    start = time.perf_counter()
+    new_interval, _ = sm2_arrays(interval_array, ease_array, performance_array)
+    next_review = to_epoch(now) + new_interval * SECONDS_PER_DAY
+    np.bincount(np.floor((next_review - to_epoch(now)) / SECONDS_PER_DAY).astype(np.int64))
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "cards": num_cards,
+        "scalar_seconds": scalar_seconds,
+        "batch_seconds": batch_seconds,
+        "speedup": scalar_seconds / batch_seconds if batch_seconds else float("inf"),
+        "max_error": verify_against_scalar(interval, ease_factor, performance),
+    }
+
+
+if __name__ == "__main__":
+    result = benchmark()
+    print(f"卡片数: {result['cards']}")
+    print(f"逐题调度: {result['scalar_seconds']:.3f} 秒")
+    print(f"批量调度: {result['batch_seconds']:.4f} 秒 (加速 {result['speedup']:.0f} 倍)")
+    print(f"最大误差: {result['max_error']:.2e}")
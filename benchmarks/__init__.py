@@ -0,0 +1,9 @@
+"""性能基准测试
+
+用合成题库和统计数据测量数据加载、保存、待复习查询、出题和统计显示在不同规模下的
+耗时与峰值内存，结果以 JSON 输出以便在版本之间比较。
+
+    python -m benchmarks.run --sizes 100 10000 1000000 --output bench.json
+    python -m benchmarks.compare old.json new.json
+    python -m benchmarks.grading --size 100000
+"""
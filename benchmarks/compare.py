@@ -0,0 +1,43 @@
+import argparse
+import json
+
+
+def compare(old_report, new_report, threshold=1.2):
+    """比较两份基准测试结果，返回 (规模, 操作, 旧耗时, 新耗时, 比值, 是否退化) 列表"""
+    old_results = {result["size"]: result for result in old_report["results"]}
+    rows = []
+    for result in new_report["results"]:
+        old = old_results.get(result["size"])
+        if old is None:
+            continue
+        timings = {name: op["seconds"] for name, op in result["operations"].items()}
+        timings["session"] = result["session"]["seconds_per_answer"]
+        old_timings = {name: op["seconds"] for name, op in old["operations"].items()}
+        old_timings["session"] = old["session"]["seconds_per_answer"]
+        for name, seconds in timings.items():
+            if name not in old_timings:
+                continue
+            ratio = seconds / old_timings[name] if old_timings[name] else float("inf")
+            rows.append((result["size"], name, old_timings[name], seconds, ratio, ratio > threshold))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="比较两份基准测试结果")
+    parser.add_argument("old", help="旧版本的结果文件")
+    parser.add_argument("new", help="新版本的结果文件")
+    parser.add_argument("--threshold", type=float, default=1.2, help="判定为性能退化的耗时比值 (默认: 1.2)")
+    args = parser.parse_args()
+
+    with open(args.old, encoding='utf-8') as f:
+        old_report = json.load(f)
+    with open(args.new, encoding='utf-8') as f:
+        new_report = json.load(f)
+
+    regressions = 0
+    for size, name, old_seconds, new_seconds, ratio, regressed in compare(old_report, new_report, args.threshold):
+        flag = "  <-- 退化" if regressed else ""
+        regressions += regressed
+        print(f"{size:>9} {name:<26} {old_seconds * 1000:>10.3f} ms -> {new_seconds * 1000:>10.3f} ms "
+              f"({ratio:.2f}x){flag}")
+    raise SystemExit(1 if regressions else 0)
@@ -0,0 +1,128 @@
+"""填空题评分的吞吐量基准测试
+
+比较按结构化年份范围评分（题库年份索引 + 有界缓存的用户输入解析）与原来每次
+对正确答案和用户输入都做数字标准化的实现，并统计两者判定不一致的输入类型。
+
+    python -m benchmarks.grading --size 100000 --answers 200000
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_fixture
+from data_handler import DataHandler
+from date_parser import parse_user_answer
+from quiz import Quiz
+from review_system import ReviewSystem
+
+_DIGITS = "〇一二三四五六七八九"
+
+
+def _chinese(year):
+    return "".join(_DIGITS[int(digit)] for digit in str(year))
+
+
+def make_inputs(events, count, seed=0):
+    """生成 (题目, 用户输入, 输入类型) 列表，混合几种常见写法和错误答案"""
+    rng = random.Random(seed)
+    questions = list(events.items())
+    inputs = []
+    for _ in range(count):
+        question, answer = rng.choice(questions)
+        year_range = parse_user_answer(answer)
+        start, end = year_range
+        kind = rng.choice(("exact", "plain", "abbreviated", "chinese", "wrong"))
+        if kind == "exact":
+            text = answer
+        elif kind == "plain":
+            text = str(start) if start == end else f"{start}-{end}"
+        elif kind == "abbreviated":
+            text = str(start) if start == end else f"{start}-{end % 100:02d}"
+        elif kind == "chinese":
+            text = f"{_chinese(start)}年" if start == end else f"{_chinese(start)}年至{_chinese(end)}年"
+        else:
+            text = str(start + rng.choice((-2, -1, 1, 2)))
+        inputs.append((question, answer, text, kind))
+    return inputs
+
+
+def legacy_grade(user_input, correct_answer):
+    """原来的评分方式：每次都对两边做数字标准化再比较"""
+    return Quiz.normalize_answer(user_input.strip()) == Quiz.normalize_answer(correct_answer)
+
+
+def run(size=100_000, answers=200_000, seed=0):
+    with tempfile.TemporaryDirectory() as directory:
+        data_file, stats_file = write_fixture(directory, size, seed=seed)
+        data_handler = DataHandler(data_file, stats_file)
+
+        start = time.perf_counter()
+        data_handler.build_year_ranges()
+        index_seconds = time.perf_counter() - start
+
+        unique_answers = len(data_handler.year_ranges)
+        quiz = Quiz(data_handler, ReviewSystem(data_handler))
+        inputs = make_inputs(data_handler.get_all_events(), answers, seed)
+        items = [{"type": "fill_blank", "question": question, "answer": answer,
+                  "quiz_data": {"question": question, "answer": answer}}
+                 for question, answer, _, _ in inputs]
+
+        start = time.perf_counter()
+        legacy = [legacy_grade(text, answer) for _, answer, text, _ in inputs]
+        legacy_seconds = time.perf_counter() - start
+
+        parse_user_answer.cache_clear()
+        start = time.perf_counter()
+        structured = [quiz.grade_answer(item, text) for item, (_, _, text, _) in zip(items, inputs)]
+        structured_seconds = time.perf_counter() - start
+        cache = parse_user_answer.cache_info()
+        data_handler.close()
+
+    by_kind = {}
+    for (_, _, _, kind), old, new in zip(inputs, legacy, structured):
+        counts = by_kind.setdefault(kind, {"inputs": 0, "legacy_correct": 0, "structured_correct": 0})
+        counts["inputs"] += 1
+        counts["legacy_correct"] += old
+        counts["structured_correct"] += new
+    return {
+        "size": size,
+        "answers": answers,
+        "index_build_seconds": index_seconds,
+        "unique_answers": unique_answers,
+        "legacy_per_second": answers / legacy_seconds,
+        "structured_per_second": answers / structured_seconds,
+        "speedup": legacy_seconds / structured_seconds,
+        "cache_hits": cache.hits,
+        "cache_misses": cache.misses,
+        "by_kind": by_kind,
+    }
+
+
+def print_report(report):
+    print(f"题库 {report['size']} 个事件（{report['unique_answers']} 个不同答案），"
+          f"年份索引建立耗时 {report['index_build_seconds'] * 1000:.1f} ms")
+    print(f"原实现:   {report['legacy_per_second']:>12,.0f} 次/秒")
+    print(f"年份索引: {report['structured_per_second']:>12,.0f} 次/秒 ({report['speedup']:.2f}x，"
+          f"缓存命中 {report['cache_hits']}，未命中 {report['cache_misses']})")
+    print("\n判为正确的输入数（原实现 / 年份索引）:")
+    for kind, counts in report["by_kind"].items():
+        print(f"  {kind:<12} {counts['legacy_correct']:>8} / {counts['structured_correct']:<8} 共 {counts['inputs']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="填空题评分吞吐量基准测试")
+    parser.add_argument("--size", type=int, default=100_000, help="题库事件数 (默认: 100000)")
+    parser.add_argument("--answers", type=int, default=200_000, help="评分次数 (默认: 200000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    print(f"正在测试 {args.size} 个事件、{args.answers} 次评分...", file=sys.stderr)
+    report = run(args.size, args.answers, args.seed)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,170 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import config
+from benchmarks.synthetic import write_fixture
+from dashboard import Dashboard
+from data_handler import DataHandler
+from engine import QuizEngine
+from main import print_stats
+from quiz import Quiz
+from review_system import DueIndex, ReviewSystem
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+def measure(fn, repeat=3):
+    """先在 tracemalloc 下执行一次记录峰值内存，再重复计时取最短耗时"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {"seconds": min(timings), "peak_bytes": peak}
+
+
+def run_session(data_handler, review_system, quiz, num_questions, accuracy, rng):
+    """用脚本化的答案完成一次会话，返回作答数"""
+    engine = QuizEngine(data_handler, review_system, quiz)
+    session_id = engine.start_session(num_questions, "random")
+    answered = 0
+    while engine.next_question(session_id) is not None:
+        item = engine.sessions[session_id]["current"]
+        correct = rng.random() < accuracy
+        if item["type"] == "multiple_choice":
+            index = item["quiz_data"]["correct_index"]
+            if not correct:
+                index = (index + 1) % len(item["quiz_data"]["options"])
+            answer = chr(65 + index)
+        else:
+            answer = item["answer"] if correct else "0"
+        engine.submit_answer(session_id, answer, rng.uniform(1, 20))
+        answered += 1
+    engine.end_session(session_id)
+    return answered
+
+
+def benchmark_size(num_events, other_decks=0, repeat=3, session_questions=20, seed=0):
+    """对一个规模运行全部基准测试"""
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        data_file, stats_file = write_fixture(directory, num_events, other_decks, seed)
+        operations = {}
+
+        data_handler = DataHandler(data_file, stats_file)
+        operations["load_data"] = measure(data_handler.load_data, repeat)
+        operations["load_stats"] = measure(data_handler.load_stats, repeat)
+        operations["save_stats"] = measure(data_handler.save_stats, repeat)
+
+        review_system = ReviewSystem(data_handler)
+        operations["build_due_index"] = measure(lambda: DueIndex(data_handler), repeat)
+        operations["get_due_questions"] = measure(lambda: review_system.get_due_questions(limit=10), repeat)
+
+        quiz = Quiz(data_handler, review_system)
+        questions = list(data_handler.get_all_events().items())
+        operations["generate_multiple_choice"] = measure(
+            lambda: quiz.generate_multiple_choice(*rng.choice(questions)), repeat)
+
+        def quiet_print_stats():
+            with contextlib.redirect_stdout(io.StringIO()):
+                print_stats(data_handler)
+        operations["print_stats"] = measure(quiet_print_stats, repeat)
+
+        operations["build_dashboard"] = measure(lambda: Dashboard(data_handler).summary(), repeat)
+        dashboard = Dashboard(data_handler)
+
+        def quiet_print_dashboard():
+            with contextlib.redirect_stdout(io.StringIO()):
+                print_stats(data_handler, dashboard)
+        operations["print_stats_dashboard"] = measure(quiet_print_dashboard, repeat)
+
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        answered = run_session(data_handler, review_system, quiz, session_questions, 0.7, rng)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        mismatches = dashboard.validate()
+        if mismatches:
+            raise AssertionError(f"增量统计与全量计算不一致: {mismatches}")
+        data_handler.close()
+
+    return {
+        "size": num_events,
+        "other_decks": other_decks,
+        "operations": operations,
+        "session": {
+            "answers": answered,
+            "seconds": elapsed,
+            "seconds_per_answer": elapsed / answered if answered else 0,
+            "peak_bytes": peak,
+        },
+    }
+
+
+def run(sizes=DEFAULT_SIZES, other_decks=0, repeat=3, session_questions=20, seed=0):
+    results = []
+    for size in sizes:
+        print(f"正在测试 {size} 个事件...", file=sys.stderr)
+        results.append(benchmark_size(size, other_decks, repeat, session_questions, seed))
+    return {
+        "meta": {
+            "app_version": config.APP_VERSION,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def print_table(report):
+    for result in report["results"]:
+        print(f"\n事件数: {result['size']}")
+        for name, op in result["operations"].items():
+            print(f"  {name:<26} {op['seconds'] * 1000:>10.3f} ms  {op['peak_bytes'] / 1024:>10.1f} KiB")
+        session = result["session"]
+        print(f"  {'session':<26} {session['seconds_per_answer'] * 1000:>10.3f} ms/题 "
+              f"{session['peak_bytes'] / 1024:>10.1f} KiB ({session['answers']} 题)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="历史大事年表背诵助手性能基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="要测试的题库规模（事件数）")
+    parser.add_argument("--other-decks", type=int, default=0,
+                        help="统计文件中额外包含的同规模题库数量 (默认: 0)")
+    parser.add_argument("--repeat", type=int, default=3, help="每项操作的计时次数，取最短值 (默认: 3)")
+    parser.add_argument("--session-questions", type=int, default=20, help="模拟会话的问题数量 (默认: 20)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="把结果写入JSON文件；不指定时输出到标准输出")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.other_decks, args.repeat, args.session_questions, args.seed)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print_table(report)
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
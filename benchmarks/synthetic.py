@@ -0,0 +1,65 @@
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+import config
+
+
+def generate_events(num_events, seed=0):
+    """生成 num_events 个合成历史事件，答案为单个年份或年份范围"""
+    rng = random.Random(seed)
+    events = {}
+    for i in range(num_events):
+        start = rng.randint(1000, 2020)
+        if rng.random() < 0.3:
+            answer = f"{start} 年 - {start + rng.randint(1, 15)} 年"
+        else:
+            answer = f"{start} 年"
+        events[f"合成事件{i:07d}"] = answer
+    return events
+
+
+def generate_stats(events, studied_fraction=0.6, seed=0, now=None):
+    """为部分事件生成复习历史，约三分之一已到期"""
+    rng = random.Random(seed + 1)
+    now = now or datetime.now()
+    stats = {}
+    for question in events:
+        if rng.random() >= studied_fraction:
+            continue
+        total = rng.randint(1, 20)
+        correct = rng.randint(0, total)
+        interval = rng.choice([1, 2, 6, 15.0, 37.5])
+        last_review = now - timedelta(days=rng.uniform(0, interval * 1.5))
+        stats[question] = {
+            "total_attempts": total,
+            "correct_attempts": correct,
+            "wrong_attempts": total - correct,
+            "avg_time": rng.uniform(1, 20),
+            "last_review": last_review.isoformat(),
+            "next_review": (last_review + timedelta(days=interval)).isoformat(),
+            "interval": interval,
+            "ease_factor": round(rng.uniform(config.MIN_EASE_FACTOR, 3.0), 2),
+        }
+    return stats
+
+
+def write_fixture(directory, num_events, other_decks=0, seed=0):
+    """在 directory 中写入题库文件和统计文件，返回 (题库路径, 统计文件路径)
+
+    other_decks 个同规模的其他题库只写入统计文件，用于模拟多题库共享统计文件的情况。
+    """
+    events = generate_events(num_events, seed)
+    data_file = os.path.join(directory, f"bench_{num_events}.json")
+    stats_file = os.path.join(directory, "user_stats.json")
+
+    all_stats = {os.path.basename(data_file): generate_stats(events, seed=seed)}
+    for i in range(other_decks):
+        all_stats[f"other_{i}.json"] = generate_stats(events, seed=seed + i + 1)
+
+    with open(data_file, 'w', encoding='utf-8') as f:
+        json.dump(events, f, ensure_ascii=False, indent=4)
+    with open(stats_file, 'w', encoding='utf-8') as f:
+        json.dump(all_stats, f, ensure_ascii=False, indent=4)
+    return data_file, stats_file
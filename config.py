@@ -9,8 +9,50 @@ STATS_FILE = "user_stats.json"
 # 学习配置
 DEFAULT_SESSION_QUESTIONS = 10  # 默认每次会话的问题数量
 MAX_SESSION_QUESTIONS = 50      # 最大每次会话的问题数量
+MAX_SESSION_REQUEUES = 1        # 答错的题目在同一会话中最多重新排入队列的次数
+REQUEUE_GAP = 3                 # 答错的题目间隔多少道题后再次提问
+NEW_QUESTION_SHARE = 0.2        # 每批题目中至少留给未学习问题的比例，到期积压再多也会引入新题
+TERMINAL_UI = False             # 使用屏幕缓冲区和 ANSI 控制序列重绘的终端界面
 
 # 复习算法配置
 MIN_EASE_FACTOR = 1.3           # 最小难度系数
 INITIAL_EASE_FACTOR = 2.5       # 初始难度系数
-INITIAL_INTERVAL = 1            # 初始间隔（天）
\ No newline at end of file
+INITIAL_INTERVAL = 1            # 初始间隔（天）
+INTERVAL_AFTER_FIRST = 1        # 间隔为 1 天的问题答对后的新间隔（天），SM-2 原始算法为 6
+MAX_INTERVAL = 3650             # 最长复习间隔（天），防止间隔无限增长溢出日期范围
+PERFORMANCE_TIME_STEP = 5       # 答对时用时每多这么多秒，表现评分降低 1 分
+ANSWER_CACHE_SIZE = 4096        # 缓存多少个不同的用户输入的解析结果
+
+# 搜索配置
+SEARCH_MIN_SCORE = 0.3          # 搜索结果的最低相似度
+SEARCH_PAGE_SIZE = 20           # 搜索和浏览事件时每页显示的条数
+NEAR_DUPLICATE_THRESHOLD = 0.8  # 名称相似度达到该值的事件视为疑似重复
+
+# 持久化配置
+STATS_JOURNAL = True            # 以追加日志方式记录每次答题后的统计数据
+JOURNAL_COMPACT_THRESHOLD = 200 # 日志记录达到该数量时合并回统计快照
+COMPACT_STATS = True            # 内存中以紧凑记录保存统计数据（文件格式不变）
+DECK_SNAPSHOT = True            # 在题库旁保存二进制快照，启动时不必解析整个统计文件
+STORAGE_BACKEND = "json"        # 存储后端: json 或 sqlite
+SQLITE_FILE = "quizsys.db"      # SQLite 后端使用的数据库文件
+SQLITE_STATS_CACHE = 10000      # SQLite 后端在内存中缓存的统计记录数上限
+WRITE_BEHIND = False            # 由后台线程批量写入统计数据，答题时不等待磁盘
+WRITE_BEHIND_INTERVAL = 2.0     # 后台写入的最长间隔（秒）
+WRITE_BEHIND_MAX_PENDING = 20   # 待写入的问题达到该数量时立即写入
+HISTORY_LOG = True              # 把每次作答追加到列式历史记录中
+HISTORY_BUFFER_ROWS = 64        # 作答历史缓冲多少行后写盘（会话结束和退出时也会写盘）
+LAZY_DISTRACTOR_POOL = 2000     # 按需加载的 .jsonl 题库中用于抽取干扰项的答案数量
+DECK_CACHE_SIZE = 4             # 切换题库时保留在内存中的最近使用的题库数量
+DECK_PREFETCH = True            # 列出题库文件时在后台预先加载它们
+
+# 学习者配置
+PROFILES_DIR = "profiles"       # 各学习者统计数据所在目录
+DEFAULT_USER = None             # 默认学习者，None 表示使用共享的统计文件
+
+# 服务端配置
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_FLUSH_INTERVAL = 2.0     # 服务端批量写入统计数据的间隔（秒）
+SERVER_SESSION_TTL = 1800       # 会话闲置多少秒后被回收
+SERVER_MAX_SESSIONS = 10000     # 同时保留的会话数上限，超出时回收最久未使用的会话
+SERVER_MAX_BODY = 1 << 20       # 请求体的字节数上限
@@ -0,0 +1,263 @@
+import heapq
+import json
+import os
+from datetime import datetime
+
+import config
+from compact_stats import StatsStore, iso_to_epoch
+from data_handler import DataHandler, MemoryDataHandler, apply_journal, is_lazy_deck, journal_path, profile_stats_file
+from deck_manager import list_deck_files
+from distractor_index import DistractorIndex
+from file_lock import FileLock
+from quiz import Quiz
+from review_system import ReviewSystem
+
+SECONDS_PER_DAY = 86400
+
+
+def overdueness(now_ts, next_review_ts, interval):
+    """逾期时长相对于复习间隔的比例，越大越容易遗忘"""
+    return (now_ts - next_review_ts) / (max(interval, 1) * SECONDS_PER_DAY)
+
+
+def _due_from_json(stats_file, deck_paths, now_ts):
+    """读取一次统计文件并重放各题库的日志，产生 (逾期比例, 题库路径, 问题, 统计数据)"""
+    with FileLock(stats_file + ".lock"):
+        all_stats = {}
+        if os.path.exists(stats_file):
+            with open(stats_file, 'r', encoding='utf-8') as f:
+                all_stats = json.load(f)
+        for source_key, path in deck_paths.items():
+            deck_stats = all_stats.pop(source_key, {})
+            apply_journal(journal_path(stats_file, source_key), deck_stats)
+            for question, stats in deck_stats.items():
+                next_review_ts = iso_to_epoch(stats["next_review"])
+                if next_review_ts <= now_ts:
+                    yield overdueness(now_ts, next_review_ts, stats["interval"]), path, question, stats
+
+
+def _due_from_sqlite(user, deck_paths, now):
+    """用一次索引查询取出所有题库中到期的问题"""
+    from sqlite_handler import connect
+    conn = connect(config.SQLITE_FILE)
+    try:
+        rows = conn.execute(
+            "SELECT source_key, question, next_review, interval FROM stats "
+            "WHERE user = ? AND next_review <= ?", (user or "", now.isoformat())).fetchall()
+    finally:
+        conn.close()
+    now_ts = now.timestamp()
+    for source_key, question, next_review, interval in rows:
+        if source_key in deck_paths:
+            yield overdueness(now_ts, iso_to_epoch(next_review), interval), deck_paths[source_key], question, None
+
+
+class CrossDeckQueue:
+    """合并目录中所有题库到期问题的优先队列，最逾期的在前
+
+    只读取统计数据中到期的条目；JSON 存储后端同时保留这些条目的统计数据，出题时
+    不必打开整个题库。
+    """
+
+    def __init__(self, deck_manager, directory=".", now=None):
+        self.deck_manager = deck_manager
+        now = now or datetime.now()
+        deck_paths = {name: os.path.join(directory, name) for name in list_deck_files(directory)}
+
+        # 已打开的题库可能有尚未落盘的统计数据
+        deck_manager.flush_all()
+        if (deck_manager.backend or config.STORAGE_BACKEND) == "sqlite":
+            entries = _due_from_sqlite(deck_manager.user, deck_paths, now)
+        else:
+            stats_file = profile_stats_file(deck_manager.stats_file, deck_manager.user)
+            entries = _due_from_json(stats_file, deck_paths, now.timestamp())
+        self._heap = []
+        self.stats = {}   # (deck path, question) -> stats, empty for the SQLite backend
+        for score, path, question, stats in entries:
+            self._heap.append((-score, path, question))
+            if stats is not None:
+                self.stats[path, question] = stats
+        heapq.heapify(self._heap)
+        self.deck_count = len({path for _, path, _ in self._heap})
+
+    def __len__(self):
+        return len(self._heap)
+
+    def pop_batch(self, count):
+        """取出最逾期的 count 个问题，按题库分组返回 [(题库路径, [问题, ...]), ...]
+
+        组按其中最逾期的问题排序，这样每个题库在一批中只打开一次。
+        """
+        groups = {}
+        for _ in range(min(count, len(self._heap))):
+            _, path, question = heapq.heappop(self._heap)
+            groups.setdefault(path, []).append(question)
+        return list(groups.items())
+
+
+class DueItemsHandler(DataHandler):
+    """只载入跨题库复习中到期问题的数据处理器
+
+    题库中只保留这些问题的答案，统计数据来自 CrossDeckQueue 已经读出的条目，
+    不建立整个题库的索引。答题结果照常追加到该题库的统计日志中；关闭时不合并日志，
+    留给日志达到阈值时或下次正常打开该题库时处理。
+    """
+    
+    supports_snapshot = False
+    partial_stats = True
+    
+    def __init__(self, data_file, stats_file, answers, stats, user=None):
+        self._due_answers = answers
+        self._due_stats = stats
+        super().__init__(data_file, stats_file, user)
+    
+    def load_data(self):
+        self.events = dict(self._due_answers)
+        self.build_year_ranges()
+    
+    def save_data(self):
+        # 题库中只有到期的问题，绝不能写回题库文件
+        pass
+    
+    def load_stats(self):
+        with self._file_lock:
+            # 只统计日志中已有的记录数，使合并阈值与正常打开题库时一致
+            self._journal_records = apply_journal(self.journal_file, {}) if self.journal_enabled else 0
+        stats = {question: dict(record) for question, record in self._due_stats.items()}
+        self.user_stats = StatsStore(stats) if config.COMPACT_STATS else stats
+    
+    def close(self):
+        self.stop_write_behind()
+        self.flush()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+def load_answers(path, questions):
+    """只取出题库中 questions 的答案；JSONL 题库按偏移索引读取，不解析整个文件"""
+    if is_lazy_deck(path):
+        from jsonl_deck import JsonlDeck
+        deck = JsonlDeck(path)
+        try:
+            return {question: deck[question] for question in questions if question in deck}
+        finally:
+            deck.close()
+    with open(path, 'r', encoding='utf-8') as f:
+        events = json.load(f)
+    return {question: events[question] for question in questions if question in events}
+
+
+def _batch_quizzes(deck_manager, queue, batch):
+    """为一批 [(题库路径, [问题, ...]), ...] 准备各题库的 Quiz
+
+    已在 DeckManager 中缓存的题库直接使用，保证内存中的统计数据一致；其他题库只
+    载入到期问题（SQLite 后端按需读取，仍由 DeckManager 打开）。未缓存题库的
+    选择题从这一批所有到期问题的答案中抽取干扰项。
+    """
+    quizzes = {}
+    light = {}
+    for path, questions in batch:
+        deck = deck_manager.cached(path)
+        if deck is None and not all((path, question) in queue.stats for question in questions):
+            deck = deck_manager.open(path)
+        if deck is not None:
+            quizzes[path] = deck.quiz
+        else:
+            try:
+                light[path] = load_answers(path, questions)
+            except (OSError, ValueError) as e:
+                print(f"\n读取题库 {os.path.basename(path)} 时出错: {e}")
+                quizzes[path] = None
+    if light:
+        pool = MemoryDataHandler({f"{path}\0{question}": answer for path, answers in light.items()
+                                  for question, answer in answers.items()})
+        distractors = DistractorIndex(pool)
+        for path, answers in light.items():
+            stats = {question: queue.stats[path, question] for question in answers}
+            data_handler = DueItemsHandler(path, deck_manager.stats_file, answers, stats, deck_manager.user)
+            quizzes[path] = Quiz(data_handler, ReviewSystem(data_handler), distractors=distractors)
+    return quizzes
+
+
+def iter_due_items(deck_manager, queue, num_questions, question_type="random"):
+    """按逾期程度依次产生 (Quiz, 题目, 题库路径)，最多 num_questions 道
+
+    每次从队列中取出一批，同一批中每个题库只准备一次；只载入到期问题的题库在这一批
+    题目被取完后关闭（把统计日志落盘）。
+    """
+    remaining = num_questions
+    while queue and remaining > 0:
+        batch = queue.pop_batch(remaining)
+        quizzes = _batch_quizzes(deck_manager, queue, batch)
+        try:
+            for path, questions in batch:
+                quiz = quizzes[path]
+                if quiz is None:
+                    continue
+                events = quiz.data_handler.get_all_events()
+                for question in questions:
+                    if question not in events:
+                        continue  # 统计数据中残留的已删除事件
+                    remaining -= 1
+                    yield quiz, quiz.prepare_question(question, events[question], question_type), path
+        finally:
+            for quiz in quizzes.values():
+                if isinstance(getattr(quiz, "data_handler", None), DueItemsHandler):
+                    quiz.data_handler.close()
+
+
+def study_all_due(deck_manager, num_questions, question_type="random", directory=".", screen=None):
+    """跨题库复习：按逾期程度依次复习所有题库中到期的问题，结果写回各自题库
+
+    screen 为 terminal_ui.Screen 时在屏幕缓冲区上提问（--tui）。
+    """
+    if num_questions < 1:
+        print("\n题目数量至少为 1！")
+        return None
+    queue = CrossDeckQueue(deck_manager, directory)
+    if not queue:
+        print("\n所有题库都没有需要复习的问题！")
+        return None
+
+    num_questions = min(num_questions, config.MAX_SESSION_QUESTIONS, len(queue))
+    items = iter_due_items(deck_manager, queue, num_questions, question_type)
+    try:
+        if screen is not None:
+            from terminal_ui import TerminalSession
+            terminal = TerminalSession(screen)
+            session = terminal.run(num_questions, question_type, plan=items)
+            quiz = terminal.quiz
+        else:
+            session, quiz = _ask_due_items(items, len(queue), queue.deck_count, num_questions)
+    finally:
+        # 关闭只载入到期问题的题库；输入结束（EOFError）时也要执行
+        items.close()
+        deck_manager.flush_all()
+
+    if quiz is not None:
+        if quiz.history is not None:
+            quiz.history.flush()
+        quiz.show_session_summary(session)
+    return session
+
+
+def _ask_due_items(items, due_count, deck_count, num_questions):
+    """在控制台中逐题提问，返回 (会话数据, 最后一道题所属的 Quiz)"""
+    print(f"\n共有 {due_count} 个到期事件，分布在 {deck_count} 个题库中。")
+    print(f"本次会话将包含 {num_questions} 个问题。")
+    print("按 Ctrl+C 随时结束会话。\n")
+
+    session = None
+    quiz = None
+    try:
+        for quiz, item, path in items:
+            if session is None:
+                session = quiz.new_session()
+            print(f"\n[题库: {os.path.basename(path)}]")
+            result = quiz.ask_question(item=item, session=session)
+            print(f"下次复习时间: {result['next_review'].strftime('%Y-%m-%d %H:%M')}")
+            input("\n按回车键继续...")
+    except KeyboardInterrupt:
+        print("\n会话已中断。")
+    return session, quiz
@@ -0,0 +1,140 @@
+from collections import Counter
+from datetime import date
+
+import profiling
+from data_handler import review_timestamp
+
+HISTOGRAM_DAYS = 7
+
+
+def _review_day(stats):
+    """返回下次复习日期的序数（date.toordinal）"""
+    return date.fromtimestamp(review_timestamp(stats)).toordinal()
+
+
+class Dashboard:
+    """主菜单统计信息的增量聚合
+
+    作为 DataHandler 的监听对象维护已学习数、答题次数和按天统计的待复习数，
+    主菜单每次刷新只需读取计数器，不再遍历整个题库。
+    """
+
+    def __init__(self, data_handler):
+        self.data_handler = data_handler
+        self.rebuild()
+        data_handler.add_listener(self)
+
+    @profiling.timed("build_dashboard")
+    def rebuild(self):
+        """根据当前事件和统计数据全量重建计数器"""
+        self._contrib = {}        # question -> (total_attempts, correct_attempts, review day)
+        self.total_attempts = 0
+        self.correct_attempts = 0
+        self._today = date.today().toordinal()
+        self._due_through_today = 0   # questions whose review day is today or earlier
+        self._due_later = Counter()   # review day -> count, only for days after today
+
+        all_events = self.data_handler.get_all_events()
+        for question, stats in self.data_handler.get_all_stats().items():
+            if question in all_events:
+                self._add(question, stats)
+
+    def _add(self, question, stats):
+        contrib = (stats["total_attempts"], stats["correct_attempts"], _review_day(stats))
+        self._contrib[question] = contrib
+        self.total_attempts += contrib[0]
+        self.correct_attempts += contrib[1]
+        if contrib[2] <= self._today:
+            self._due_through_today += 1
+        else:
+            self._due_later[contrib[2]] += 1
+
+    def _remove(self, question):
+        contrib = self._contrib.pop(question, None)
+        if contrib is None:
+            return
+        self.total_attempts -= contrib[0]
+        self.correct_attempts -= contrib[1]
+        if contrib[2] <= self._today:
+            self._due_through_today -= 1
+        else:
+            self._due_later[contrib[2]] -= 1
+            if not self._due_later[contrib[2]]:
+                del self._due_later[contrib[2]]
+
+    def _roll_to(self, today):
+        """日期变化后把已到期的天并入今天的待复习数"""
+        if today < self._today:
+            self.rebuild()  # clock moved backwards
+            return
+        for day in range(self._today + 1, today + 1):
+            self._due_through_today += self._due_later.pop(day, 0)
+        self._today = today
+
+    def on_stats_updated(self, question, stats):
+        if question not in self.data_handler.get_all_events():
+            return
+        self._remove(question)
+        self._add(question, stats)
+
+    def on_event_added(self, event, date):
+        stats = self.data_handler.get_question_stats(event)
+        if stats is not None:
+            self.on_stats_updated(event, stats)
+
+    def on_event_removed(self, event):
+        self._remove(event)
+
+    @property
+    def studied_events(self):
+        return len(self._contrib)
+
+    def due_histogram(self, today=None):
+        """返回从今天起 HISTOGRAM_DAYS 天每天的待复习数，已过期的计入今天"""
+        today = (today or date.today()).toordinal()
+        if today != self._today:
+            self._roll_to(today)
+        return [self._due_through_today] + [self._due_later.get(today + offset, 0)
+                                            for offset in range(1, HISTOGRAM_DAYS)]
+
+    def summary(self, today=None):
+        """返回与 DataHandler.get_stats_summary 相同字段的汇总，外加未来几天的待复习数"""
+        histogram = self.due_histogram(today)
+        return {
+            "total_events": len(self.data_handler.get_all_events()),
+            "studied_events": self.studied_events,
+            "total_attempts": self.total_attempts,
+            "correct_attempts": self.correct_attempts,
+            "due": histogram[0],
+            "due_histogram": histogram,
+        }
+
+    def recompute(self, today=None):
+        """不使用计数器，遍历全部统计数据重新计算汇总"""
+        today = (today or date.today()).toordinal()
+        all_events = self.data_handler.get_all_events()
+        histogram = [0] * HISTOGRAM_DAYS
+        studied_events = total_attempts = correct_attempts = 0
+        for question, stats in self.data_handler.get_all_stats().items():
+            if question not in all_events:
+                continue
+            studied_events += 1
+            total_attempts += stats["total_attempts"]
+            correct_attempts += stats["correct_attempts"]
+            offset = max(_review_day(stats) - today, 0)
+            if offset < HISTOGRAM_DAYS:
+                histogram[offset] += 1
+        return {
+            "total_events": len(all_events),
+            "studied_events": studied_events,
+            "total_attempts": total_attempts,
+            "correct_attempts": correct_attempts,
+            "due": histogram[0],
+            "due_histogram": histogram,
+        }
+
+    def validate(self, today=None):
+        """比较增量计数与全量重新计算的结果，返回不一致的字段 {字段: (增量值, 重新计算值)}"""
+        incremental = self.summary(today)
+        full = self.recompute(today)
+        return {key: (incremental[key], full[key]) for key in full if incremental[key] != full[key]}
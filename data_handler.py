@@ -1,81 +1,303 @@
 import json
 import os
+import re
+import threading
 from datetime import datetime
 
+import config
+import profiling
+from compact_stats import StatsStore, json_default
+from date_parser import parse_year_range
+from deck_snapshot import read_snapshot, snapshot_path, write_snapshot
+from file_lock import FileLock
+from search_index import SearchIndex
+
+
+def atomic_write_json(path, obj, **dump_kwargs):
+    """先写入临时文件再原子替换，避免写入中途崩溃损坏原文件"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, default=json_default, **dump_kwargs)
+        profiling.count("bytes_written", f.tell())
+        profiling.count("file_rewrites")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def atomic_write_lines(path, lines):
+    """以原子替换的方式写入按行存储的文本文件"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+        profiling.count("bytes_written", f.tell())
+        profiling.count("file_rewrites")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def is_lazy_deck(data_file):
+    """.jsonl 题库按行存储并按需加载"""
+    return data_file.endswith(".jsonl")
+
+
+def review_timestamp(stats):
+    """返回统计数据中下次复习时间的时间戳，紧凑记录无需解析字符串"""
+    next_review_ts = getattr(stats, "next_review_ts", None)
+    if next_review_ts is not None:
+        return next_review_ts
+    return datetime.fromisoformat(stats["next_review"]).timestamp()
+
+
+def journal_path(stats_file, source_key):
+    """返回题库 source_key 在统计文件 stats_file 旁的追加日志路径"""
+    return os.path.join(os.path.splitext(stats_file)[0] + "_journal", source_key + ".log")
+
+
+def apply_journal(journal_file, target, truncate=True):
+    """把日志中的完整记录依次写入 target，截掉损坏的尾部，返回记录数
+
+    调用方需持有统计文件的文件锁。truncate 为假时只读取，不修改日志文件。
+    """
+    if not os.path.exists(journal_file):
+        return 0
+    
+    records = 0
+    valid_length = 0
+    try:
+        with open(journal_file, 'rb') as f:
+            for line in f:
+                # A torn last line (crash mid-append) has no newline or fails to parse
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                target[record["q"]] = record["s"]
+                records += 1
+                valid_length += len(line)
+        
+        # 截掉损坏的尾部，保证后续追加从完整的行开始
+        if truncate and valid_length < os.path.getsize(journal_file):
+            with open(journal_file, 'r+b') as f:
+                f.truncate(valid_length)
+    except Exception as e:
+        print(f"重放统计日志时出错: {e}")
+    return records
+
+
+def profile_stats_file(stats_file, user):
+    """返回学习者 user 的统计文件路径，每个学习者的统计数据单独存放"""
+    if not user:
+        return stats_file
+    if not re.fullmatch(r"[\w.-]+", user) or user in (".", ".."):
+        raise ValueError(f"无效的用户名: {user}")
+    return os.path.join(config.PROFILES_DIR, user, os.path.basename(stats_file))
+
+
+# 题库文件不存在时创建的示例数据
+SAMPLE_EVENTS = {
+    "鸦片战争": "1840 年 - 1842 年",
+    "太平天国运动": "1851 年 - 1864 年",
+    "第二次鸦片战争": "1856 年 - 1860 年",
+    "甲午中日战争": "1894 年 - 1895 年",
+    "戊戌变法": "1898 年",
+    "武昌起义": "1911 年",
+    "中华民国成立，清帝退位": "1912 年",
+    "五四运动爆发": "1919 年",
+    "中共一大召开，中共成立": "1921 年",
+    "国民党一大召开，国共第一次合作实现": "1924 年",
+    "南昌起义、秋收起义": "1927 年",
+    "九一八事变": "1931 年",
+    "红军长征": "1934 年 - 1936 年",
+    "七七事变，全民族抗战开始": "1937 年",
+    "抗战胜利": "1945 年",
+    "国民党发动全面内战": "1946 年",
+    "新中国成立": "1949 年"
+}
+
+
 class DataHandler:
-    def __init__(self, data_file="history_events.json", stats_file="user_stats.json"):
+    # 存储后端是否使用题库快照（SQLite 后端本身按需读取，不需要）
+    supports_snapshot = True
+    # 是否只持有本题库部分问题的统计数据；为真时保存只合并修改过的问题，不整体替换
+    partial_stats = False
+    
+    def __init__(self, data_file="history_events.json", stats_file="user_stats.json", user=None):
         self.data_file = data_file
+        self.user = user
+        stats_file = profile_stats_file(stats_file, user)
         self.stats_file = stats_file
         self.events = {}
         self.user_stats = {}
         # Use the data file name as the key to isolate stats for different sources
         self.source_key = os.path.basename(data_file)
-        self.load_data()
-        self.load_stats()
+        # Per-deck append-only journal of stats updates, folded into stats_file on compaction
+        self.journal_enabled = config.STATS_JOURNAL
+        self.journal_file = journal_path(stats_file, self.source_key)
+        self._journal = None
+        self._journal_records = 0
+        # Objects notified about stats updates and event edits (indexes, counters, ...)
+        self._listeners = []
+        # Deferred writes (server mode): commits are queued until flush()
+        self.defer_writes = False
+        self._pending = {}
+        self._lock = threading.RLock()
+        # Questions changed by this process since the last snapshot, and the
+        # cross-process lock guarding the stats file and its journals
+        self._modified = set()
+        self._file_lock = FileLock(stats_file + ".lock")
+        # Write-behind thread, started by start_write_behind()
+        self._writer = None
+        self._writer_wake = threading.Event()
+        self._writer_stop = threading.Event()
+        # Compiled snapshot of this deck and its stats, plus the parsed year range of each answer
+        self.snapshot_file = None
+        if config.DECK_SNAPSHOT and self.supports_snapshot and not is_lazy_deck(data_file):
+            self.snapshot_file = snapshot_path(data_file, user)
+        self.year_ranges = {}
+        self._search_index = None
+        # 题库文件无法解析时的错误信息，此时不写回题库以免覆盖原文件
+        self.load_error = None
+        # 返回当前时间的函数，模拟器会换成模拟时钟
+        self.clock = datetime.now
+        if not self.load_snapshot():
+            self.load_data()
+            self.load_stats()
+        if config.WRITE_BEHIND:
+            self.start_write_behind()
     
+    @profiling.timed("load_data")
     def load_data(self):
         """从JSON文件加载历史事件数据"""
         try:
-            if os.path.exists(self.data_file):
+            if is_lazy_deck(self.data_file):
+                from jsonl_deck import JsonlDeck
+                is_new = not os.path.exists(self.data_file)
+                self.events = JsonlDeck(self.data_file)
+                if is_new:
+                    for event, date in SAMPLE_EVENTS.items():
+                        self.events[event] = date
+            elif os.path.exists(self.data_file):
                 with open(self.data_file, 'r', encoding='utf-8') as f:
                     self.events = json.load(f)
             else:
                 # 创建示例数据
-                self.events = {
-                    "鸦片战争": "1840 年 - 1842 年",
-                    "太平天国运动": "1851 年 - 1864 年",
-                    "第二次鸦片战争": "1856 年 - 1860 年",
-                    "甲午中日战争": "1894 年 - 1895 年",
-                    "戊戌变法": "1898 年",
-                    "武昌起义": "1911 年",
-                    "中华民国成立，清帝退位": "1912 年",
-                    "五四运动爆发": "1919 年",
-                    "中共一大召开，中共成立": "1921 年",
-                    "国民党一大召开，国共第一次合作实现": "1924 年",
-                    "南昌起义、秋收起义": "1927 年",
-                    "九一八事变": "1931 年",
-                    "红军长征": "1934 年 - 1936 年",
-                    "七七事变，全民族抗战开始": "1937 年",
-                    "抗战胜利": "1945 年",
-                    "国民党发动全面内战": "1946 年",
-                    "新中国成立": "1949 年"
-                }
+                self.events = dict(SAMPLE_EVENTS)
                 self.save_data()
         except Exception as e:
             print(f"加载数据时出错: {e}")
+            self.load_error = str(e)
             self.events = {}
+        self.build_year_ranges()
     
+    def build_year_ranges(self):
+        """加载时把每个不同的答案解析为年份范围；按需加载的题库在用到时才解析"""
+        if getattr(self.events, "lazy", False):
+            self.year_ranges = {}
+        else:
+            self.year_ranges = {answer: parse_year_range(answer) for answer in set(self.events.values())}
+    
+    def year_range(self, answer):
+        """返回答案的 (起始年份, 结束年份)，无法解析时返回 None
+        
+        结果保存在本题库的年份索引中，评分、干扰项和显示共用同一份解析结果。
+        """
+        try:
+            return self.year_ranges[answer]
+        except KeyError:
+            year_range = self.year_ranges[answer] = parse_year_range(answer)
+            return year_range
+    
+    @profiling.timed("save_data")
     def save_data(self):
         """保存历史事件数据到JSON文件"""
+        if getattr(self.events, "lazy", False):
+            # 按行存储的题库在修改时已经追加写入
+            return
+        if self.load_error:
+            print(f"题库文件 {self.data_file} 加载失败，未保存修改（可用 validate 命令检查题库）")
+            return
         try:
             with open(self.data_file, 'w', encoding='utf-8') as f:
                 json.dump(self.events, f, ensure_ascii=False, indent=4)
+                profiling.count("bytes_written", f.tell())
+                profiling.count("file_rewrites")
         except Exception as e:
             print(f"保存数据时出错: {e}")
     
+    @profiling.timed("load_snapshot")
+    def load_snapshot(self):
+        """从题库快照加载事件和统计数据，快照不存在或已过期时返回 False"""
+        if self.snapshot_file is None:
+            return False
+        with self._file_lock:
+            snapshot = read_snapshot(self.snapshot_file, self.data_file, self.stats_file, self.source_key)
+            if snapshot is None:
+                return False
+            self.events, deck_stats, self.year_ranges = snapshot
+            if config.COMPACT_STATS:
+                self.user_stats = StatsStore(deck_stats)
+            else:
+                self.user_stats = {question: record.to_dict() for question, record in deck_stats.items()}
+            if self.journal_enabled:
+                self.replay_journal()
+        return True
+    
+    def _refresh_snapshot(self, deck_stats):
+        """统计文件中本题库的数据刚与 deck_stats 一致时重写快照"""
+        if self.snapshot_file is not None and os.path.exists(self.data_file):
+            year_ranges = {answer: self.year_range(answer) for answer in set(self.events.values())}
+            self.year_ranges = write_snapshot(
+                self.snapshot_file, self.data_file, self.stats_file, self.events, deck_stats, year_ranges)
+    
+    @profiling.timed("load_stats")
     def load_stats(self):
         """加载用户学习统计数据"""
-        try:
-            if os.path.exists(self.stats_file):
-                with open(self.stats_file, 'r', encoding='utf-8') as f:
-                    all_stats = json.load(f)
-                
-                # Get stats for this specific data source
-                if self.source_key in all_stats:
-                    self.user_stats = all_stats[self.source_key]
+        with self._file_lock:
+            try:
+                if os.path.exists(self.stats_file):
+                    with open(self.stats_file, 'r', encoding='utf-8') as f:
+                        all_stats = json.load(f)
+                    
+                    # Get stats for this specific data source
+                    if self.source_key in all_stats:
+                        self.user_stats = all_stats[self.source_key]
+                    else:
+                        self.user_stats = {}
+                    del all_stats
                 else:
+                    # Create new stats file with empty dict
+                    os.makedirs(os.path.dirname(self.stats_file) or ".", exist_ok=True)
+                    with open(self.stats_file, 'w', encoding='utf-8') as f:
+                        json.dump({}, f)
                     self.user_stats = {}
-            else:
-                # Create new stats file with empty dict
-                with open(self.stats_file, 'w', encoding='utf-8') as f:
-                    json.dump({}, f)
-                self.user_stats = {}
-        except Exception as e:
-            print(f"加载统计数据时出错: {e}")
-            self.user_stats = {}
+                self._refresh_snapshot(self.user_stats)
+                if config.COMPACT_STATS:
+                    self.user_stats = StatsStore(self.user_stats)
+            except Exception as e:
+                print(f"加载统计数据时出错: {e}")
+                self.user_stats = StatsStore() if config.COMPACT_STATS else {}
+            
+            if self.journal_enabled:
+                self.replay_journal()
     
+    def replay_journal(self):
+        """在统计快照之上重放本题库的追加日志"""
+        self._journal_records = self._apply_journal(self.user_stats)
+    
+    def _apply_journal(self, target):
+        return apply_journal(self.journal_file, target)
+    
+    @profiling.timed("save_stats")
     def save_stats(self):
         """保存用户学习统计数据"""
+        with self._lock, self._file_lock:
+            self._save_stats()
+    
+    def _save_stats(self):
         try:
             # Load all stats
             all_stats = {}
@@ -84,42 +306,207 @@ class DataHandler:
                     all_stats = json.load(f)
             
             # Update stats for this source
-            all_stats[self.source_key] = self.user_stats
+            if self.journal_enabled or self.partial_stats:
+                # 其他进程的更新只存在于快照和日志中：先合并它们，再覆盖本进程修改过的问题
+                deck_stats = all_stats.get(self.source_key, {})
+                self._apply_journal(deck_stats)
+                for question in self._modified:
+                    deck_stats[question] = self.user_stats[question]
+                all_stats[self.source_key] = deck_stats
+            else:
+                all_stats[self.source_key] = self.user_stats
             
-            # Save back to file
-            with open(self.stats_file, 'w', encoding='utf-8') as f:
-                json.dump(all_stats, f, ensure_ascii=False, indent=4)
+            # Save back to file atomically, then drop the journal it now contains
+            atomic_write_json(self.stats_file, all_stats, ensure_ascii=False, indent=4)
+            self._modified.clear()
+            self._reset_journal()
+            # 其他题库的快照按各自数据的摘要判断，仍然有效
+            self._refresh_snapshot(all_stats[self.source_key])
         except Exception as e:
             print(f"保存统计数据时出错: {e}")
     
-    def update_question_stats(self, question, is_correct, time_taken):
-        """更新问题的统计数据"""
-        # Use file-scoped stats
-        if question not in self.user_stats:
-            self.user_stats[question] = {
-                "total_attempts": 0,
-                "correct_attempts": 0,
-                "wrong_attempts": 0,
-                "avg_time": 0,
-                "last_review": datetime.now().isoformat(),
-                "next_review": datetime.now().isoformat(),
-                "interval": 1,  # 以天为单位的间隔
-                "ease_factor": 2.5  # 难度系数
-            }
+    def add_listener(self, listener):
+        """注册监听对象
         
-        stats = self.user_stats[question]
-        stats["total_attempts"] += 1
+        监听对象可实现 on_stats_updated(question, stats)、on_event_added(event, date)
+        和 on_event_removed(event) 中的任意方法，用于增量维护索引。
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener):
+        """注销监听对象"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _notify(self, name, *args):
+        for listener in self._listeners:
+            handler = getattr(listener, name, None)
+            if handler is not None:
+                handler(*args)
+    
+    def notify_stats_updated(self, question):
+        """通知监听对象某个问题的统计数据已在外部被修改（不写盘）"""
+        with self._lock:
+            self._modified.add(question)
+        self._notify("on_stats_updated", question, self.user_stats[question])
+    
+    def commit_question_stats(self, question):
+        """持久化单个问题的统计数据
         
-        if is_correct:
-            stats["correct_attempts"] += 1
-        else:
-            stats["wrong_attempts"] += 1
+        日志模式下仅向本题库的日志追加一条紧凑记录，写入开销与统计总量无关；
+        记录数达到阈值时合并回统计快照。defer_writes 为真时只登记待写入，
+        由 flush() 批量落盘。
+        """
+        # _modified 和 _pending 由后台写入线程在同一把锁下读取和清空
+        with self._lock:
+            self._modified.add(question)
+            deferred = self.defer_writes
+            if deferred:
+                self._pending[question] = None
+                pending = len(self._pending)
+        self._notify("on_stats_updated", question, self.user_stats[question])
+        
+        if deferred:
+            if self._writer is not None and pending >= config.WRITE_BEHIND_MAX_PENDING:
+                self._writer_wake.set()
+            return
+        
+        self._write_question_stats([question])
+    
+    def start_write_behind(self, interval=None):
+        """启用后台写入：答题只登记待写入，由后台线程每隔 interval 秒
+        或待写入数达到 WRITE_BEHIND_MAX_PENDING 时调用 flush()"""
+        if self._writer is not None:
+            return
+        self.defer_writes = True
+        self._writer_stop.clear()
+        self._writer = threading.Thread(
+            target=self._write_behind_loop,
+            args=(interval or config.WRITE_BEHIND_INTERVAL,),
+            name=f"write-behind-{self.source_key}", daemon=True)
+        self._writer.start()
+    
+    def stop_write_behind(self):
+        """停止后台写入线程并把剩余的统计数据落盘"""
+        if self._writer is None:
+            return
+        self._writer_stop.set()
+        self._writer_wake.set()
+        self._writer.join()
+        self._writer = None
+        self.defer_writes = False
+        self.flush()
+    
+    def _write_behind_loop(self, interval):
+        while not self._writer_stop.is_set():
+            self._writer_wake.wait(interval)
+            self._writer_wake.clear()
+            self.flush()
+    
+    def flush(self):
+        """把延迟写入的统计数据落盘"""
+        with self._lock:
+            questions = list(self._pending)
+            self._pending.clear()
+        if questions:
+            self._write_question_stats(questions)
+    
+    @profiling.timed("write_question_stats")
+    def _write_question_stats(self, questions):
+        if not self.journal_enabled:
+            self.save_stats()
+            return
         
-        # 更新平均时间
-        stats["avg_time"] = ((stats["avg_time"] * (stats["total_attempts"] - 1)) + time_taken) / stats["total_attempts"]
+        with self._lock, self._file_lock:
+            try:
+                if self._journal is None:
+                    os.makedirs(os.path.dirname(self.journal_file), exist_ok=True)
+                    self._journal = open(self.journal_file, 'a', encoding='utf-8')
+                lines = "".join(
+                    json.dumps({"q": question, "s": self.user_stats[question]},
+                               ensure_ascii=False, separators=(',', ':'), default=json_default) + '\n'
+                    for question in questions)
+                self._journal.write(lines)
+                self._journal.flush()
+                if profiling.profiler.enabled:
+                    profiling.count("journal_appends", len(questions))
+                    profiling.count("bytes_written", len(lines.encode('utf-8')))
+                self._journal_records += len(questions)
+            except Exception as e:
+                print(f"写入统计日志时出错: {e}")
+                self.save_stats()
+                return
+            
+            if self._journal_records >= config.JOURNAL_COMPACT_THRESHOLD:
+                self.save_stats()
+    
+    def _reset_journal(self):
+        """清空已合并进快照的日志"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if os.path.exists(self.journal_file) and os.path.getsize(self.journal_file):
+            open(self.journal_file, 'w').close()
+        self._journal_records = 0
+    
+    def close(self):
+        """退出或切换题库前合并日志并释放文件句柄"""
+        self.stop_write_behind()
+        self.flush()
+        if self._journal_records:
+            self.save_stats()
+        elif self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if getattr(self.events, "lazy", False):
+            self.events.close()
+    
+    def update_question_stats(self, question, is_correct, time_taken, commit=True):
+        """更新问题的统计数据
+        
+        commit 为假时只修改内存中的统计数据，由调用方在安排好下次复习后
+        调用 commit_question_stats，每次作答只写一条日志记录。
+        """
+        # Use file-scoped stats; the lock keeps a concurrent flush() from seeing a half-applied update
+        with self._lock:
+            if question not in self.user_stats:
+                self.user_stats[question] = {
+                    "total_attempts": 0,
+                    "correct_attempts": 0,
+                    "wrong_attempts": 0,
+                    "avg_time": 0,
+                    "last_review": self.clock().isoformat(),
+                    "next_review": self.clock().isoformat(),
+                    "interval": config.INITIAL_INTERVAL,  # 以天为单位的间隔
+                    "ease_factor": config.INITIAL_EASE_FACTOR  # 难度系数
+                }
+            
+            stats = self.user_stats[question]
+            stats["total_attempts"] += 1
+            
+            if is_correct:
+                stats["correct_attempts"] += 1
+            else:
+                stats["wrong_attempts"] += 1
+            
+            # 更新平均时间
+            stats["avg_time"] = ((stats["avg_time"] * (stats["total_attempts"] - 1)) + time_taken) / stats["total_attempts"]
         
         # 保存更新后的统计数据
-        self.save_stats()
+        if commit:
+            self.commit_question_stats(question)
+    
+    def set_review_schedule(self, question, interval, ease_factor, last_review, next_review):
+        """写入一次复习后的间隔、难度系数和复习时间（不写盘）
+        
+        与 update_question_stats 一样在锁内修改，后台写入线程不会序列化到改了一半的统计数据。
+        """
+        with self._lock:
+            stats = self.user_stats[question]
+            stats["interval"] = interval
+            stats["ease_factor"] = ease_factor
+            stats["last_review"] = last_review.isoformat()
+            stats["next_review"] = next_review.isoformat()
     
     def get_question_stats(self, question):
         """获取问题的统计数据"""
@@ -131,7 +518,111 @@ class DataHandler:
         """获取所有历史事件"""
         return self.events
     
+    def add_event(self, event, date):
+        """添加或修改一个历史事件并保存"""
+        self.events[event] = date
+        self.save_data()
+        self._notify("on_event_added", event, date)
+    
+    def add_events(self, events):
+        """批量添加或修改历史事件，只写盘一次"""
+        self.events.update(events)
+        self.save_data()
+        for listener in self._listeners:
+            bulk_handler = getattr(listener, "on_events_added", None)
+            if bulk_handler is not None:
+                bulk_handler(events)
+            else:
+                handler = getattr(listener, "on_event_added", None)
+                if handler is not None:
+                    for event, date in events.items():
+                        handler(event, date)
+    
+    def remove_event(self, event):
+        """删除一个历史事件并保存"""
+        if event not in self.events:
+            return False
+        del self.events[event]
+        self.save_data()
+        self._notify("on_event_removed", event)
+        return True
+    
+    def get_search_index(self):
+        """返回事件名称和答案的搜索索引，第一次调用时建立，之后随题库增删同步更新"""
+        if self._search_index is None:
+            self._search_index = SearchIndex(self)
+            self.add_listener(self._search_index)
+        return self._search_index
+    
     def get_all_stats(self):
         """获取所有统计数据"""
         # 返回当前数据源的所有统计信息
         return self.user_stats
+    
+    def get_stats_summary(self, until):
+        """汇总已学习事件数、答题次数以及截至 until 需要复习的事件数"""
+        all_stats = self.user_stats
+        all_events = self.events
+        
+        studied_events = 0
+        total_attempts = 0
+        correct_attempts = 0
+        due = 0
+        until_ts = until.timestamp()
+        for question, stats in all_stats.items():
+            if question not in all_events:  # 确保问题仍然存在于事件列表中
+                continue
+            studied_events += 1
+            total_attempts += stats["total_attempts"]
+            correct_attempts += stats["correct_attempts"]
+            if review_timestamp(stats) <= until_ts:
+                due += 1
+        
+        return {
+            "total_events": len(all_events),
+            "studied_events": studied_events,
+            "total_attempts": total_attempts,
+            "correct_attempts": correct_attempts,
+            "due": due,
+        }
+
+
+class MemoryDataHandler(DataHandler):
+    """只在内存中保存题库和统计数据的 DataHandler，不读写任何文件，供模拟和批量出卷使用"""
+    
+    supports_snapshot = False
+    
+    def __init__(self, events, clock=None, data_file="memory.json"):
+        self._initial_events = events
+        super().__init__(data_file, "memory_stats.json")
+        self.journal_enabled = False
+        if clock is not None:
+            self.clock = clock
+    
+    def load_data(self):
+        self.events = dict(self._initial_events)
+    
+    def save_data(self):
+        pass
+    
+    def load_stats(self):
+        self.user_stats = {}
+    
+    def save_stats(self):
+        pass
+    
+    def start_write_behind(self, interval=None):
+        pass
+    
+    def _write_question_stats(self, questions):
+        pass
+
+
+def create_data_handler(data_file, stats_file, backend=None, user=None):
+    """按配置的存储后端创建数据处理器"""
+    backend = backend or config.STORAGE_BACKEND
+    user = user or config.DEFAULT_USER
+    if backend == "sqlite":
+        from sqlite_handler import SQLiteDataHandler
+        return SQLiteDataHandler(data_file, stats_file, user=user)
+    return DataHandler(data_file, stats_file, user)
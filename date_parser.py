@@ -0,0 +1,115 @@
+"""把答案和用户输入中的时间表达式解析为 (起始年份, 结束年份)
+
+支持阿拉伯数字和中文数字（"一八四〇年"、"一千八百四十年"）、全角字符、
+公元前年份、"1927年8月1日" 这样带月日的日期（月日被忽略）、ISO 日期，
+以及 "1840-42" 这样省略了结束年份前几位的范围。单个年份解析为起止相同的范围。
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+import config
+
+_CHINESE_DIGITS = {"〇": 0, "零": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4,
+                   "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_CHINESE_UNITS = {"十": 10, "百": 100, "千": 1000}
+_DIGIT_TABLE = str.maketrans({char: str(value) for char, value in _CHINESE_DIGITS.items()})
+
+_ISO_DATE_RE = re.compile(r"(\d{3,4})[-/.](\d{1,2})[-/.](\d{1,2})")
+_RANGE_SEP_RE = re.compile(r"\s*(?:-|—|–|~|至|到)\s*")
+_NUMBER_RE = re.compile(r"(?P<bc>公元前|前)?\s*(?P<number>\d+|[〇零一二两三四五六七八九十百千]+)\s*(?P<unit>年|月|日|号)?")
+_PACKED_RANGE_RE = re.compile(r"^(\d{4})(\d{4})$")
+# 最常见的写法（"1840"、"1840 年 - 1842 年"、"1840-42"）不必经过完整的解析
+_SIMPLE_RE = re.compile(r"\s*(\d{1,4})\s*年?(?:\s*(?:-|~|至|到)\s*(\d{1,4})\s*年?)?\s*")
+
+
+def _to_int(number):
+    """把阿拉伯数字或中文数字转换为整数"""
+    if number.isdigit():
+        return int(number)
+    if not any(char in _CHINESE_UNITS for char in number):
+        # 逐位读法: 一八四〇
+        value = 0
+        for char in number:
+            value = value * 10 + _CHINESE_DIGITS[char]
+        return value
+    # 位值读法: 一千八百四十
+    value = digit = 0
+    for char in number:
+        if char in _CHINESE_UNITS:
+            value += (digit or 1) * _CHINESE_UNITS[char]
+            digit = 0
+        else:
+            digit = _CHINESE_DIGITS[char]
+    return value + digit
+
+
+def _expand_abbreviated(previous, value, width):
+    """把 "1840-42" 中的 42 补全为 1842，补全后仍早于起始年份时进一个世纪（1898-02 -> 1902）"""
+    scale = 10 ** width
+    expanded = previous - previous % scale + value
+    return expanded + scale if expanded < previous else expanded
+
+
+def _parse_simple(text):
+    simple = _SIMPLE_RE.fullmatch(text)
+    if simple is None:
+        return None
+    start, end = simple.groups()
+    if end is None:
+        return (int(start), int(start))
+    end_year = int(end)
+    if len(end) < len(start) and end_year < int(start):
+        end_year = _expand_abbreviated(int(start), end_year, len(end))
+    return (int(start), end_year)
+
+
+def parse_year_range(answer):
+    """从时间表达式中解析 (起始年份, 结束年份)，公元前年份为负数，无法解析时返回 None"""
+    year_range = _parse_simple(answer)
+    if year_range is not None:
+        return year_range
+
+    text = unicodedata.normalize("NFKC", answer).strip()
+    if not any(char in _CHINESE_UNITS for char in text):
+        # 全角字符和逐位读的中文数字转换后大多也是常见写法
+        text = text.translate(_DIGIT_TABLE)
+        year_range = _parse_simple(text)
+        if year_range is not None:
+            return year_range
+    packed = _PACKED_RANGE_RE.match(text)
+    if packed:
+        # 去掉分隔符的范围，如 18401842
+        return (int(packed.group(1)), int(packed.group(2)))
+    text = _ISO_DATE_RE.sub(r"\1年\2月\3日", text)
+
+    years = []
+    widths = []
+    for part in _RANGE_SEP_RE.split(text):
+        for match in _NUMBER_RE.finditer(part):
+            if match.group("unit") in ("月", "日", "号"):
+                continue
+            number = match.group("number")
+            value = _to_int(number)
+            positional = not number.isdigit() and any(char in _CHINESE_UNITS for char in number)
+            if match.group("bc"):
+                value = -value
+            elif years and years[-1] > 0 and not positional and len(number) < widths[-1] and value < years[-1]:
+                value = _expand_abbreviated(years[-1], value, len(number))
+            years.append(value)
+            widths.append(len(str(abs(value))))
+    if not years:
+        return None
+    return (years[0], years[-1])
+
+
+def parse_start_year(answer):
+    """返回答案的起始年份，无法解析时返回 None"""
+    year_range = parse_year_range(answer)
+    return year_range[0] if year_range else None
+
+
+@lru_cache(maxsize=config.ANSWER_CACHE_SIZE)
+def parse_user_answer(text):
+    """解析用户输入的答案，结果有界缓存，同样的输入不会重复解析"""
+    return parse_year_range(text)
@@ -0,0 +1,158 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from dashboard import Dashboard
+from data_handler import create_data_handler
+from deck_snapshot import file_signature
+from review_system import ReviewSystem
+from quiz import Quiz
+
+
+DECK_EXTENSIONS = ('.json', '.jsonl')
+
+
+def list_deck_files(directory="."):
+    """列出目录中的题库文件（不包括统计文件）"""
+    stats_name = os.path.basename(config.STATS_FILE)
+    return sorted(name for name in os.listdir(directory)
+                  if name.endswith(DECK_EXTENSIONS) and name != stats_name)
+
+
+class Deck:
+    """一个已加载的题库及其复习系统和出题器"""
+
+    def __init__(self, data_handler):
+        self.data_handler = data_handler
+        self.review_system = ReviewSystem(data_handler)
+        self.quiz = Quiz(data_handler, self.review_system)
+        self.dashboard = Dashboard(data_handler)
+        self.signature = None  # (mtime_ns, size) of the deck file when last active
+
+
+class DeckManager:
+    """缓存已加载的题库，切换回最近用过的题库时不必重新解析题库和统计文件
+
+    以绝对路径为键按 LRU 淘汰，淘汰时关闭数据处理器以写回统计数据。缓存的题库
+    在不活跃期间被外部修改（修改时间或大小变化）时会重新加载。
+    """
+
+    def __init__(self, stats_file=config.STATS_FILE, backend=None, user=None, capacity=None):
+        self.stats_file = stats_file
+        self.backend = backend
+        self.user = user
+        self.capacity = capacity or config.DECK_CACHE_SIZE
+        self._decks = OrderedDict()   # abspath -> Deck, least recently used first
+        self._prefetching = {}        # abspath -> Future
+        self._current = None
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _load(self, path):
+        deck = Deck(create_data_handler(path, self.stats_file, self.backend, self.user))
+        deck.signature = file_signature(path)
+        return deck
+
+    def open(self, data_file):
+        """返回题库 data_file 对应的 Deck，命中缓存时直接复用"""
+        path = os.path.abspath(data_file)
+        with self._lock:
+            future = self._prefetching.get(path)
+        if future is not None:
+            # 正在后台加载，等待它完成后直接使用
+            try:
+                future.result()
+            except Exception as e:
+                print(f"预加载题库 {data_file} 时出错: {e}")
+
+        self._deactivate_current()
+        with self._lock:
+            deck = self._decks.pop(path, None)
+        if deck is not None and deck.signature != file_signature(path):
+            # 不活跃期间被其他程序修改过，丢弃缓存
+            deck.data_handler.close()
+            deck = None
+        if deck is None:
+            deck = self._load(path)
+
+        with self._lock:
+            self._decks[path] = deck
+            evicted = self._evict()
+        self._current = path
+        for old_deck in evicted:
+            old_deck.data_handler.close()
+        return deck
+
+    def cached(self, data_file):
+        """返回已缓存且未被外部修改的题库，不加载题库，也不改变当前题库和 LRU 顺序"""
+        path = os.path.abspath(data_file)
+        with self._lock:
+            deck = self._decks.get(path)
+        if deck is not None and (path == self._current or deck.signature == file_signature(path)):
+            return deck
+        return None
+
+    def _deactivate_current(self):
+        """离开当前题库前写回待写入的统计数据，并记录题库文件此时的状态"""
+        deck = self._decks.get(self._current)
+        if deck is not None:
+            deck.data_handler.flush()
+            deck.signature = file_signature(self._current)
+
+    def flush_all(self):
+        """把所有已缓存题库待写入的统计数据落盘"""
+        with self._lock:
+            decks = list(self._decks.values())
+        for deck in decks:
+            deck.data_handler.flush()
+
+    def _evict(self):
+        evicted = []
+        while len(self._decks) > self.capacity:
+            _, deck = self._decks.popitem(last=False)
+            evicted.append(deck)
+        return evicted
+
+    def prefetch(self, data_files):
+        """在后台线程中预先加载题库，只占用缓存的空余位置，不会淘汰已缓存的题库"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="deck-prefetch")
+        with self._lock:
+            free = self.capacity - len(self._decks) - len(self._prefetching)
+            for data_file in data_files:
+                if free <= 0:
+                    break
+                path = os.path.abspath(data_file)
+                if path in self._decks or path in self._prefetching:
+                    continue
+                self._prefetching[path] = self._executor.submit(self._prefetch_one, path)
+                free -= 1
+
+    def _prefetch_one(self, path):
+        try:
+            deck = self._load(path)
+        except Exception:
+            with self._lock:
+                self._prefetching.pop(path, None)
+            raise
+        with self._lock:
+            self._prefetching.pop(path, None)
+            if path not in self._decks:
+                # Prefetched decks go to the LRU end so they never push out decks in use
+                self._decks[path] = deck
+                self._decks.move_to_end(path, last=False)
+                return
+        deck.data_handler.close()
+
+    def close(self):
+        """关闭所有缓存的题库"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        with self._lock:
+            decks = list(self._decks.values())
+            self._decks.clear()
+        for deck in decks:
+            deck.data_handler.close()
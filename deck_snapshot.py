@@ -0,0 +1,116 @@
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import struct
+
+import profiling
+from compact_stats import STATS_KEYS, StatsRecord, iso_to_epoch, json_default
+from date_parser import parse_year_range
+
+# 文件布局: MAGIC | 头部长度 (uint32) | JSON 头部 | marshal 数据
+# 头部记录生成快照时题库文件和统计文件的修改时间与大小，以及本题库统计数据的摘要。
+# 统计文件由所有题库共用：其修改时间或大小变化时重新读取统计文件，本题库数据的
+# 摘要未变（只是其他题库合并了日志）时快照仍然有效。
+MAGIC = b"QSNAP004"
+_HEADER_LEN = struct.Struct("<I")
+
+
+def snapshot_path(data_file, user=None):
+    """快照与题库放在同一目录，每个学习者一份"""
+    suffix = f".{user}.snapshot" if user else ".snapshot"
+    return data_file + suffix
+
+
+def file_signature(path):
+    """返回文件的修改时间和大小，文件不存在时返回 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def stats_digest(deck_stats):
+    """返回本题库统计数据的摘要，与保存到统计文件时的 JSON 内容一一对应"""
+    text = json.dumps(deck_stats, default=json_default, ensure_ascii=False, sort_keys=True)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _deck_stats_digest(stats_file, source_key):
+    """读取统计文件中题库 source_key 当前的数据并返回摘要"""
+    with open(stats_file, 'r', encoding='utf-8') as f:
+        all_stats = json.load(f)
+    return stats_digest(all_stats.get(source_key, {}))
+
+
+def _stats_row(stats):
+    """按 StatsRecord 构造参数的顺序保存，复习时间存为整数时间戳，其他字段放在最后"""
+    extra = {key: value for key, value in stats.items() if key not in STATS_KEYS} or None
+    return (stats["total_attempts"], stats["correct_attempts"], stats["wrong_attempts"], stats["avg_time"],
+            iso_to_epoch(stats["last_review"]), iso_to_epoch(stats["next_review"]),
+            stats["interval"], stats["ease_factor"], extra)
+
+
+@profiling.timed("write_snapshot")
+def write_snapshot(path, data_file, stats_file, events, deck_stats, year_ranges=None):
+    """写入题库、解析好的年份范围和本题库的统计数据，返回年份范围字典
+    
+    deck_stats 须与统计文件中本题库的数据一致。
+    """
+    if year_ranges is None:
+        year_ranges = {answer: parse_year_range(answer) for answer in set(events.values())}
+    payload = marshal.dumps((
+        dict(events),
+        {question: _stats_row(stats) for question, stats in deck_stats.items()},
+        year_ranges,
+    ))
+    header = json.dumps({
+        "data_file": file_signature(data_file),
+        "stats_file": file_signature(stats_file),
+        "stats_digest": stats_digest(deck_stats),
+    }).encode('utf-8')
+
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC + _HEADER_LEN.pack(len(header)) + header)
+            f.write(payload)
+            profiling.count("bytes_written", f.tell())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"写入题库快照时出错: {e}")
+    return year_ranges
+
+
+@profiling.timed("read_snapshot")
+def read_snapshot(path, data_file, stats_file, source_key=None):
+    """读取快照，返回 (events, deck_stats, year_ranges)，deck_stats 的值为 StatsRecord；
+    快照不存在、损坏或过期时返回 None
+    
+    统计文件变化后，给出 source_key 时比较统计文件中该题库数据的摘要：无论统计文件
+    由谁改写（其他题库、恢复备份或手工编辑），本题库的数据未变时快照仍然有效。
+    """
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(MAGIC)] != MAGIC:
+                return None
+            start = len(MAGIC) + _HEADER_LEN.size
+            (header_len,) = _HEADER_LEN.unpack_from(mm, len(MAGIC))
+            header = json.loads(mm[start:start + header_len])
+            signature = file_signature(data_file)
+            if header["data_file"] is None or tuple(header["data_file"]) != signature:
+                return None
+            stats_signature = file_signature(stats_file)
+            if stats_signature is None:
+                return None
+            if header["stats_file"] is None or tuple(header["stats_file"]) != stats_signature:
+                if source_key is None or header["stats_digest"] != _deck_stats_digest(stats_file, source_key):
+                    return None
+            with memoryview(mm) as view:
+                events, stats, year_ranges = marshal.loads(view[start + header_len:])
+    except (OSError, ValueError, EOFError, TypeError, KeyError, BufferError):
+        return None
+    deck_stats = {question: StatsRecord(*row) for question, row in stats.items()}
+    return events, deck_stats, year_ranges
@@ -0,0 +1,309 @@
+"""检查目录中的所有题库文件
+
+每个题库在进程池中独立检查，结果按完成顺序逐个返回。检查结果按文件内容的
+SHA-256 缓存在统计文件旁的缓存文件中（不写入题库目录），文件和它在统计数据中的
+问题都没有变化时直接使用上次的结果。检查直接读取题库和统计文件，不加锁、不截断
+日志，除缓存文件外不创建或修改任何文件。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import config
+from data_handler import apply_journal, atomic_write_json, journal_path, profile_stats_file
+from date_parser import parse_year_range
+from deck_manager import list_deck_files
+
+CACHE_VERSION = 2
+CHOICE_OPTIONS = 4     # 选择题的选项数，题库中不同的答案至少要有这么多
+MIN_KEY_CHARS = 2      # 去掉空白后短于这个长度的事件名称视为空名称
+MAX_SAMPLES = 5        # 每类问题最多列出的示例数
+
+
+class _Pairs(list):
+    """json 对象解析为键值对列表，保留重复的键"""
+
+
+def _samples(items):
+    items = list(items)
+    text = "、".join(repr(item) for item in items[:MAX_SAMPLES])
+    return text + (" 等" if len(items) > MAX_SAMPLES else "")
+
+
+def _normalize_key(key):
+    return "".join(unicodedata.normalize("NFKC", key).split()).lower()
+
+
+def _parse_json(text, errors, warnings):
+    """解析 JSON 题库，返回 {事件: 时间}，无法作为题库加载时返回 None"""
+    try:
+        data = json.loads(text, object_pairs_hook=_Pairs)
+    except json.JSONDecodeError as e:
+        errors.append(f"JSON 语法错误（第 {e.lineno} 行第 {e.colno} 列）: {e.msg}")
+        return None
+    if not isinstance(data, _Pairs):
+        errors.append("顶层不是 {事件: 时间} 对象")
+        return None
+
+    events = {}
+    duplicates = []
+    for event, date in data:
+        if event in events:
+            duplicates.append(event)
+        events[event] = date
+    if duplicates:
+        warnings.append(f"{len(duplicates)} 个重复的事件名称，加载时只保留最后一个: {_samples(duplicates)}")
+    return events
+
+
+def _parse_jsonl(data, errors, warnings):
+    """按 JsonlDeck 的规则重放 JSONL 题库，返回 {事件: 时间}"""
+    lines = data.split(b"\n")
+    tail = lines.pop()
+    events = {}
+    for number, line in enumerate(lines, 1):
+        try:
+            record = json.loads(line)
+            event = record["event"]
+        except (ValueError, TypeError, KeyError):
+            # JsonlDeck 打开时把第一行无法解析的行视为写了一半的尾行并截断
+            errors.append(f"第 {number} 行无法解析，打开题库时该行及之后的 "
+                          f"{len(lines) - number + 1 + bool(tail)} 行会被截掉")
+            return events
+        if not isinstance(event, str):
+            errors.append(f"第 {number} 行的事件名称不是字符串: {event!r}")
+            continue
+        if record.get("deleted"):
+            events.pop(event, None)
+        else:
+            events[event] = record.get("date")
+    if tail.strip():
+        warnings.append("最后一行不完整（没有换行符），打开题库时会被截掉")
+    return events
+
+
+def check_events(events, stats_questions=()):
+    """检查题库内容，返回 (错误列表, 警告列表)"""
+    errors = []
+    warnings = []
+
+    not_text = [event for event, date in events.items() if not isinstance(date, str)]
+    if not_text:
+        errors.append(f"{len(not_text)} 个事件的时间不是字符串: {_samples(not_text)}")
+    answers = {event: date for event, date in events.items() if isinstance(date, str)}
+
+    short = [event for event in events if len("".join(event.split())) < MIN_KEY_CHARS]
+    if short:
+        warnings.append(f"{len(short)} 个事件名称为空或过短: {_samples(short)}")
+
+    groups = {}
+    for event in events:
+        groups.setdefault(_normalize_key(event), []).append(event)
+    similar = [" / ".join(repr(e) for e in group) for group in groups.values() if len(group) > 1]
+    if similar:
+        warnings.append(f"{len(similar)} 组事件名称只有空白、大小写或全半角不同: "
+                        + "；".join(similar[:MAX_SAMPLES]))
+
+    empty = [event for event, date in answers.items() if not date.strip()]
+    if empty:
+        errors.append(f"{len(empty)} 个事件的时间为空: {_samples(empty)}")
+
+    ranges = {date: parse_year_range(date) for date in set(answers.values()) if date.strip()}
+    unparsed = [event for event, date in answers.items() if date.strip() and ranges[date] is None]
+    if unparsed:
+        warnings.append(f"{len(unparsed)} 个事件的时间无法解析为年份，填空题只能按原文评分: {_samples(unparsed)}")
+
+    if len(ranges) < CHOICE_OPTIONS:
+        warnings.append(f"只有 {len(ranges)} 个不同的答案，不足以组成 {CHOICE_OPTIONS} 个选项的选择题，"
+                        "干扰项将根据年份合成")
+
+    orphaned = [question for question in stats_questions if question not in events]
+    if orphaned:
+        warnings.append(f"统计数据中有 {len(orphaned)} 个问题在题库中不存在: {_samples(orphaned)}")
+    return errors, warnings
+
+
+def validate_deck(path, cached_sha=None, stats_questions=()):
+    """检查一个题库文件，返回检查结果；内容的哈希值与 cached_sha 相同时只返回哈希值"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    sha = hashlib.sha256(data).hexdigest()
+    if sha == cached_sha:
+        return {"sha256": sha, "unchanged": True}
+
+    errors = []
+    warnings = []
+    events = None
+    if path.endswith(".jsonl"):
+        events = _parse_jsonl(data, errors, warnings)
+    else:
+        try:
+            events = _parse_json(data.decode("utf-8"), errors, warnings)
+        except UnicodeDecodeError as e:
+            errors.append(f"不是有效的 UTF-8 文本: {e}")
+    if events is not None:
+        deck_errors, deck_warnings = check_events(events, stats_questions)
+        errors.extend(deck_errors)
+        warnings.extend(deck_warnings)
+    return {
+        "sha256": sha,
+        "events": len(events) if events is not None else None,
+        "errors": errors,
+        "warnings": warnings,
+    }
+
+
+def load_stats_questions(stats_file, user=None, backend=None):
+    """返回 {题库文件名: [问题, ...]}，包括尚未合并到统计文件中的日志记录"""
+    if (backend or config.STORAGE_BACKEND) == "sqlite":
+        # 以只读方式打开，数据库不存在时不检查统计数据，也不创建数据库
+        if not os.path.exists(config.SQLITE_FILE):
+            return {}
+        conn = sqlite3.connect(Path(config.SQLITE_FILE).absolute().as_uri() + "?mode=ro", uri=True)
+        try:
+            rows = conn.execute("SELECT source_key, question FROM stats WHERE user = ?", (user or "",)).fetchall()
+        except sqlite3.Error as e:
+            print(f"读取统计数据库时出错，跳过统计数据检查: {e}")
+            return {}
+        finally:
+            conn.close()
+        questions = {}
+        for source_key, question in rows:
+            questions.setdefault(source_key, []).append(question)
+        return questions
+
+    # 不加文件锁、不截断日志：统计文件总是整体原子替换，日志不完整的尾行直接忽略
+    stats_file = profile_stats_file(stats_file, user)
+    all_stats = {}
+    if os.path.exists(stats_file):
+        with open(stats_file, 'r', encoding='utf-8') as f:
+            all_stats = json.load(f)
+    journal_dir = os.path.dirname(journal_path(stats_file, ""))
+    if os.path.isdir(journal_dir):
+        for name in os.listdir(journal_dir):
+            if name.endswith(".log"):
+                apply_journal(os.path.join(journal_dir, name), all_stats.setdefault(name[:-len(".log")], {}),
+                              truncate=False)
+    return {source_key: sorted(stats) for source_key, stats in all_stats.items()}
+
+
+def validation_cache_path(stats_file):
+    """返回检查结果缓存的路径，与统计文件放在一起"""
+    return os.path.splitext(stats_file)[0] + "_validation.cache"
+
+
+def _stats_digest(questions):
+    return hashlib.sha256("\n".join(questions).encode("utf-8")).hexdigest()
+
+
+def _load_cache(cache_file):
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get("version") == CACHE_VERSION:
+            return cache["files"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def validate_directory(directory=".", stats_file=None, user=None, backend=None,
+                       workers=None, use_cache=True, on_result=None, cache_file=None):
+    """并行检查目录中的所有题库，每得到一个文件的结果就调用 on_result(文件名, 结果, 是否来自缓存)
+
+    cache_file 默认为学习者统计文件旁的缓存文件，其中的结果按题库的绝对路径保存。
+    返回汇总 {"files", "checked", "cached", "errors", "warnings", "orphaned_decks"}。
+    """
+    stats_file = stats_file or config.STATS_FILE
+    names = list_deck_files(directory)
+    stats_questions = load_stats_questions(stats_file, user, backend)
+    cache_file = cache_file or validation_cache_path(profile_stats_file(stats_file, user))
+    cache = _load_cache(cache_file) if use_cache else {}
+    # 其他目录的结果原样保留
+    new_cache = dict(cache)
+    checked = set(names)
+    summary = {"files": len(names), "checked": 0, "cached": 0, "errors": 0, "warnings": 0}
+
+    def report(name, result, cached):
+        summary["cached" if cached else "checked"] += 1
+        summary["errors"] += bool(result["errors"])
+        summary["warnings"] += bool(result["warnings"])
+        if on_result:
+            on_result(name, result, cached)
+
+    pending = []
+    for name in names:
+        path = os.path.join(directory, name)
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        digest = _stats_digest(stats_questions.get(name, []))
+        entry = cache.get(key)
+        if entry is not None and entry["stats_digest"] != digest:
+            entry = None
+        if entry is not None and (entry["mtime_ns"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+            report(name, entry["result"], True)
+        else:
+            pending.append((name, path, stat, digest, entry))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(validate_deck, path, entry and entry["result"]["sha256"],
+                            stats_questions.get(name, [])): (name, path, stat, digest, entry)
+                for name, path, stat, digest, entry in pending
+            }
+            for future in as_completed(futures):
+                name, path, stat, digest, entry = futures[future]
+                result = future.result()
+                # 只是修改时间变了（如重新检出），内容与上次相同
+                cached = result.get("unchanged", False)
+                if cached:
+                    result = entry["result"]
+                new_cache[os.path.abspath(path)] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+                                                    "stats_digest": digest, "result": result}
+                report(name, result, cached)
+
+    # 学习者还没有统计数据目录时不创建它，只是不保存缓存
+    if use_cache and os.path.isdir(os.path.dirname(os.path.abspath(cache_file))):
+        # 去掉目录中已经删除的题库
+        directory_path = os.path.abspath(directory)
+        new_cache = {key: entry for key, entry in new_cache.items()
+                     if os.path.dirname(key) != directory_path or os.path.basename(key) in checked}
+        try:
+            atomic_write_json(cache_file, {"version": CACHE_VERSION, "files": new_cache}, ensure_ascii=False)
+        except OSError as e:
+            print(f"保存检查结果缓存时出错: {e}")
+
+    # 统计数据中属于目录里已不存在的题库的条目
+    summary["orphaned_decks"] = {}
+    if os.path.abspath(directory) == os.path.abspath(os.path.dirname(stats_file) or "."):
+        summary["orphaned_decks"] = {source_key: len(questions) for source_key, questions in stats_questions.items()
+                                     if source_key not in checked and questions}
+    return summary
+
+
+def print_result(name, result, cached):
+    """打印一个题库的检查结果"""
+    if result["errors"]:
+        status = "错误"
+    elif result["warnings"]:
+        status = "警告"
+    else:
+        status = "通过"
+    count = f"{result['events']} 个事件" if result["events"] is not None else "无法加载"
+    print(f"[{status}] {name}（{count}{'，缓存' if cached else ''}）")
+    for message in result["errors"]:
+        print(f"    错误: {message}")
+    for message in result["warnings"]:
+        print(f"    警告: {message}")
+
+
+def print_summary(summary):
+    for source_key, count in sorted(summary["orphaned_decks"].items()):
+        print(f"[警告] 统计数据中题库 {source_key} 的 {count} 条记录没有对应的题库文件")
+    print(f"\n共 {summary['files']} 个题库: {summary['errors']} 个有错误，{summary['warnings']} 个有警告；"
+          f"检查 {summary['checked']} 个，使用缓存 {summary['cached']} 个")
@@ -0,0 +1,147 @@
+import random
+import re
+from bisect import bisect_left, insort
+
+import config
+
+_YEAR_RE = re.compile(r"\d{3,4}")
+
+
+class DistractorIndex:
+    """选择题干扰项索引
+
+    保存去重后的答案池，按起始年份排序，可用二分查找取出年份相近的答案作为干扰项。
+    作为 DataHandler 的监听对象，随题库增删同步更新。
+    """
+
+    def __init__(self, data_handler):
+        self.data_handler = data_handler
+        self.rebuild()
+
+    def rebuild(self):
+        """根据当前题库全量重建索引
+
+        按需加载的大题库只抽样 config.LAZY_DISTRACTOR_POOL 个事件作为答案池，
+        避免为了干扰项读出整个题库。
+        """
+        events = self.data_handler.get_all_events()
+        if getattr(events, "lazy", False) and len(events) > config.LAZY_DISTRACTOR_POOL:
+            sample = random.sample(list(events), config.LAZY_DISTRACTOR_POOL)
+            self._answer_of = {event: events[event] for event in sample}
+        else:
+            self._answer_of = dict(events.items())
+        self._counts = {}      # answer -> number of events sharing it
+        self._by_year = []     # sorted (start_year, answer)
+        self._unparsed = []    # answers without a recognisable year
+        for answer in self._answer_of.values():
+            self._add_answer(answer, keep_sorted=False)
+        self._by_year.sort()
+
+    def _start_year(self, answer):
+        # 使用题库的年份索引，每个答案只解析一次
+        year_range = self.data_handler.year_range(answer)
+        return year_range[0] if year_range else None
+
+    def _add_answer(self, answer, keep_sorted=True):
+        count = self._counts.get(answer, 0)
+        self._counts[answer] = count + 1
+        if count:
+            return
+        year = self._start_year(answer)
+        if year is None:
+            self._unparsed.append(answer)
+        elif keep_sorted:
+            insort(self._by_year, (year, answer))
+        else:
+            self._by_year.append((year, answer))
+
+    def _remove_answer(self, answer):
+        count = self._counts.get(answer, 0)
+        if count > 1:
+            self._counts[answer] = count - 1
+            return
+        self._counts.pop(answer, None)
+        year = self._start_year(answer)
+        if year is None:
+            if answer in self._unparsed:
+                self._unparsed.remove(answer)
+        else:
+            pos = bisect_left(self._by_year, (year, answer))
+            if pos < len(self._by_year) and self._by_year[pos] == (year, answer):
+                del self._by_year[pos]
+
+    def on_event_added(self, event, date):
+        old_answer = self._answer_of.get(event)
+        if old_answer == date:
+            return
+        if old_answer is not None:
+            self._remove_answer(old_answer)
+        self._answer_of[event] = date
+        self._add_answer(date)
+
+    def on_events_added(self, events):
+        """批量导入后只排序一次，避免逐条 insort"""
+        for event, date in events.items():
+            old_answer = self._answer_of.get(event)
+            if old_answer == date:
+                continue
+            if old_answer is not None:
+                self._remove_answer(old_answer)
+            self._answer_of[event] = date
+            self._add_answer(date, keep_sorted=False)
+        self._by_year.sort()
+
+    def on_event_removed(self, event):
+        old_answer = self._answer_of.pop(event, None)
+        if old_answer is not None:
+            self._remove_answer(old_answer)
+
+    def draw(self, correct_answer, k=3, rng=random):
+        """抽取 k 个与正确答案不同、年份相近的干扰项
+
+        不同的答案不足时用正确答案的年份加减偏移补足，仍不足则返回较少的干扰项。
+        """
+        candidates = []
+        wanted = 2 * k  # sample from a small neighbourhood so the order still varies
+        year = self._start_year(correct_answer)
+        by_year = self._by_year
+
+        if year is not None and by_year:
+            # Walk outwards from the correct answer's year
+            right = bisect_left(by_year, (year, correct_answer))
+            left = right - 1
+            while len(candidates) < wanted and (left >= 0 or right < len(by_year)):
+                if right < len(by_year) and (left < 0 or by_year[right][0] - year <= year - by_year[left][0]):
+                    answer = by_year[right][1]
+                    right += 1
+                else:
+                    answer = by_year[left][1]
+                    left -= 1
+                if answer != correct_answer:
+                    candidates.append(answer)
+        else:
+            for answer in rng.sample(by_year, min(wanted, len(by_year))):
+                if answer[1] != correct_answer:
+                    candidates.append(answer[1])
+
+        if len(candidates) < k:
+            candidates.extend(a for a in self._unparsed[:wanted] if a != correct_answer)
+
+        if len(candidates) >= k:
+            return rng.sample(candidates, k)
+
+        # 答案池太小时根据正确答案合成相邻年份的干扰项
+        distractors = list(candidates)
+        seen = set(distractors)
+        seen.add(correct_answer)
+        if _YEAR_RE.search(correct_answer):
+            offset = 1
+            while len(distractors) < k and offset <= 10 * k:
+                for shift in (offset, -offset):
+                    option = _YEAR_RE.sub(lambda m: str(int(m.group()) + shift), correct_answer)
+                    if option not in seen and len(distractors) < k:
+                        seen.add(option)
+                        distractors.append(option)
+                offset += 1
+        rng.shuffle(distractors)
+        return distractors
@@ -0,0 +1,98 @@
+import time
+import uuid
+
+from review_system import ReviewSystem
+from quiz import Quiz
+
+
+class QuizEngine:
+    """不依赖终端输入输出的答题引擎
+
+    复用 Quiz 的出题、判分和记录逻辑，一个题库可同时服务多个会话。
+    """
+
+    def __init__(self, data_handler, review_system=None, quiz=None):
+        self.data_handler = data_handler
+        self.review_system = review_system or ReviewSystem(data_handler)
+        self.quiz = quiz or Quiz(data_handler, self.review_system)
+        self.sessions = {}
+
+    def start_session(self, num_questions=10, question_type="random"):
+        """开始一个会话，返回会话ID"""
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = {
+            "plan": self.quiz.plan_session(num_questions, question_type),
+            "num_questions": num_questions,
+            "current": None,
+            "shown_at": None,
+            "stats": self.quiz.new_session(),
+        }
+        return session_id
+
+    def _get_session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(f"会话不存在: {session_id}")
+        return session
+
+    def next_question(self, session_id):
+        """返回下一道题（不含答案），会话结束时返回 None"""
+        session = self._get_session(session_id)
+        if session["current"] is None:
+            if not session["plan"] or session["stats"]["questions_asked"] >= session["num_questions"]:
+                return None
+            session["current"] = session["plan"].popleft()
+            session["shown_at"] = time.perf_counter()
+
+        item = session["current"]
+        question = {
+            "question": item["question"],
+            "type": item["type"],
+            "prompt": item["quiz_data"]["question"],
+        }
+        if item["type"] == "multiple_choice":
+            question["options"] = item["quiz_data"]["options"]
+        return question
+
+    def submit_answer(self, session_id, answer, time_taken=None):
+        """提交当前题目的答案，返回判分结果"""
+        session = self._get_session(session_id)
+        item = session["current"]
+        if item is None:
+            raise ValueError("当前没有待回答的题目")
+
+        if time_taken is None:
+            time_taken = time.perf_counter() - session["shown_at"]
+        is_correct = self.quiz.grade_answer(item, str(answer))
+        result = self.quiz.record_answer(item, is_correct, time_taken, session["stats"])
+        self.quiz.requeue_if_wrong(session["plan"], item, is_correct)
+        session["current"] = None
+
+        return {
+            "question": item["question"],
+            "is_correct": is_correct,
+            "correct_answer": item["answer"],
+            "time_taken": time_taken,
+            "next_review": result["next_review"].isoformat(),
+        }
+
+    def session_summary(self, session_id):
+        """返回会话总结"""
+        stats = self._get_session(session_id)["stats"]
+        total_questions = stats["questions_asked"]
+        return {
+            "questions_asked": total_questions,
+            "correct_answers": stats["correct_answers"],
+            "wrong_answers": stats["wrong_answers"],
+            "accuracy": stats["correct_answers"] / total_questions if total_questions else 0,
+            "avg_time": stats["total_time"] / total_questions if total_questions else 0,
+            "total_time": stats["total_time"],
+        }
+
+    def end_session(self, session_id):
+        """结束会话并返回总结"""
+        summary = self.session_summary(session_id)
+        del self.sessions[session_id]
+        if self.quiz.history is not None:
+            self.quiz.history.flush()
+        return summary
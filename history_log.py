@@ -0,0 +1,259 @@
+"""逐题作答历史的列式存储与统计分析
+
+每一列单独保存为一个定长二进制文件（array 模块的原生字节序），字符串列（题库、
+问题）保存为 names.jsonl 中的行号。追加时在文件锁内一次写入所有列，读取时按块
+逐列读取，因此分析几百万行历史也不需要全部载入内存。
+"""
+import atexit
+import json
+import os
+import threading
+from array import array
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import config
+import profiling
+from file_lock import FileLock
+
+COLUMNS = (
+    ("timestamp", "d"),        # Unix 时间戳（秒）
+    ("deck", "I"),             # names.jsonl 中的行号
+    ("question", "I"),         # names.jsonl 中的行号
+    ("question_type", "B"),    # QUESTION_TYPES 中的序号
+    ("correct", "B"),
+    ("time_taken", "f"),       # 秒
+    ("performance", "B"),      # SM-2 表现评分 0-5
+    ("interval_before", "f"),  # 天
+    ("interval_after", "f"),   # 天
+)
+QUESTION_TYPES = ("multiple_choice", "fill_blank")
+NAMES_FILE = "names.jsonl"
+CHUNK_ROWS = 65536
+INTERVAL_BUCKETS = (1, 3, 7, 15, 30, 60, 120)  # 区间上界（天），最后一档为 >120
+
+_open_logs = {}
+_open_logs_lock = threading.Lock()
+
+
+def history_dir_for(stats_file):
+    """返回统计文件对应的历史目录，与统计日志目录并列"""
+    return os.path.splitext(stats_file)[0] + "_history"
+
+
+def open_history(directory):
+    """返回目录对应的 HistoryLog，同一进程内共享一个实例，退出时自动写盘"""
+    directory = os.path.abspath(directory)
+    with _open_logs_lock:
+        log = _open_logs.get(directory)
+        if log is None:
+            log = _open_logs[directory] = HistoryLog(directory)
+            atexit.register(log.flush)
+        return log
+
+
+class HistoryLog:
+    """追加写入的列式作答历史"""
+
+    def __init__(self, directory, buffer_rows=None):
+        self.directory = directory
+        self.buffer_rows = buffer_rows or config.HISTORY_BUFFER_ROWS
+        self._buffer = []
+        self._names = {}         # name -> id, mirrors names.jsonl
+        self._names_size = 0     # bytes of names.jsonl already read
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(os.path.join(directory, ".lock"))
+        os.makedirs(directory, exist_ok=True)
+
+    def _column_path(self, name):
+        return os.path.join(self.directory, name + ".col")
+
+    def append(self, deck, question, question_type, correct, time_taken, performance,
+               interval_before, interval_after, timestamp):
+        """记录一次作答，缓冲满 buffer_rows 行时写盘"""
+        with self._lock:
+            self._buffer.append((timestamp, deck, question, QUESTION_TYPES.index(question_type),
+                                 int(correct), time_taken, performance, interval_before, interval_after))
+            full = len(self._buffer) >= self.buffer_rows
+        if full:
+            self.flush()
+
+    def _sync_names(self):
+        """读入其他进程新增的名称，保证各进程分配的ID一致"""
+        path = os.path.join(self.directory, NAMES_FILE)
+        if not os.path.exists(path) or os.path.getsize(path) == self._names_size:
+            return
+        with open(path, 'rb') as f:
+            f.seek(self._names_size)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                self._names.setdefault(json.loads(line), len(self._names))
+                self._names_size += len(line)
+
+    def _intern(self, name, new_names):
+        name_id = self._names.get(name)
+        if name_id is None:
+            name_id = self._names[name] = len(self._names)
+            new_names.append(name)
+        return name_id
+
+    def _repair(self):
+        """截掉上次写入中断时各列多出的部分，使所有列行数一致"""
+        sizes = {}
+        for name, typecode in COLUMNS:
+            path = self._column_path(name)
+            sizes[name] = os.path.getsize(path) if os.path.exists(path) else 0
+        rows = min(sizes[name] // array(typecode).itemsize for name, typecode in COLUMNS)
+        for name, typecode in COLUMNS:
+            if sizes[name] != rows * array(typecode).itemsize:
+                with open(self._column_path(name), 'r+b') as f:
+                    f.truncate(rows * array(typecode).itemsize)
+        return rows
+
+    @profiling.timed("history_flush")
+    def flush(self):
+        """把缓冲的作答写入各列文件"""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+        try:
+            with self._file_lock:
+                self._sync_names()
+                self._repair()
+                new_names = []
+                columns = [array(typecode) for _, typecode in COLUMNS]
+                for row in rows:
+                    row = (row[0], self._intern(row[1], new_names), self._intern(row[2], new_names)) + row[3:]
+                    for column, value in zip(columns, row):
+                        column.append(value)
+                if new_names:
+                    data = "".join(json.dumps(name, ensure_ascii=False) + '\n' for name in new_names).encode('utf-8')
+                    with open(os.path.join(self.directory, NAMES_FILE), 'ab') as f:
+                        f.write(data)
+                    self._names_size += len(data)
+                for (name, _), column in zip(COLUMNS, columns):
+                    with open(self._column_path(name), 'ab') as f:
+                        column.tofile(f)
+                profiling.count("history_rows", len(rows))
+        except Exception as e:
+            print(f"写入作答历史时出错: {e}")
+
+    def load_names(self):
+        """返回 ID -> 名称 的列表"""
+        with self._file_lock:
+            self._sync_names()
+        names = [None] * len(self._names)
+        for name, name_id in self._names.items():
+            names[name_id] = name
+        return names
+
+    def iter_chunks(self, chunk_rows=CHUNK_ROWS):
+        """按块产生 {列名: array}，每块最多 chunk_rows 行"""
+        self.flush()
+        with self._file_lock:
+            total = self._repair()
+        files = {name: open(self._column_path(name), 'rb') if total else None for name, _ in COLUMNS}
+        try:
+            done = 0
+            while done < total:
+                count = min(chunk_rows, total - done)
+                chunk = {}
+                for name, typecode in COLUMNS:
+                    column = array(typecode)
+                    column.fromfile(files[name], count)
+                    chunk[name] = column
+                yield chunk
+                done += count
+        finally:
+            for f in files.values():
+                if f is not None:
+                    f.close()
+
+
+def _interval_bucket(interval):
+    for i, upper in enumerate(INTERVAL_BUCKETS):
+        if interval <= upper:
+            return i
+    return len(INTERVAL_BUCKETS)
+
+
+def bucket_label(index):
+    if index == 0:
+        return f"<= {INTERVAL_BUCKETS[0]} 天"
+    if index == len(INTERVAL_BUCKETS):
+        return f"> {INTERVAL_BUCKETS[-1]} 天"
+    return f"{INTERVAL_BUCKETS[index - 1]}-{INTERVAL_BUCKETS[index]} 天"
+
+
+@profiling.timed("history_analytics")
+def analyze(log, deck=None, top=10, min_attempts=3):
+    """流式统计：按复习间隔分档的记忆保持率、最难的事件和每天的作答量"""
+    names = log.load_names()
+    deck_id = names.index(deck) if deck in names else None
+
+    retention = [[0, 0] for _ in range(len(INTERVAL_BUCKETS) + 1)]  # [correct, total]
+    per_question = defaultdict(lambda: [0, 0, 0.0])                 # id -> [attempts, wrong, time]
+    per_day = defaultdict(lambda: [0, 0])                            # ordinal -> [answers, correct]
+    total_rows = 0
+    day_start = day_end = 0.0  # local-day bounds of the last timestamp seen
+    ordinal = 0
+
+    if deck is None or deck_id is not None:
+        for chunk in log.iter_chunks():
+            rows = zip(chunk["timestamp"], chunk["deck"], chunk["question"], chunk["correct"],
+                       chunk["time_taken"], chunk["interval_before"])
+            for timestamp, row_deck, question, correct, time_taken, interval_before in rows:
+                if deck_id is not None and row_deck != deck_id:
+                    continue
+                total_rows += 1
+                bucket = retention[_interval_bucket(interval_before)]
+                bucket[0] += correct
+                bucket[1] += 1
+                stats = per_question[question]
+                stats[0] += 1
+                stats[1] += 1 - correct
+                stats[2] += time_taken
+                if not day_start <= timestamp < day_end:
+                    day_date = date.fromtimestamp(timestamp)
+                    ordinal = day_date.toordinal()
+                    day_start = datetime(day_date.year, day_date.month, day_date.day).timestamp()
+                    day_end = (datetime(day_date.year, day_date.month, day_date.day) + timedelta(days=1)).timestamp()
+                day = per_day[ordinal]
+                day[0] += 1
+                day[1] += correct
+
+    hardest = sorted(
+        ((stats[1] / stats[0], stats[2] / stats[0], names[question], stats[0])
+         for question, stats in per_question.items() if stats[0] >= min_attempts),
+        reverse=True)[:top]
+    return {
+        "rows": total_rows,
+        "retention": [(bucket_label(i), correct, total) for i, (correct, total) in enumerate(retention)],
+        "hardest": [{"question": question, "error_rate": error_rate, "avg_time": avg_time, "attempts": attempts}
+                    for error_rate, avg_time, question, attempts in hardest],
+        "daily": [(date.fromordinal(day).isoformat(), answers, correct)
+                  for day, (answers, correct) in sorted(per_day.items())],
+    }
+
+
+def print_analytics(result, days=14):
+    """打印统计结果"""
+    print(f"共 {result['rows']} 条作答记录")
+
+    print("\n按复习间隔的记忆保持率:")
+    for label, correct, total in result["retention"]:
+        if total:
+            print(f"  {label:>12}: {correct / total * 100:5.1f}% ({correct}/{total})")
+
+    if result["hardest"]:
+        print("\n最难的事件:")
+        for i, item in enumerate(result["hardest"], 1):
+            print(f"  {i}. {item['question']}: 错误率 {item['error_rate'] * 100:.1f}%, "
+                  f"平均用时 {item['avg_time']:.1f} 秒, 作答 {item['attempts']} 次")
+
+    if result["daily"]:
+        print(f"\n最近 {days} 天的作答量:")
+        for day, answers, correct in result["daily"][-days:]:
+            print(f"  {day}: {answers} 题, 正确 {correct}")
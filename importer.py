@@ -0,0 +1,183 @@
+import csv
+import json
+import os
+import re
+import time
+import unicodedata
+
+from date_parser import parse_year_range
+
+FORMATS = ("csv", "tsv", "jsonl")
+MAX_REPORTED_ROWS = 20
+
+_RANGE_SEP_RE = re.compile(r"\s*(?:-|－|—|–|~|～|至|到)\s*")
+_UNIT_RE = re.compile(r"(\d+)\s*(年|月|日)\s*")
+_BARE_YEAR_RE = re.compile(r"^(\d{3,4})$")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def detect_format(path):
+    """根据扩展名判断导入文件格式"""
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext not in FORMATS:
+        raise ValueError(f"不支持的文件格式: {path}（支持 {', '.join(FORMATS)}）")
+    return ext
+
+
+def iter_rows(path, file_format=None):
+    """逐行读取导入文件，产生 (行号, 事件, 时间)，不会把整个文件读入内存
+
+    CSV/TSV 的前两列为事件和时间，首行为表头（event/事件）时跳过；
+    JSONL 每行一个 {"event": ..., "date": ...} 对象。
+    """
+    file_format = file_format or detect_format(path)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if file_format == "jsonl":
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    yield line_no, record.get("event"), record.get("date")
+                except (ValueError, AttributeError):
+                    yield line_no, None, None
+            return
+
+        reader = csv.reader(f, delimiter="\t" if file_format == "tsv" else ",")
+        for row in reader:
+            if not row or not any(cell.strip() for cell in row):
+                continue
+            if reader.line_num == 1 and row[0].strip().lower() in ("event", "事件"):
+                continue
+            if len(row) < 2:
+                yield reader.line_num, row[0], None
+            else:
+                yield reader.line_num, row[0], row[1]
+
+
+def normalize_date(date):
+    """把时间字符串整理成题库统一的格式，例如 "1840-1842" -> "1840 年 - 1842 年"
+
+    是否有效由 date_parser.parse_year_range 决定，与评分时的解析规则一致，无法解析
+    出年份时返回 None。整理只调整空格和单位，整理后解析结果变化时保留原文。
+    """
+    if not isinstance(date, str):
+        return None
+    text = _SPACES_RE.sub(" ", unicodedata.normalize("NFKC", date)).strip()
+    if not text:
+        return None
+    year_range = parse_year_range(text)
+    if year_range is None:
+        return None
+    parts = []
+    for part in _RANGE_SEP_RE.split(text):
+        part = _BARE_YEAR_RE.sub(r"\1 年", part.strip())
+        parts.append(_UNIT_RE.sub(r"\1 \2 ", part).strip())
+    formatted = " - ".join(parts)
+    return formatted if parse_year_range(formatted) == year_range else text
+
+
+def import_events(data_handler, paths, overwrite=False, file_format=None, check_near_duplicates=True):
+    """把若干文件中的事件导入题库，所有新增事件一次性写入
+
+    与题库中已有事件同名且时间相同的视为重复，时间不同的视为冲突，
+    overwrite 为真时用导入的时间覆盖，否则保留原有时间。新事件名称与题库中
+    其他事件相近时记为疑似重复，只报告不拦截（check_near_duplicates 为假时跳过）。
+    返回导入报告。
+    """
+    existing = data_handler.get_all_events()
+    accepted = {}
+    report = {
+        "rows": 0,
+        "imported": 0,
+        "duplicates": 0,
+        "invalid": 0,
+        "conflicts": 0,
+        "near_duplicates": 0,
+        "conflict_samples": [],
+        "near_duplicate_samples": [],
+        "invalid_samples": [],
+    }
+
+    start = time.perf_counter()
+    for path in paths:
+        for line_no, event, date in iter_rows(path, file_format):
+            report["rows"] += 1
+            event = event.strip() if isinstance(event, str) else ""
+            normalized = normalize_date(date)
+            if not event or normalized is None:
+                report["invalid"] += 1
+                if len(report["invalid_samples"]) < MAX_REPORTED_ROWS:
+                    report["invalid_samples"].append((path, line_no, event, date))
+                continue
+
+            if event in accepted:
+                current = accepted[event]
+            elif event in existing:
+                current = existing[event]
+            else:
+                current = None
+
+            # 题库中原有的时间可能未经整理，按同样的规则整理后再比较
+            if current == normalized or (current is not None and normalize_date(current) == normalized):
+                report["duplicates"] += 1
+                continue
+            if current is not None:
+                report["conflicts"] += 1
+                if len(report["conflict_samples"]) < MAX_REPORTED_ROWS:
+                    report["conflict_samples"].append((path, line_no, event, current, normalized))
+                if not overwrite:
+                    continue
+            accepted[event] = normalized
+
+    new_events = [event for event in accepted if event not in existing]
+    if accepted:
+        data_handler.add_events(accepted)
+    
+    # 导入后再检查，这样同一批导入的事件之间也能互相发现
+    if new_events and check_near_duplicates:
+        index = data_handler.get_search_index()
+        reported = set()
+        for event in new_events:
+            for _, other, _ in index.near_duplicates(event):
+                pair = frozenset((event, other))
+                if pair in reported:
+                    continue
+                reported.add(pair)
+                report["near_duplicates"] += 1
+                if len(report["near_duplicate_samples"]) < MAX_REPORTED_ROWS:
+                    report["near_duplicate_samples"].append((event, other))
+    report["imported"] = len(accepted)
+    report["seconds"] = time.perf_counter() - start
+    report["rows_per_second"] = report["rows"] / report["seconds"] if report["seconds"] > 0 else 0
+    return report
+
+
+def print_report(report, overwrite=False):
+    """打印导入报告"""
+    print(f"读取 {report['rows']} 行，导入 {report['imported']} 个事件，"
+          f"重复 {report['duplicates']}，冲突 {report['conflicts']}，无效 {report['invalid']}，"
+          f"疑似重复 {report['near_duplicates']}")
+    print(f"耗时 {report['seconds']:.2f} 秒 ({report['rows_per_second']:.0f} 行/秒)")
+
+    if report["conflict_samples"]:
+        action = "已覆盖" if overwrite else "已保留原有时间"
+        print(f"\n时间不一致的事件（{action}）:")
+        for path, line_no, event, current, new in report["conflict_samples"]:
+            print(f"  {path}:{line_no} {event}: {current} -> {new}")
+        if report["conflicts"] > len(report["conflict_samples"]):
+            print(f"  ... 另有 {report['conflicts'] - len(report['conflict_samples'])} 个")
+
+    if report["near_duplicate_samples"]:
+        print("\n名称相近、可能重复的事件:")
+        for event, other in report["near_duplicate_samples"]:
+            print(f"  {event} ~ {other}")
+        if report["near_duplicates"] > len(report["near_duplicate_samples"]):
+            print(f"  ... 另有 {report['near_duplicates'] - len(report['near_duplicate_samples'])} 对")
+    
+    if report["invalid_samples"]:
+        print("\n无法识别的行:")
+        for path, line_no, event, date in report["invalid_samples"]:
+            print(f"  {path}:{line_no} {event!r}: {date!r}")
+        if report["invalid"] > len(report["invalid_samples"]):
+            print(f"  ... 另有 {report['invalid'] - len(report['invalid_samples'])} 行")
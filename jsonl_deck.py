@@ -0,0 +1,247 @@
+import json
+import os
+import threading
+import zlib
+from collections.abc import MutableMapping
+
+import profiling
+from data_handler import DataHandler, atomic_write_json, atomic_write_lines
+
+# 每行一个事件: {"event": ..., "date": ...}；删除时追加 {"event": ..., "deleted": true}
+# 同一事件出现多次时以最后一行为准。
+INDEX_SUFFIX = ".idx"
+_TAIL_CHECK_BYTES = 4096
+
+
+def _tail_crc(f, size):
+    """计算文件前 size 字节中最后一段的校验值，用来判断偏移索引是否仍然有效"""
+    start = max(0, size - _TAIL_CHECK_BYTES)
+    f.seek(start)
+    return zlib.crc32(f.read(size - start))
+
+
+def read_events(path):
+    """以只读方式读出整个题库，返回 {事件: 时间}，忽略不完整的尾行"""
+    events = {}
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if record.get("deleted"):
+                events.pop(record["event"], None)
+            else:
+                events[record["event"]] = record["date"]
+    return events
+
+
+class JsonlDeck(MutableMapping):
+    """按行存储的题库，接口与 dict 相同
+
+    打开时只载入事件名称到行偏移量的索引（保存在 .idx 附属文件中），答案在第一次
+    访问时才从文件中读出；新增、修改和删除都只在文件末尾追加一行。
+    """
+
+    lazy = True
+
+    def __init__(self, path):
+        self.path = path
+        self.index_file = path + INDEX_SUFFIX
+        self._offsets = {}    # event -> byte offset of its latest line
+        self._cache = {}      # event -> answer, for entries already materialized
+        self._dead = 0        # superseded lines and tombstones, reclaimed by compact()
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        self._load_index()
+
+    @profiling.timed("load_deck_index")
+    def _load_index(self):
+        """读取偏移索引；文件在索引之后只被追加过时只扫描新增部分"""
+        size = os.path.getsize(self.path)
+        scan_from = 0
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index["size"] <= size and _tail_crc(self._file, index["size"]) == index["tail_crc"]:
+                self._offsets = dict(zip(index["events"], index["offsets"]))
+                self._dead = index["dead"]
+                scan_from = index["size"]
+        except (OSError, ValueError, KeyError):
+            pass
+        if scan_from < size:
+            self._scan(scan_from)
+
+    def _scan(self, start):
+        """从 start 开始逐行扫描，更新索引并截掉不完整的尾行"""
+        if start == 0:
+            self._offsets = {}
+            self._dead = 0
+        self._file.seek(start)
+        offset = start
+        for line in self._file:
+            # A torn last line (crash mid-append) has no newline or fails to parse
+            if not line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            self._apply(record, offset)
+            offset += len(line)
+        if offset < os.path.getsize(self.path):
+            self._file.truncate(offset)
+
+    def _apply(self, record, offset):
+        event = record["event"]
+        if event in self._offsets:
+            self._dead += 1
+        if record.get("deleted"):
+            if self._offsets.pop(event, None) is not None:
+                self._dead += 1
+        else:
+            self._offsets[event] = offset
+
+    def save_index(self):
+        """把偏移索引写入附属文件，下次打开时不必扫描整个题库"""
+        with self._lock:
+            self._file.flush()
+            size = os.path.getsize(self.path)
+            atomic_write_json(self.index_file, {
+                "size": size,
+                "tail_crc": _tail_crc(self._file, size),
+                "dead": self._dead,
+                "events": list(self._offsets),
+                "offsets": list(self._offsets.values()),
+            }, ensure_ascii=False, separators=(',', ':'))
+
+    def _append(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        self._file.write(line)
+        self._file.flush()
+        profiling.count("bytes_written", len(line))
+        return offset
+
+    def __getitem__(self, event):
+        answer = self._cache.get(event)
+        if answer is not None:
+            return answer
+        offset = self._offsets[event]
+        with self._lock:
+            self._file.seek(offset)
+            answer = json.loads(self._file.readline())["date"]
+        profiling.count("deck_entries_materialized")
+        self._cache[event] = answer
+        return answer
+
+    def __setitem__(self, event, date):
+        with self._lock:
+            if event in self._offsets:
+                self._dead += 1
+            self._offsets[event] = self._append({"event": event, "date": date})
+            self._cache[event] = date
+
+    def update(self, events):
+        """批量追加多个事件，只写一次文件"""
+        events = dict(events)
+        with self._lock:
+            lines = [(json.dumps({"event": event, "date": date}, ensure_ascii=False) + '\n').encode('utf-8')
+                     for event, date in events.items()]
+            data = b"".join(lines)
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(data)
+            self._file.flush()
+            profiling.count("bytes_written", len(data))
+            for (event, date), line in zip(events.items(), lines):
+                if event in self._offsets:
+                    self._dead += 1
+                self._offsets[event] = offset
+                self._cache[event] = date
+                offset += len(line)
+
+    def __delitem__(self, event):
+        with self._lock:
+            if event not in self._offsets:
+                raise KeyError(event)
+            self._append({"event": event, "deleted": True})
+            del self._offsets[event]
+            self._cache.pop(event, None)
+            self._dead += 2  # the superseded line and the tombstone itself
+
+    def __contains__(self, event):
+        return event in self._offsets
+
+    def __iter__(self):
+        return iter(list(self._offsets))
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def items(self):
+        """按文件顺序一次性读出所有条目（查看全部、导出时使用）"""
+        result = []
+        with self._lock:
+            self._file.seek(0)
+            offset = 0
+            for line in self._file:
+                record = json.loads(line)
+                if self._offsets.get(record["event"]) == offset:
+                    result.append((record["event"], record["date"]))
+                offset += len(line)
+        return result
+
+    def values(self):
+        return [date for _, date in self.items()]
+
+    def compact(self):
+        """重写文件，去掉被覆盖的行和删除标记"""
+        lines = [json.dumps({"event": event, "date": date}, ensure_ascii=False) + '\n'
+                 for event, date in self.items()]
+        with self._lock:
+            self._file.close()
+            atomic_write_lines(self.path, lines)
+            self._file = open(self.path, 'a+b')
+            self._cache.clear()
+            self._scan(0)
+
+    def close(self):
+        """死行超过一半时先压缩，然后保存索引并关闭文件"""
+        if self._dead > len(self._offsets):
+            self.compact()
+        self.save_index()
+        self._file.close()
+
+
+def convert_json_deck(json_file, stats_file, jsonl_file=None, user=None):
+    """把 dict 格式的 JSON 题库转换为按行存储的 .jsonl 题库
+
+    统计数据按题库文件名保存，因此同时把（学习者 user 的）统计数据复制到新文件名下。
+    返回新文件路径、事件数和复制的统计条数。
+    """
+    jsonl_file = jsonl_file or os.path.splitext(json_file)[0] + ".jsonl"
+    with open(json_file, 'r', encoding='utf-8') as f:
+        events = json.load(f)
+    atomic_write_lines(jsonl_file, (
+        json.dumps({"event": event, "date": date}, ensure_ascii=False) + '\n'
+        for event, date in events.items()))
+    del events
+    if os.path.exists(jsonl_file + INDEX_SUFFIX):
+        os.remove(jsonl_file + INDEX_SUFFIX)
+
+    old_handler = DataHandler(json_file, stats_file, user)
+    new_handler = DataHandler(jsonl_file, stats_file, user)
+    old_stats = old_handler.get_all_stats()
+    # Queue every copied entry and write them in one batch
+    new_handler.defer_writes = True
+    for question, stats in old_stats.items():
+        new_handler.get_all_stats()[question] = stats
+        new_handler.commit_question_stats(question)
+    num_events = len(new_handler.get_all_events())
+    old_handler.close()
+    new_handler.close()
+    return jsonl_file, num_events, len(old_stats)
@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import config
+
+
+class HttpClient:
+    """在一条 keep-alive 连接上发送 JSON 请求的简易客户端"""
+
+    def __init__(self, reader, writer, host):
+        self.reader = reader
+        self.writer = writer
+        self.host = host
+
+    @classmethod
+    async def connect(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer, host)
+
+    async def request(self, method, path, body=None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else b""
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value.strip())
+        payload = json.loads(await self.reader.readexactly(length)) if length else None
+        if status != 200:
+            raise RuntimeError(f"{method} {path} -> {status}: {payload}")
+        return payload
+
+    def close(self):
+        self.writer.close()
+
+
+async def run_learner(host, port, deck, num_questions, latencies, rng, user=None):
+    """模拟一个学习者完成一次会话，返回作答次数"""
+    client = await HttpClient.connect(host, port)
+    answered = 0
+    try:
+        session_id = (await client.request(
+            "POST", "/sessions", {"deck": deck, "num_questions": num_questions, "user": user}))["session_id"]
+        while True:
+            response = await client.request("GET", f"/sessions/{session_id}/question")
+            if response["finished"]:
+                break
+            question = response["question"]
+            if question["type"] == "multiple_choice":
+                answer = chr(65 + rng.randrange(len(question["options"])))
+            else:
+                answer = str(rng.randint(1840, 1949))
+
+            start = time.perf_counter()
+            await client.request("POST", f"/sessions/{session_id}/answer",
+                                 {"answer": answer, "time_taken": rng.uniform(1, 15)})
+            latencies.append(time.perf_counter() - start)
+            answered += 1
+        await client.request("DELETE", f"/sessions/{session_id}")
+    finally:
+        client.close()
+    return answered
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(host, port, deck, learners, rounds, num_questions, seed, users=0):
+    latencies = []
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    total_answers = 0
+    for _ in range(rounds):
+        results = await asyncio.gather(*(
+            run_learner(host, port, deck, num_questions, latencies, random.Random(rng.random()),
+                        f"learner{i % users}" if users else None)
+            for i in range(learners)))
+        total_answers += sum(results)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "learners": learners,
+        "rounds": rounds,
+        "answers": total_answers,
+        "elapsed_seconds": elapsed,
+        "answers_per_second": total_answers / elapsed if elapsed else 0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="答题服务压测工具")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--deck", default=config.DATA_FILE, help="题库文件名")
+    parser.add_argument("--learners", type=int, default=100, help="并发学习者数量 (默认: 100)")
+    parser.add_argument("--rounds", type=int, default=5, help="每个学习者完成的会话数 (默认: 5)")
+    parser.add_argument("--questions", type=int, default=config.DEFAULT_SESSION_QUESTIONS,
+                        help="每次会话的问题数量")
+    parser.add_argument("--users", type=int, default=0,
+                        help="把学习者分配到多少个独立的学习者档案 (默认: 0，共享统计数据)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.host, args.port, args.deck, args.learners,
+                             args.rounds, args.questions, args.seed, args.users))
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"作答总数: {result['answers']} ({result['learners']} 个学习者 x {result['rounds']} 轮)")
+        print(f"吞吐量: {result['answers_per_second']:.0f} 次/秒")
+        print(f"延迟 p50: {result['p50_ms']:.2f} ms, p99: {result['p99_ms']:.2f} ms")
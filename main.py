@@ -1,55 +1,80 @@
 import os
 import sys
+import atexit
 import argparse
 from datetime import datetime, timedelta
 
-from data_handler import DataHandler
-from review_system import ReviewSystem
-from quiz import Quiz
+from data_handler import create_data_handler
+from cross_deck import study_all_due
+from deck_manager import DECK_EXTENSIONS, DeckManager, list_deck_files
 import config
+import profiling
 
+@profiling.timed("clear_screen")
 def clear_screen():
     """清屏"""
+    profiling.count("clear_screen_subprocesses")
     os.system('cls' if os.name == 'nt' else 'clear')
 
+def header_lines():
+    """程序标题"""
+    return ["", "=" * 50, f"{config.APP_NAME} v{config.APP_VERSION}", "=" * 50]
+
 def print_header():
     """打印程序标题"""
-    print("\n" + "=" * 50)
-    print(f"{config.APP_NAME} v{config.APP_VERSION}")
-    print("=" * 50)
+    print("\n".join(header_lines()))
 
-def print_stats(data_handler):
+def menu_lines(data_handler, current_data_file):
+    """主菜单选项"""
+    lines = []
+    if data_handler.user:
+        lines.extend(["", f"当前学习者: {data_handler.user}"])
+    lines.extend([
+        "",
+        f"当前题库文件: {current_data_file}",
+        "主菜单:",
+        "1. 开始背诵 (选择题)",
+        "2. 开始背诵 (填空题)",
+        "3. 开始背诵 (混合模式)",
+        "4. 添加新的历史事件",
+        "5. 查看所有历史事件",
+        "6. 切换题库文件",
+        "7. 复习所有题库中到期的事件",
+        "8. 搜索历史事件",
+        "0. 退出程序",
+    ])
+    return lines
+
+@profiling.timed("print_stats")
+def print_stats(data_handler, dashboard=None):
     """打印学习统计信息"""
-    all_stats = data_handler.get_all_stats()
-    all_events = data_handler.get_all_events()
+    if dashboard is not None:
+        # 增量维护的计数器，与题库大小无关
+        summary = dashboard.summary()
+    else:
+        # 计算今天需要复习的事件数
+        now = datetime.now()
+        today_end = datetime(now.year, now.month, now.day, 23, 59, 59)
+        summary = data_handler.get_stats_summary(today_end)
     
-    total_events = len(all_events)
-    studied_events = sum(1 for q in all_events if q in all_stats)
+    total_events = summary["total_events"]
+    studied_events = summary["studied_events"]
     
     print(f"\n总事件数: {total_events}")
     print(f"已学习事件: {studied_events} ({studied_events/total_events*100:.1f}%)")
     
     if studied_events > 0:
         # 计算正确率
-        total_attempts = sum(stats["total_attempts"] for stats in all_stats.values())
-        correct_attempts = sum(stats["correct_attempts"] for stats in all_stats.values())
+        total_attempts = summary["total_attempts"]
+        correct_attempts = summary["correct_attempts"]
         
         if total_attempts > 0:
             accuracy = (correct_attempts / total_attempts) * 100
             print(f"总正确率: {accuracy:.1f}%")
         
-        # 计算今天需要复习的事件数
-        now = datetime.now()
-        today_end = datetime(now.year, now.month, now.day, 23, 59, 59)
-        
-        due_today = 0
-        for question, stats in all_stats.items():
-            if question in all_events:  # 确保问题仍然存在于事件列表中
-                next_review = datetime.fromisoformat(stats["next_review"])
-                if next_review <= today_end:
-                    due_today += 1
-        
-        print(f"今天待复习: {due_today}")
+        print(f"今天待复习: {summary['due']}")
+        if "due_histogram" in summary:
+            print(f"未来7天待复习: {' / '.join(str(count) for count in summary['due_histogram'])}")
 
 def add_new_event(data_handler):
     """添加新的历史事件"""
@@ -66,18 +91,49 @@ def add_new_event(data_handler):
         print("事件时间不能为空！")
         return
     
-    # 获取现有事件
-    events = data_handler.get_all_events()
+    # 同名事件会被覆盖，名称相近的事件可能是重复录入
+    existing = data_handler.get_all_events().get(event)
+    if existing is not None and existing != date:
+        print(f"\n注意: 事件已存在，时间为 {existing}，继续将覆盖为 {date}")
+    near_duplicates = data_handler.get_search_index().near_duplicates(event)
+    if near_duplicates:
+        print("\n发现名称相近的事件:")
+        for _, other, other_date in near_duplicates:
+            print(f"  {other}: {other_date}")
+    if (existing is not None and existing != date) or near_duplicates:
+        if input("\n仍然保存吗？(y/N): ").strip().lower() != "y":
+            print("已取消。")
+            return
     
-    # 添加新事件
-    events[event] = date
-    
-    # 保存数据
-    data_handler.events = events
-    data_handler.save_data()
+    # 添加新事件并保存数据
+    data_handler.add_event(event, date)
     
     print(f"\n已添加: {event} - {date}")
 
+def paginate(total, fetch_page, title):
+    """分页显示，fetch_page(offset, limit) 返回该页的行"""
+    page_size = config.SEARCH_PAGE_SIZE
+    pages = (total + page_size - 1) // page_size
+    page = 0
+    while True:
+        print(f"\n{title}（第 {page + 1}/{pages} 页，共 {total} 条）")
+        print("=" * 50)
+        for i, line in enumerate(fetch_page(page * page_size, page_size), page * page_size + 1):
+            print(f"{i}. {line}")
+        if pages <= 1:
+            return
+        command = input("\n回车/n 下一页，p 上一页，数字跳到该页，q 返回: ").strip().lower()
+        if command == "q":
+            return
+        if command == "p":
+            page = max(page - 1, 0)
+        elif command.isdigit():
+            page = min(max(int(command) - 1, 0), pages - 1)
+        elif page + 1 < pages:
+            page += 1
+        else:
+            return
+
 def view_all_events(data_handler):
     """查看所有历史事件"""
     events = data_handler.get_all_events()
@@ -86,102 +142,166 @@ def view_all_events(data_handler):
         print("\n没有历史事件数据！")
         return
     
-    print("\n所有历史事件")
-    print("=" * 50)
+    # 按题库年份索引中的时间先后排序，无法识别年份的排在最后
+    def chronological(item):
+        year_range = data_handler.year_range(item[1])
+        return (year_range is None, year_range or (0, 0), item[0])
+    sorted_events = sorted(events.items(), key=chronological)
+    
+    paginate(len(sorted_events),
+             lambda offset, limit: (f"{event}: {date}" for event, date in sorted_events[offset:offset + limit]),
+             "按时间排序的所有历史事件")
+
+def search_events(data_handler, query=None):
+    """按名称或时间模糊搜索历史事件"""
+    if query is None:
+        query = input("\n请输入搜索内容（事件名称或时间）: ").strip()
+    if len("".join(query.split())) < 2:
+        print("搜索内容至少需要两个字！")
+        return
+    
+    index = data_handler.get_search_index()
+    total, _ = index.search(query, limit=0)
+    if not total:
+        print(f"\n没有找到与 \"{query}\" 相关的事件。")
+        return
     
-    # 按事件名称排序
-    sorted_events = sorted(events.items())
+    def fetch_page(offset, limit):
+        _, results = index.search(query, limit, offset)
+        return (f"{event}: {date}" for _, event, date in results)
     
-    for i, (event, date) in enumerate(sorted_events, 1):
-        print(f"{i}. {event}: {date}")
+    paginate(total, fetch_page, f"\"{query}\" 的搜索结果")
 
-def main_menu():
-    """主菜单"""
+def main_menu(backend=None, user=None, tui=False):
+    """主菜单
+    
+    tui 为 True 时使用 terminal_ui 的屏幕缓冲区重绘菜单和题目，不再启动子进程清屏。
+    """
     # 初始化数据处理器和复习系统
     current_data_file = config.DATA_FILE  # Track current data file
-    data_handler = DataHandler(current_data_file, config.STATS_FILE)
-    review_system = ReviewSystem(data_handler)
-    quiz = Quiz(data_handler, review_system)
+    deck_manager = DeckManager(config.STATS_FILE, backend, user)
+    deck = deck_manager.open(current_data_file)
+    data_handler, quiz, dashboard = deck.data_handler, deck.quiz, deck.dashboard
+    screen = stats_panel = None
+    if tui:
+        from terminal_ui import Screen, StatsPanel, TerminalSession
+        screen = Screen()
     
-    while True:
-        clear_screen()
-        print_header()
-        print_stats(data_handler)
-        
-        print(f"\n当前题库文件: {current_data_file}")
-        print("主菜单:")
-        print("1. 开始背诵 (选择题)")
-        print("2. 开始背诵 (填空题)")
-        print("3. 开始背诵 (混合模式)")
-        print("4. 添加新的历史事件")
-        print("5. 查看所有历史事件")
-        print("6. 切换题库文件")
-        print("0. 退出程序")
-        
-        choice = input("\n请选择 (0-6): ").strip()
-        
-        if choice == "1":
-            num_questions = int(input("请输入题目数量: ") or config.DEFAULT_SESSION_QUESTIONS)
-            quiz.start_session(num_questions, "multiple_choice")
-        elif choice == "2":
-            num_questions = int(input("请输入题目数量: ") or config.DEFAULT_SESSION_QUESTIONS)
-            quiz.start_session(num_questions, "fill_blank")
-        elif choice == "3":
-            num_questions = int(input("请输入题目数量: ") or config.DEFAULT_SESSION_QUESTIONS)
-            quiz.start_session(num_questions, "random")
-        elif choice == "4":
-            add_new_event(data_handler)
-            input("\n按回车键返回主菜单...")
-        elif choice == "5":
-            view_all_events(data_handler)
+    def start_session(num_questions, question_type):
+        if screen is None:
+            quiz.start_session(num_questions, question_type)
+        else:
+            TerminalSession(screen, quiz).run(num_questions, question_type)
             input("\n按回车键返回主菜单...")
-        elif choice == "6":
-            new_file = input("\n请输入新的题库文件路径 (默认显示当前目录下的JSON文件): ").strip() or None
+    
+    try:
+        while True:
+            if screen is None:
+                clear_screen()
+                print_header()
+                print_stats(data_handler, dashboard)
+                print("\n".join(menu_lines(data_handler, current_data_file)))
+                choice = input("\n请选择 (0-8): ").strip()
+            else:
+                # 切换题库后统计信息跟随新的题库
+                if stats_panel is None or stats_panel.data_handler is not data_handler:
+                    if stats_panel is not None:
+                        stats_panel.close()
+                    stats_panel = StatsPanel(data_handler, dashboard, print_stats)
+                screen.clear()
+                screen.extend(header_lines())
+                screen.extend(stats_panel.lines())
+                screen.extend(menu_lines(data_handler, current_data_file))
+                choice = screen.ask("\n请选择 (0-8): ").strip()
+        
+            if choice == "1":
+                num_questions = int(input("请输入题目数量: ") or config.DEFAULT_SESSION_QUESTIONS)
+                start_session(num_questions, "multiple_choice")
+            elif choice == "2":
+                num_questions = int(input("请输入题目数量: ") or config.DEFAULT_SESSION_QUESTIONS)
+                start_session(num_questions, "fill_blank")
+            elif choice == "3":
+                num_questions = int(input("请输入题目数量: ") or config.DEFAULT_SESSION_QUESTIONS)
+                start_session(num_questions, "random")
+            elif choice == "4":
+                add_new_event(data_handler)
+                input("\n按回车键返回主菜单...")
+            elif choice == "5":
+                view_all_events(data_handler)
+                input("\n按回车键返回主菜单...")
+            elif choice == "6":
+                new_file = input("\n请输入新的题库文件路径 (默认显示当前目录下的JSON文件): ").strip() or None
             
-            if new_file is None:
-                # 显示当前目录下所有JSON文件
-                json_files = [f for f in os.listdir('.') if f.endswith('.json')]
-                if not json_files:
-                    print("\n没有找到其他JSON格式的题库文件！")
-                    input("按回车键继续...")
-                    continue
+                if new_file is None:
+                    # 显示当前目录下所有JSON和JSONL文件
+                    json_files = list_deck_files('.')
+                    if not json_files:
+                        print("\n没有找到其他JSON格式的题库文件！")
+                        input("按回车键继续...")
+                        continue
+                    if config.DECK_PREFETCH:
+                        # 用户选择期间在后台加载列出的题库
+                        deck_manager.prefetch(f for f in json_files if f != current_data_file)
                 
-                print("\n可选的题库文件:")
-                for i, filename in enumerate(json_files, 1):
-                    print(f"{i}. {filename}")
+                    print("\n可选的题库文件:")
+                    for i, filename in enumerate(json_files, 1):
+                        print(f"{i}. {filename}")
                 
-                try:
-                    choice = int(input("\n请选择要切换的题库文件编号: "))
-                    if 1 <= choice <= len(json_files):
-                        new_file = json_files[choice - 1]
-                    else:
-                        print("\n无效的选择！")
+                    try:
+                        choice = int(input("\n请选择要切换的题库文件编号: "))
+                        if 1 <= choice <= len(json_files):
+                            new_file = json_files[choice - 1]
+                        else:
+                            print("\n无效的选择！")
+                            input("按回车键继续...")
+                            continue
+                    except ValueError:
+                        print("\n请输入有效的数字！")
                         input("按回车键继续...")
                         continue
-                except ValueError:
-                    print("\n请输入有效的数字！")
-                    input("按回车键继续...")
-                    continue
             
-            if os.path.exists(new_file) and new_file.endswith('.json'):
-                if new_file != current_data_file:
-                    current_data_file = new_file
-                    data_handler = DataHandler(current_data_file, config.STATS_FILE)
-                    review_system = ReviewSystem(data_handler)
-                    quiz = Quiz(data_handler, review_system)
-                    print(f"\n已切换题库文件至: {current_data_file}")
+                if os.path.exists(new_file) and new_file.endswith(DECK_EXTENSIONS):
+                    if new_file != current_data_file:
+                        current_data_file = new_file
+                        deck = deck_manager.open(current_data_file)
+                        data_handler, quiz, dashboard = deck.data_handler, deck.quiz, deck.dashboard
+                        print(f"\n已切换题库文件至: {current_data_file}")
+                    else:
+                        print(f"\n已经是当前题库文件: {current_data_file}")
                 else:
-                    print(f"\n已经是当前题库文件: {current_data_file}")
-            else:
-                print(f"\n文件不存在或不是有效的JSON文件: {new_file}")
+                    print(f"\n文件不存在或不是有效的JSON文件: {new_file}")
             
-            input("按回车键继续...")
-        elif choice == "0":
-            print("\n感谢使用历史大事年表背诵助手！再见！")
-            sys.exit(0)
-        else:
-            print("\n无效的选择，请重试！")
-            input("按回车键继续...")
+                input("按回车键继续...")
+            elif choice == "7":
+                num_questions = int(input("请输入题目数量: ") or config.DEFAULT_SESSION_QUESTIONS)
+                study_all_due(deck_manager, num_questions, "random", screen=screen)
+                # 跨题库复习会打开其他题库，回到当前题库
+                deck = deck_manager.open(current_data_file)
+                data_handler, quiz, dashboard = deck.data_handler, deck.quiz, deck.dashboard
+                input("\n按回车键返回主菜单...")
+            elif choice == "8":
+                search_events(data_handler)
+                input("\n按回车键返回主菜单...")
+            elif choice == "0":
+                print("\n感谢使用历史大事年表背诵助手！再见！")
+                sys.exit(0)
+            else:
+                print("\n无效的选择，请重试！")
+                input("按回车键继续...")
+    finally:
+        # 退出或中断时合并所有已缓存题库的统计日志
+        deck_manager.close()
+
+def finish_profiling(args):
+    """退出时输出性能统计"""
+    if args.cprofile:
+        profiling.profiler.stop_cprofile(args.cprofile)
+        print(f"cProfile 数据已写入: {args.cprofile}")
+    if args.profile_json:
+        profiling.profiler.dump_json(args.profile_json)
+        print(f"性能统计已写入: {args.profile_json}")
+    elif args.profile:
+        profiling.profiler.print_summary()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description=f"{config.APP_NAME} v{config.APP_VERSION}")
@@ -189,11 +309,189 @@ if __name__ == "__main__":
                         help=f"每次会话的问题数量 (默认: {config.DEFAULT_SESSION_QUESTIONS})")
     parser.add_argument("-t", "--type", choices=["multiple_choice", "fill_blank", "random"],
                         default="random", help="问题类型 (默认: random)")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default=config.STORAGE_BACKEND,
+                        help=f"存储后端 (默认: {config.STORAGE_BACKEND})")
+    parser.add_argument("--profile", action="store_true",
+                        help="统计各项操作的耗时和写入量，退出时打印汇总")
+    parser.add_argument("--profile-json", metavar="FILE", help="把性能统计写入JSON文件（隐含 --profile）")
+    parser.add_argument("--cprofile", metavar="FILE", help="用 cProfile 记录整个运行过程并写入 pstats 文件")
+    parser.add_argument("--write-behind", action="store_true", default=config.WRITE_BEHIND,
+                        help="由后台线程批量写入统计数据，答题时不等待磁盘")
+    parser.add_argument("--tui", action="store_true", default=config.TERMINAL_UI,
+                        help="使用 ANSI 控制序列重绘的终端界面，不再启动子进程清屏")
+    parser.add_argument("-u", "--user", default=config.DEFAULT_USER,
+                        help="学习者名称，每个学习者的统计数据单独保存")
+    
+    subparsers = parser.add_subparsers(dest="command")
+    migrate_parser = subparsers.add_parser("migrate", help="把JSON题库和统计数据迁移到SQLite数据库")
+    migrate_parser.add_argument("data_files", nargs="+", help="要迁移的JSON题库文件")
+    migrate_parser.add_argument("--db", default=config.SQLITE_FILE,
+                                help=f"目标数据库文件 (默认: {config.SQLITE_FILE})")
+    
+    convert_parser = subparsers.add_parser("convert", help="把JSON题库转换为按行存储、按需加载的JSONL题库")
+    convert_parser.add_argument("data_files", nargs="+", help="要转换的JSON题库文件")
+    
+    import_parser = subparsers.add_parser("import", help="从CSV/TSV/JSONL文件批量导入历史事件")
+    import_parser.add_argument("files", nargs="+", help="要导入的文件")
+    import_parser.add_argument("--deck", default=config.DATA_FILE,
+                               help=f"导入到的题库文件 (默认: {config.DATA_FILE})")
+    import_parser.add_argument("--format", choices=["csv", "tsv", "jsonl"],
+                               help="文件格式 (默认按扩展名判断)")
+    import_parser.add_argument("--overwrite", action="store_true",
+                               help="事件已存在但时间不同时用导入的时间覆盖")
+    import_parser.add_argument("--no-near-duplicates", action="store_true",
+                               help="不检查名称相近的疑似重复事件（导入大量事件时更快）")
+    
+    analytics_parser = subparsers.add_parser("analytics", help="分析作答历史：记忆保持率、最难的事件和每天的作答量")
+    analytics_parser.add_argument("--deck", help="只统计指定题库（文件名）")
+    analytics_parser.add_argument("--top", type=int, default=10, help="列出最难的事件数量 (默认: 10)")
+    analytics_parser.add_argument("--days", type=int, default=14, help="显示最近多少天的作答量 (默认: 14)")
+    
+    search_parser = subparsers.add_parser("search", help="按名称或时间模糊搜索历史事件")
+    search_parser.add_argument("query", help="搜索内容")
+    search_parser.add_argument("--deck", default=config.DATA_FILE, help=f"题库文件 (默认: {config.DATA_FILE})")
+    
+    papers_parser = subparsers.add_parser("generate-papers", help="批量生成互不重复的试卷和答案")
+    papers_parser.add_argument("data_file", nargs="?", default=config.DATA_FILE, help="题库文件")
+    papers_parser.add_argument("-n", "--count", type=int, default=30, help="试卷份数 (默认: 30)")
+    papers_parser.add_argument("--choice", type=int, default=10, help="每份试卷的选择题数 (默认: 10)")
+    papers_parser.add_argument("--blank", type=int, default=5, help="每份试卷的填空题数 (默认: 5)")
+    papers_parser.add_argument("--seed", type=int, default=0, help="随机种子，相同参数总是生成相同的试卷 (默认: 0)")
+    papers_parser.add_argument("--format", choices=["json", "markdown"], default="json", help="输出格式 (默认: json)")
+    papers_parser.add_argument("-o", "--out", default="papers", help="输出目录 (默认: papers)")
+    papers_parser.add_argument("--workers", type=int, help="进程数 (默认: CPU 核数)")
+    
+    simulate_parser = subparsers.add_parser("simulate", help="用模拟学习者离线比较不同的复习算法参数")
+    simulate_parser.add_argument("--param", action="append", default=[], metavar="NAME=V1,V2",
+                                 help="要扫描的 config 参数及取值，可重复，各参数取值的所有组合都会模拟")
+    simulate_parser.add_argument("--learners", type=int, default=1000, help="每种配置的学习者数 (默认: 1000)")
+    simulate_parser.add_argument("--days", type=int, default=365, help="模拟天数 (默认: 365)")
+    simulate_parser.add_argument("--cards", type=int, default=300, help="合成题库的问题数 (默认: 300)")
+    simulate_parser.add_argument("--history", action="store_true",
+                                 help="根据当前学习者的作答历史拟合问题难度，代替合成题库")
+    simulate_parser.add_argument("--workers", type=int, help="进程数 (默认: CPU 核数)")
+    simulate_parser.add_argument("--seed", type=int, default=0, help="随机种子 (默认: 0)")
+    simulate_parser.add_argument("--json", metavar="FILE", help="把结果写入JSON文件")
+    
+    validate_parser = subparsers.add_parser("validate", help="并行检查目录中所有题库的格式和内容")
+    validate_parser.add_argument("directory", nargs="?", default=".", help="题库所在目录 (默认: 当前目录)")
+    validate_parser.add_argument("--workers", type=int, help="进程数 (默认: CPU 核数)")
+    validate_parser.add_argument("--no-cache", action="store_true", help="忽略上次的检查结果，重新检查所有题库")
+    validate_parser.add_argument("--cache", metavar="FILE",
+                                 help="检查结果缓存文件 (默认: 统计文件旁的 *_validation.cache)")
+    
+    schedule_parser = subparsers.add_parser("schedule", help="批量调整复习计划并预测复习量")
+    schedule_parser.add_argument("data_file", nargs="?", default=config.DATA_FILE, help="题库文件")
+    schedule_parser.add_argument("--shift-days", type=float, default=0,
+                                 help="把所有复习时间整体顺延的天数")
+    schedule_parser.add_argument("--rebase-ease", type=float, metavar="OLD_INITIAL",
+                                 help="按旧的初始难度系数平移到当前配置并截断到最小难度系数")
+    schedule_parser.add_argument("--forecast", type=int, default=90,
+                                 help="预测未来多少天每天的复习量 (默认: 90)")
     
     args = parser.parse_args()
     
+    config.WRITE_BEHIND = args.write_behind
+    profiling.profiler.enabled = args.profile or bool(args.profile_json)
+    if args.cprofile:
+        profiling.profiler.start_cprofile()
+    atexit.register(finish_profiling, args)
+    
+    if args.command == "schedule":
+        from batch_scheduler import BatchScheduler
+        data_handler = create_data_handler(args.data_file, config.STATS_FILE, args.backend, args.user)
+        scheduler = BatchScheduler(data_handler)
+        if args.shift_days:
+            scheduler.shift(args.shift_days)
+        if args.rebase_ease is not None:
+            scheduler.rebase_ease_factors(args.rebase_ease)
+        if args.shift_days or args.rebase_ease is not None:
+            scheduler.write_back()
+            print(f"已更新 {len(scheduler.questions)} 个事件的复习计划")
+        histogram = scheduler.due_histogram(args.forecast)
+        print(f"\n未来 {args.forecast} 天的复习量:")
+        for day, count in enumerate(histogram):
+            if count:
+                print(f"{(datetime.now() + timedelta(days=day)).strftime('%Y-%m-%d')}: {count}")
+        data_handler.close()
+        sys.exit(0)
+    
+    if args.command == "search":
+        data_handler = create_data_handler(args.deck, config.STATS_FILE, args.backend, args.user)
+        try:
+            search_events(data_handler, args.query)
+        finally:
+            data_handler.close()
+        sys.exit(0)
+    
+    if args.command == "generate-papers":
+        from paper_generator import generate_papers
+        data_handler = create_data_handler(args.data_file, config.STATS_FILE, args.backend, args.user)
+        try:
+            report = generate_papers(data_handler, args.count, args.choice, args.blank, args.seed,
+                                     args.out, args.format, args.workers)
+            print(f"已生成 {report['papers']} 份试卷（每份 {report['questions']} 题）到 {report['out_dir']}，"
+                  f"耗时 {report['seconds']:.2f} 秒")
+        except (OSError, ValueError) as e:
+            print(f"生成试卷时出错: {e}")
+        finally:
+            data_handler.close()
+        sys.exit(0)
+    
+    if args.command == "simulate":
+        from simulator import simulate_main
+        simulate_main(args)
+        sys.exit(0)
+    
+    if args.command == "validate":
+        from deck_validator import print_result, print_summary, validate_directory
+        try:
+            summary = validate_directory(args.directory, config.STATS_FILE, args.user, args.backend,
+                                         args.workers, not args.no_cache, print_result, args.cache)
+        except (OSError, ValueError) as e:
+            print(f"检查题库时出错: {e}")
+            sys.exit(1)
+        print_summary(summary)
+        sys.exit(1 if summary["errors"] else 0)
+    
+    if args.command == "analytics":
+        from data_handler import profile_stats_file
+        from history_log import HistoryLog, analyze, history_dir_for, print_analytics
+        history = HistoryLog(history_dir_for(profile_stats_file(config.STATS_FILE, args.user)))
+        print_analytics(analyze(history, args.deck, args.top), args.days)
+        sys.exit(0)
+    
+    if args.command == "import":
+        from importer import import_events, print_report
+        data_handler = create_data_handler(args.deck, config.STATS_FILE, args.backend, args.user)
+        try:
+            report = import_events(data_handler, args.files, args.overwrite, args.format,
+                                   not args.no_near_duplicates)
+            print_report(report, args.overwrite)
+        except (OSError, ValueError) as e:
+            print(f"导入时出错: {e}")
+        finally:
+            data_handler.close()
+        sys.exit(0)
+    
+    if args.command == "convert":
+        from jsonl_deck import convert_json_deck
+        for data_file in args.data_files:
+            try:
+                jsonl_file, num_events, num_stats = convert_json_deck(data_file, config.STATS_FILE, user=args.user)
+                print(f"已转换 {data_file} -> {jsonl_file}: {num_events} 个事件, {num_stats} 条统计")
+            except Exception as e:
+                print(f"转换 {data_file} 时出错: {e}")
+        sys.exit(0)
+    
+    if args.command == "migrate":
+        from sqlite_handler import migrate_json_to_sqlite
+        migrate_json_to_sqlite(args.data_files, config.STATS_FILE, args.db, args.user)
+        sys.exit(0)
+    
     try:
-        main_menu()
-    except KeyboardInterrupt:
+        main_menu(args.backend, args.user, args.tui)
+    except (KeyboardInterrupt, EOFError):
+        # 输入结束（如 Ctrl+D 或管道读完）与 Ctrl+C 一样退出程序
         print("\n\n程序已中断。再见！")
         sys.exit(0)
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""批量生成试卷和答案
+
+每份试卷使用由 (种子, 试卷序号) 派生的独立随机流，因此同样的参数总能生成同样的
+试卷，且与进程数和任务划分无关。试卷按块分给进程池生成并渲染，主进程只负责
+检查重复和写文件。
+"""
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from data_handler import MemoryDataHandler
+from distractor_index import DistractorIndex
+from quiz import build_fill_blank, build_multiple_choice
+
+FORMATS = ("json", "markdown")
+PAPERS_PER_TASK = 250
+MAX_ATTEMPTS = 20  # 与已生成的试卷重复时换随机流重试的次数
+
+_generator = None  # 工作进程中的 PaperGenerator
+
+
+class PaperGenerator:
+    """根据一个题库生成试卷"""
+
+    def __init__(self, events, year_ranges=None, source_key="memory.json"):
+        data_handler = MemoryDataHandler(events, data_file=source_key)
+        data_handler.year_ranges = year_ranges or {}
+        self.events = data_handler.get_all_events()
+        # 按事件排序，使题目顺序不依赖题库文件中的存储顺序
+        self.questions = sorted(self.events)
+        self.distractors = DistractorIndex(data_handler)
+
+    def generate(self, seed, number, num_choice, num_blank, attempt=0):
+        """生成第 number 份试卷，同一试卷内不会出现重复的事件"""
+        stream = f"{seed}:{number}" if attempt == 0 else f"{seed}:{number}:{attempt}"
+        rng = random.Random(stream)
+        picked = rng.sample(self.questions, num_choice + num_blank)
+        types = ["multiple_choice"] * num_choice + ["fill_blank"] * num_blank
+        rng.shuffle(types)
+
+        items = []
+        for question, question_type in zip(picked, types):
+            answer = self.events[question]
+            if question_type == "multiple_choice":
+                quiz_data = build_multiple_choice(self.distractors, question, answer, rng)
+            else:
+                quiz_data = build_fill_blank(question, answer)
+            items.append({"question": question, "answer": answer, "type": question_type, "quiz_data": quiz_data})
+        return {"number": number, "seed": stream, "items": items}
+
+
+def paper_fingerprint(paper):
+    """用题目集合判断两份试卷是否重复（与题目顺序和选项顺序无关）"""
+    return frozenset(item["question"] for item in paper["items"])
+
+
+def render_json(paper):
+    """渲染为 JSON，返回 {文件后缀: 内容}，答案和试卷放在同一个文件中"""
+    questions = []
+    answer_key = []
+    for i, item in enumerate(paper["items"], 1):
+        quiz_data = item["quiz_data"]
+        entry = {"number": i, "type": item["type"], "question": quiz_data["question"]}
+        key = {"number": i, "event": item["question"], "answer": item["answer"]}
+        if item["type"] == "multiple_choice":
+            entry["options"] = quiz_data["options"]
+            key["option"] = chr(65 + quiz_data["correct_index"])
+        questions.append(entry)
+        answer_key.append(key)
+    document = {"paper": paper["number"], "seed": paper["seed"], "questions": questions, "answer_key": answer_key}
+    return {".json": json.dumps(document, ensure_ascii=False, indent=2)}
+
+
+def render_markdown(paper):
+    """渲染为 Markdown，返回 {文件后缀: 内容}，试卷和答案分两个文件"""
+    lines = [f"# 历史大事年表测验 第 {paper['number']} 卷", ""]
+    key_lines = [f"# 第 {paper['number']} 卷 答案", ""]
+    for i, item in enumerate(paper["items"], 1):
+        quiz_data = item["quiz_data"]
+        lines.append(f"{i}. {quiz_data['question']}")
+        if item["type"] == "multiple_choice":
+            lines.extend(f"   - {chr(65 + j)}. {option}" for j, option in enumerate(quiz_data["options"]))
+            key_lines.append(f"{i}. {chr(65 + quiz_data['correct_index'])}（{item['answer']}）")
+        else:
+            lines.append("   ______________________")
+            key_lines.append(f"{i}. {item['answer']}")
+        lines.append("")
+    return {".md": "\n".join(lines), "_answers.md": "\n".join(key_lines) + "\n"}
+
+
+RENDERERS = {"json": render_json, "markdown": render_markdown}
+
+
+def _init_worker(events, year_ranges, source_key):
+    global _generator
+    _generator = PaperGenerator(events, year_ranges, source_key)
+
+
+def _generate_chunk(seed, numbers, num_choice, num_blank, file_format):
+    """进程池任务：生成并渲染一批试卷，返回 [(序号, 指纹, 渲染结果), ...]"""
+    render = RENDERERS[file_format]
+    result = []
+    for number in numbers:
+        paper = _generator.generate(seed, number, num_choice, num_blank)
+        result.append((number, paper_fingerprint(paper), render(paper)))
+    return result
+
+
+def generate_papers(data_handler, count, num_choice, num_blank, seed=0, out_dir="papers",
+                    file_format="json", workers=None):
+    """生成 count 份互不重复的试卷及答案写入 out_dir，返回生成报告"""
+    events = dict(data_handler.get_all_events().items())
+    if num_choice + num_blank <= 0:
+        raise ValueError("每份试卷至少需要一道题")
+    if num_choice + num_blank > len(events):
+        raise ValueError(f"题库只有 {len(events)} 个事件，不足以组成 {num_choice + num_blank} 道题的试卷")
+    if file_format not in RENDERERS:
+        raise ValueError(f"不支持的输出格式: {file_format}（支持 {', '.join(FORMATS)}）")
+
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    width = len(str(count))
+    year_ranges = getattr(data_handler, "year_ranges", {})
+    numbers = list(range(1, count + 1))
+    chunks = [numbers[i:i + PAPERS_PER_TASK] for i in range(0, count, PAPERS_PER_TASK)]
+
+    seen = set()
+    retried = 0
+    local = None  # 主进程中的生成器，只在需要重试时创建
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(events, year_ranges, data_handler.source_key)) as pool:
+        futures = [pool.submit(_generate_chunk, seed, chunk, num_choice, num_blank, file_format)
+                   for chunk in chunks]
+        # 按序号顺序检查重复，保证结果与进程调度无关
+        for future in futures:
+            for number, fingerprint, rendered in future.result():
+                attempt = 0
+                while fingerprint in seen:
+                    attempt += 1
+                    if attempt > MAX_ATTEMPTS:
+                        raise ValueError(f"题库太小，无法生成 {count} 份互不重复的试卷")
+                    if local is None:
+                        local = PaperGenerator(events, year_ranges, data_handler.source_key)
+                    paper = local.generate(seed, number, num_choice, num_blank, attempt)
+                    fingerprint = paper_fingerprint(paper)
+                    rendered = RENDERERS[file_format](paper)
+                    retried += 1
+                seen.add(fingerprint)
+                for suffix, content in rendered.items():
+                    with open(os.path.join(out_dir, f"paper_{number:0{width}d}{suffix}"), 'w', encoding='utf-8') as f:
+                        f.write(content)
+
+    return {
+        "papers": count,
+        "questions": num_choice + num_blank,
+        "retried": retried,
+        "out_dir": out_dir,
+        "seconds": time.perf_counter() - start,
+    }
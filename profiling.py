@@ -0,0 +1,103 @@
+import cProfile
+import functools
+import json
+import time
+
+
+class Profiler:
+    """运行时计时器和计数器
+
+    默认关闭，关闭时被 timed 装饰的函数只多一次属性判断。通过 main.py 的
+    --profile 参数开启，退出时打印汇总表或写出 JSON。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.timers = {}     # name -> [calls, total seconds, max seconds]
+        self.counters = {}   # name -> value
+        self._cprofile = None
+
+    def reset(self):
+        self.timers.clear()
+        self.counters.clear()
+
+    def timed(self, name):
+        """装饰器：统计函数的调用次数和耗时"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    timer = self.timers.get(name)
+                    if timer is None:
+                        self.timers[name] = [1, elapsed, elapsed]
+                    else:
+                        timer[0] += 1
+                        timer[1] += elapsed
+                        if elapsed > timer[2]:
+                            timer[2] = elapsed
+            return wrapper
+        return decorator
+
+    def count(self, name, amount=1):
+        """累加计数器"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def start_cprofile(self):
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+
+    def stop_cprofile(self, path):
+        """停止 cProfile 并写出可用 pstats 读取的文件"""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(path)
+            self._cprofile = None
+
+    def to_dict(self):
+        answers = self.counters.get("answers", 0)
+        per_answer = {}
+        if answers:
+            for name in ("bytes_written", "file_rewrites", "journal_appends"):
+                per_answer[name] = self.counters.get(name, 0) / answers
+        return {
+            "timers": {
+                name: {"calls": calls, "total_seconds": total, "mean_seconds": total / calls, "max_seconds": longest}
+                for name, (calls, total, longest) in self.timers.items()
+            },
+            "counters": dict(self.counters),
+            "per_answer": per_answer,
+        }
+
+    def dump_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def print_summary(self):
+        """打印汇总表"""
+        report = self.to_dict()
+        print("\n" + "=" * 70)
+        print("性能统计")
+        print("=" * 70)
+        print(f"{'操作':<28}{'次数':>8}{'总耗时(ms)':>12}{'平均(ms)':>10}{'最长(ms)':>10}")
+        for name, timer in sorted(report["timers"].items(), key=lambda item: -item[1]["total_seconds"]):
+            print(f"{name:<30}{timer['calls']:>8}{timer['total_seconds'] * 1000:>12.2f}"
+                  f"{timer['mean_seconds'] * 1000:>10.3f}{timer['max_seconds'] * 1000:>10.3f}")
+        if report["counters"]:
+            print("-" * 70)
+            for name, value in sorted(report["counters"].items()):
+                print(f"{name:<30}{value:>12}")
+        for name, value in report["per_answer"].items():
+            print(f"{name + ' / answer':<30}{value:>12.1f}")
+        print("=" * 70)
+
+
+profiler = Profiler()
+timed = profiler.timed
+count = profiler.count
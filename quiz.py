@@ -1,47 +1,69 @@
 import random
 import time
+from collections import deque
 from datetime import datetime
 
+import config
+import profiling
+from date_parser import parse_user_answer
+from distractor_index import DistractorIndex
+from history_log import history_dir_for, open_history
+from review_system import performance_score
+
+
+def build_multiple_choice(distractors, question, correct_answer, rng=random):
+    """生成选择题
+    
+    rng 为随机数生成器，批量出卷时每份试卷使用各自的随机流以便复现。
+    """
+    # 从干扰项索引中取年份相近的不同答案
+    options = [correct_answer] + distractors.draw(correct_answer, 3, rng)
+    
+    # 随机排序选项
+    rng.shuffle(options)
+    
+    return {
+        "question": f"以下哪个是{question}发生的时间？",
+        "options": options,
+        "correct_index": options.index(correct_answer)
+    }
+
+
+def build_fill_blank(question, correct_answer):
+    """生成填空题"""
+    return {
+        "question": f"{question}发生于哪一年？",
+        "answer": correct_answer
+    }
+
+
 class Quiz:
-    def __init__(self, data_handler, review_system):
+    def __init__(self, data_handler, review_system, history=None, distractors=None):
         self.data_handler = data_handler
         self.review_system = review_system
-        self.current_session = {
-            "start_time": datetime.now(),
-            "questions_asked": 0,
-            "correct_answers": 0,
-            "wrong_answers": 0,
-            "total_time": 0
-        }
+        # 干扰项索引默认由本题库建立；跨题库复习时可共用一个由多个题库的答案组成的索引
+        if distractors is None:
+            distractors = DistractorIndex(data_handler)
+            data_handler.add_listener(distractors)
+        self.distractors = distractors
+        # 逐题作答历史，与统计文件放在一起
+        if history is None and config.HISTORY_LOG:
+            history = open_history(history_dir_for(data_handler.stats_file))
+        self.history = history
+        self.current_session = self.new_session()
     
+    @profiling.timed("generate_multiple_choice")
     def generate_multiple_choice(self, question, correct_answer):
         """生成选择题"""
-        all_events = list(self.data_handler.get_all_events().values())
-        
-        # 确保不重复选项
-        options = [correct_answer]
-        while len(options) < 4:
-            option = random.choice(all_events)
-            if option not in options:
-                options.append(option)
-        
-        # 随机排序选项
-        random.shuffle(options)
-        
-        return {
-            "question": f"以下哪个是{question}发生的时间？",
-            "options": options,
-            "correct_index": options.index(correct_answer)
-        }
+        return build_multiple_choice(self.distractors, question, correct_answer)
     
+    @profiling.timed("generate_fill_blank")
     def generate_fill_blank(self, question, correct_answer):
         """生成填空题"""
-        return {
-            "question": f"{question}发生于哪一年？",
-            "answer": correct_answer
-        }
+        return build_fill_blank(question, correct_answer)
     
-    def normalize_answer(self, answer):
+    @staticmethod
+    def normalize_answer(answer):
         """标准化答案，移除所有非数字字符并处理常见格式"""
         # 移除所有非数字字符
         normalized = ''.join(char for char in answer if char.isdigit())
@@ -54,19 +76,8 @@ class Quiz:
         
         return normalized
     
-    def ask_question(self, question_type="random"):
-        """提问一个问题"""
-        # 获取待复习的问题
-        due_questions = self.review_system.get_due_questions(limit=10)
-        
-        if not due_questions:
-            print("没有需要复习的问题！")
-            return None
-        
-        # 随机选择一个问题
-        question = random.choice(due_questions)
-        correct_answer = self.data_handler.get_all_events()[question]
-        
+    def prepare_question(self, question, correct_answer, question_type="random"):
+        """生成一道题目的题型、题面和选项"""
         # 确定问题类型
         if question_type == "random":
             question_type = random.choice(["multiple_choice", "fill_blank"])
@@ -77,6 +88,49 @@ class Quiz:
         else:  # fill_blank
             quiz_data = self.generate_fill_blank(question, correct_answer)
         
+        return {
+            "question": question,
+            "answer": correct_answer,
+            "type": question_type,
+            "quiz_data": quiz_data,
+            "requeues": 0
+        }
+    
+    @profiling.timed("plan_session")
+    def plan_session(self, num_questions, question_type="random"):
+        """会话开始时一次性排好本次会话的题目队列"""
+        num_questions = min(num_questions, config.MAX_SESSION_QUESTIONS)
+        due_questions = self.review_system.get_due_questions(limit=num_questions)
+        all_events = self.data_handler.get_all_events()
+        
+        return deque(
+            self.prepare_question(question, all_events[question], question_type)
+            for question in due_questions
+        )
+    
+    def ask_question(self, question_type="random", item=None, session=None):
+        """提问一个问题
+        
+        item 为 plan_session 预先生成的题目；未提供时即时挑选一道待复习的问题。
+        session 为累计本次作答的会话数据，默认为当前会话。
+        """
+        if item is None:
+            # 获取待复习的问题
+            due_questions = self.review_system.get_due_questions(limit=10)
+            
+            if not due_questions:
+                print("没有需要复习的问题！")
+                return None
+            
+            # 随机选择一个问题
+            question = random.choice(due_questions)
+            item = self.prepare_question(question, self.data_handler.get_all_events()[question], question_type)
+        
+        question = item["question"]
+        correct_answer = item["answer"]
+        question_type = item["type"]
+        quiz_data = item["quiz_data"]
+        
         # 记录开始时间
         start_time = time.time()
         
@@ -92,19 +146,12 @@ class Quiz:
             valid_inputs = [chr(65+i) for i in range(len(quiz_data["options"]))]
             user_input = ""
             while user_input not in valid_inputs:
-                user_input = input("\n请选择 (A/B/C/D): ").upper()
-            
-            user_answer_index = ord(user_input) - 65
-            is_correct = user_answer_index == quiz_data["correct_index"]
+                user_input = input(f"\n请选择 ({'/'.join(valid_inputs)}): ").upper()
         else:  # fill_blank
             # 获取用户答案
             user_input = input("\n请输入答案: ")
-            
-            # 标准化处理用户输入和正确答案
-            normalized_user = self.normalize_answer(user_input.strip())
-            normalized_correct = self.normalize_answer(quiz_data["answer"])
-            
-            is_correct = normalized_user == normalized_correct
+        
+        is_correct = self.grade_answer(item, user_input)
         
         # 计算用时
         end_time = time.time()
@@ -113,25 +160,63 @@ class Quiz:
         # 显示结果
         if is_correct:
             print("\n✓ 回答正确！")
-            performance = 5 - min(4, int(time_taken / 5))  # 根据用时调整表现评分
         else:
             print("\n✗ 回答错误！")
             print(f"正确答案是: {correct_answer}")
-            performance = 2  # 错误但记得一些内容
         
-        # 更新统计数据
-        self.data_handler.update_question_stats(question, is_correct, time_taken)
+        return self.record_answer(item, is_correct, time_taken, session)
+    
+    def grade_answer(self, item, user_input):
+        """判断用户答案是否正确
+        
+        选择题接受选项字母；填空题比较解析后的 (起始年份, 结束年份)，
+        正确答案的解析结果来自题库的年份索引，用户输入经过有界缓存解析。
+        """
+        quiz_data = item["quiz_data"]
+        if item["type"] == "multiple_choice":
+            user_input = user_input.strip().upper()
+            if len(user_input) != 1:
+                return False
+            return ord(user_input) - 65 == quiz_data["correct_index"]
+        
+        correct_range = self.data_handler.year_range(quiz_data["answer"])
+        if correct_range is not None:
+            return parse_user_answer(user_input.strip()) == correct_range
+        
+        # 答案中没有可识别的年份时，比较标准化后的数字
+        normalized_user = self.normalize_answer(user_input.strip())
+        normalized_correct = self.normalize_answer(quiz_data["answer"])
+        
+        return normalized_user == normalized_correct
+    
+    def record_answer(self, item, is_correct, time_taken, session=None):
+        """记录一次作答：更新统计数据、安排下次复习并累计会话数据"""
+        question = item["question"]
+        session = self.current_session if session is None else session
+        profiling.count("answers")
+        
+        performance = performance_score(is_correct, time_taken)
+        
+        # 更新统计数据，安排下次复习后一并写盘
+        self.data_handler.update_question_stats(question, is_correct, time_taken, commit=False)
+        interval_before = self.data_handler.get_question_stats(question)["interval"]
         
         # 计算下次复习时间
         next_review = self.review_system.calculate_next_review(question, performance)
         
+        if self.history is not None:
+            self.history.append(
+                self.data_handler.source_key, question, item["type"], is_correct, time_taken, performance,
+                interval_before, self.data_handler.get_question_stats(question)["interval"],
+                self.review_system.clock().timestamp())
+        
         # 更新当前会话数据
-        self.current_session["questions_asked"] += 1
+        session["questions_asked"] += 1
         if is_correct:
-            self.current_session["correct_answers"] += 1
+            session["correct_answers"] += 1
         else:
-            self.current_session["wrong_answers"] += 1
-        self.current_session["total_time"] += time_taken
+            session["wrong_answers"] += 1
+        session["total_time"] += time_taken
         
         return {
             "question": question,
@@ -140,6 +225,23 @@ class Quiz:
             "next_review": next_review
         }
     
+    def requeue_if_wrong(self, plan, item, is_correct):
+        """答错的题目间隔几道题后在本次会话中再问一次"""
+        if not is_correct and item["requeues"] < config.MAX_SESSION_REQUEUES:
+            item["requeues"] += 1
+            plan.insert(min(config.REQUEUE_GAP, len(plan)), item)
+    
+    @staticmethod
+    def new_session():
+        """返回一份空的会话数据"""
+        return {
+            "start_time": datetime.now(),
+            "questions_asked": 0,
+            "correct_answers": 0,
+            "wrong_answers": 0,
+            "total_time": 0
+        }
+    
     def start_session(self, num_questions=10, question_type="random"):
         """开始一个学习会话"""
         print("\n开始历史大事年表背诵会话！")
@@ -147,19 +249,18 @@ class Quiz:
         print("按 Ctrl+C 随时结束会话。\n")
         
         # 重置会话数据
-        self.current_session = {
-            "start_time": datetime.now(),
-            "questions_asked": 0,
-            "correct_answers": 0,
-            "wrong_answers": 0,
-            "total_time": 0
-        }
+        self.current_session = self.new_session()
+        
+        # 预先排好题目队列，答错的题目在本次会话稍后再问一次
+        plan = self.plan_session(num_questions, question_type)
+        if not plan:
+            print("没有需要复习的问题！")
         
         try:
-            for _ in range(num_questions):
-                result = self.ask_question(question_type)
-                if not result:
-                    break
+            while plan and self.current_session["questions_asked"] < num_questions:
+                item = plan.popleft()
+                result = self.ask_question(item=item)
+                self.requeue_if_wrong(plan, item, result["is_correct"])
                 
                 # 显示下次复习时间
                 next_review_date = result["next_review"].strftime("%Y-%m-%d %H:%M")
@@ -170,12 +271,18 @@ class Quiz:
         except KeyboardInterrupt:
             print("\n会话已中断。")
         
-        # 显示会话总结
-        self.show_session_summary()
+        self.finish_session()
+    
+    def finish_session(self, session=None):
+        """会话结束或中断时把后台尚未写入的统计数据和作答历史落盘，并显示会话总结"""
+        self.data_handler.flush()
+        if self.history is not None:
+            self.history.flush()
+        self.show_session_summary(session)
     
-    def show_session_summary(self):
-        """显示当前会话的总结"""
-        session = self.current_session
+    def show_session_summary(self, session=None):
+        """显示会话的总结，默认为当前会话"""
+        session = self.current_session if session is None else session
         total_questions = session["questions_asked"]
         
         if total_questions == 0:
@@ -1,11 +1,184 @@
 import datetime
+import heapq
 import random
 from datetime import datetime, timedelta
+from itertools import islice
 
-class ReviewSystem:
+import config
+import profiling
+from data_handler import review_timestamp
+
+
+def sm2_update(interval, ease_factor, performance):
+    """按SM-2算法计算一次复习后的间隔（天）和难度系数
+    
+    参数:
+        interval: 当前间隔
+        ease_factor: 当前难度系数
+        performance (int): 表现评分 (0-5)
+    """
+    if performance >= 3:  # 如果回答正确
+        if interval == 1:
+            new_interval = config.INTERVAL_AFTER_FIRST
+        elif interval == 2:
+            new_interval = 6
+        else:
+            new_interval = min(interval * ease_factor, config.MAX_INTERVAL)
+        
+        # 根据表现调整难度系数
+        new_ease_factor = ease_factor + (0.1 - (5 - performance) * (0.08 + (5 - performance) * 0.02))
+        if new_ease_factor < config.MIN_EASE_FACTOR:
+            new_ease_factor = config.MIN_EASE_FACTOR
+    else:  # 如果回答错误
+        new_interval = 1
+        new_ease_factor = ease_factor
+        if new_ease_factor >= config.MIN_EASE_FACTOR:
+            new_ease_factor -= 0.2
+    
+    return new_interval, new_ease_factor
+
+
+def performance_score(is_correct, time_taken):
+    """把一次作答换算为 SM-2 表现评分 (0-5)"""
+    if is_correct:
+        return 5 - min(4, int(time_taken / config.PERFORMANCE_TIME_STEP))  # 根据用时调整表现评分
+    return 2  # 错误但记得一些内容
+
+
+class DueIndex:
+    """待复习问题索引
+    
+    维护一个按下次复习时间排列的最小堆、一个按错误率和平均用时排列的薄弱项堆，
+    以及尚未学习的事件集合。统计更新和事件增删时通过 DataHandler 的监听接口
+    增量更新，堆中过期的条目在弹出时惰性丢弃。
+    """
+    
     def __init__(self, data_handler):
         self.data_handler = data_handler
+        self.rebuild()
     
+    @profiling.timed("build_due_index")
+    def rebuild(self):
+        """根据当前事件和统计数据全量重建索引"""
+        all_stats = self.data_handler.get_all_stats()
+        all_events = self.data_handler.get_all_events()
+        
+        self._due_at = {}      # question -> next_review timestamp
+        self._weakness = {}    # question -> (error_rate, avg_time)
+        self._unstudied = {}   # insertion-ordered set of events without stats
+        
+        for event in all_events:
+            if event in all_stats:
+                stats = all_stats[event]
+                self._due_at[event] = review_timestamp(stats)
+                self._weakness[event] = self._weakness_key(stats)
+            else:
+                self._unstudied[event] = None
+        
+        self._due_heap = [(ts, q) for q, ts in self._due_at.items()]
+        heapq.heapify(self._due_heap)
+        self._weak_heap = [(-rate, -avg_time, q) for q, (rate, avg_time) in self._weakness.items()]
+        heapq.heapify(self._weak_heap)
+    
+    @staticmethod
+    def _weakness_key(stats):
+        error_rate = stats["wrong_attempts"] / stats["total_attempts"] if stats["total_attempts"] > 0 else 0
+        return (error_rate, stats["avg_time"])
+    
+    def on_stats_updated(self, question, stats):
+        if question not in self.data_handler.get_all_events():
+            return
+        self._unstudied.pop(question, None)
+        
+        next_review = review_timestamp(stats)
+        if self._due_at.get(question) != next_review:
+            self._due_at[question] = next_review
+            heapq.heappush(self._due_heap, (next_review, question))
+        
+        weakness = self._weakness_key(stats)
+        if self._weakness.get(question) != weakness:
+            self._weakness[question] = weakness
+            heapq.heappush(self._weak_heap, (-weakness[0], -weakness[1], question))
+        
+        self._compact()
+    
+    def on_event_added(self, event, date):
+        stats = self.data_handler.get_question_stats(event)
+        if stats is None:
+            self._unstudied[event] = None
+        else:
+            self.on_stats_updated(event, stats)
+    
+    def on_event_removed(self, event):
+        self._unstudied.pop(event, None)
+        self._due_at.pop(event, None)
+        self._weakness.pop(event, None)
+        self._compact()
+    
+    def _compact(self):
+        # Drop stale heap entries once they outnumber the live ones
+        if len(self._due_heap) > 2 * len(self._due_at) + 64:
+            self._due_heap = [(ts, q) for q, ts in self._due_at.items()]
+            heapq.heapify(self._due_heap)
+        if len(self._weak_heap) > 2 * len(self._weakness) + 64:
+            self._weak_heap = [(-rate, -avg_time, q) for q, (rate, avg_time) in self._weakness.items()]
+            heapq.heapify(self._weak_heap)
+    
+    def top_due(self, now, k):
+        """返回最多 k 个已到期的问题，最早到期的在前"""
+        result = []
+        popped = []
+        heap = self._due_heap
+        while heap and len(result) < k and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            ts, question = entry
+            if self._due_at.get(question) != ts or question in result:
+                continue  # stale or duplicate entry, drop it for good
+            popped.append(entry)
+            result.append(question)
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        return result
+    
+    def count_due(self, now):
+        """返回已到期的问题数"""
+        return sum(1 for ts in self._due_at.values() if ts <= now)
+    
+    def top_unstudied(self, k):
+        """返回最多 k 个从未学习过的问题"""
+        return list(islice(self._unstudied, k))
+    
+    def top_weak(self, k, exclude=()):
+        """返回最多 k 个错误率高、用时长的问题"""
+        result = []
+        popped = []
+        heap = self._weak_heap
+        while heap and len(result) < k:
+            entry = heapq.heappop(heap)
+            rate, avg_time, question = entry
+            if self._weakness.get(question) != (-rate, -avg_time) or entry in popped:
+                continue
+            popped.append(entry)
+            if question not in exclude:
+                result.append(question)
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        return result
+
+
+class ReviewSystem:
+    def __init__(self, data_handler, clock=None):
+        self.data_handler = data_handler
+        # 返回当前时间的函数，默认与数据处理对象共用，模拟器会换成模拟时钟
+        self.clock = clock or data_handler.clock
+        
+        # 支持索引查询的存储后端不需要内存索引
+        self.due_index = None
+        if getattr(data_handler, "query_due_questions", None) is None:
+            self.due_index = DueIndex(data_handler)
+            data_handler.add_listener(self.due_index)
+    
+    @profiling.timed("calculate_next_review")
     def calculate_next_review(self, question, performance):
         """计算下一次复习的时间
         
@@ -16,76 +189,40 @@ class ReviewSystem:
         stats = self.data_handler.get_question_stats(question)
         
         if not stats:
-            return datetime.now() + timedelta(days=1)
+            return self.clock() + timedelta(days=1)
         
         # 根据SM-2算法调整间隔和难度系数
-        if performance >= 3:  # 如果回答正确
-            if stats["interval"] == 1:
-                interval = 1
-            elif stats["interval"] == 2:
-                interval = 6
-            else:
-                interval = stats["interval"] * stats["ease_factor"]
-            
-            # 根据表现调整难度系数
-            ease_factor = stats["ease_factor"] + (0.1 - (5 - performance) * (0.08 + (5 - performance) * 0.02))
-            if ease_factor < 1.3:
-                ease_factor = 1.3
-        else:  # 如果回答错误
-            interval = 1
-            ease_factor = stats["ease_factor"]
-            if ease_factor >= 1.3:
-                ease_factor -= 0.2
+        interval, ease_factor = sm2_update(stats["interval"], stats["ease_factor"], performance)
         
         # 更新统计数据
-        stats["interval"] = interval
-        stats["ease_factor"] = ease_factor
-        stats["last_review"] = datetime.now().isoformat()
-        stats["next_review"] = (datetime.now() + timedelta(days=interval)).isoformat()
-        
-        self.data_handler.save_stats()
+        now = self.clock()
+        next_review = now + timedelta(days=interval)
+        self.data_handler.set_review_schedule(question, interval, ease_factor, now, next_review)
+        self.data_handler.commit_question_stats(question)
         
-        return datetime.now() + timedelta(days=interval)
+        return next_review
     
+    @profiling.timed("get_due_questions")
     def get_due_questions(self, limit=10):
         """获取当前需要复习的问题"""
-        all_stats = self.data_handler.get_all_stats()
-        all_events = self.data_handler.get_all_events()
-        
-        due_questions = []
-        now = datetime.now()
-        
-        # 首先添加从未复习过的问题
-        for event in all_events:
-            if event not in all_stats:
-                due_questions.append(event)
-        
-        # 然后添加到期需要复习的问题
-        for question, stats in all_stats.items():
-            if question in all_events:  # 确保问题仍然存在于事件列表中
-                next_review = datetime.fromisoformat(stats["next_review"])
-                if next_review <= now:
-                    due_questions.append(question)
+        # 支持索引查询的存储后端直接在存储层筛选
+        query_due_questions = getattr(self.data_handler, "query_due_questions", None)
+        if query_due_questions is not None:
+            due_questions = query_due_questions(self.clock(), limit)
+            random.shuffle(due_questions)
+            return due_questions
         
-        # 如果到期问题不足，添加一些错误率高或平均用时长的问题
+        # 先为未学习的问题留出 NEW_QUESTION_SHARE 的名额，其余取最早到期的问题；
+        # 两者之一不足时由另一个补齐，仍不足时补充错误率高或平均用时长的问题
+        index = self.due_index
+        unstudied = index.top_unstudied(limit)
+        reserved = min(len(unstudied), int(limit * config.NEW_QUESTION_SHARE))
+        due_questions = index.top_due(self.clock().timestamp(), limit - reserved)
+        due_questions.extend(unstudied[:limit - len(due_questions)])
         if len(due_questions) < limit:
-            remaining_questions = [q for q in all_events if q not in due_questions]
-            
-            # 按错误率和平均用时排序
-            def question_priority(q):
-                if q not in all_stats:
-                    return (0, 0)  # 未尝试过的问题优先级低
-                
-                stats = all_stats[q]
-                error_rate = stats["wrong_attempts"] / stats["total_attempts"] if stats["total_attempts"] > 0 else 0
-                avg_time = stats["avg_time"]
-                
-                return (error_rate, avg_time)
-            
-            sorted_questions = sorted(remaining_questions, key=question_priority, reverse=True)
-            due_questions.extend(sorted_questions[:limit - len(due_questions)])
+            due_questions.extend(index.top_weak(limit - len(due_questions), set(due_questions)))
         
         # 随机打乱问题顺序
         random.shuffle(due_questions)
         
-        return due_questions[:limit]
\ No newline at end of file
+        return due_questions
@@ -0,0 +1,176 @@
+import heapq
+from collections import Counter
+
+import config
+import profiling
+
+# 出现在超过这个比例的事件中的二元组区分度很低，查询中还有其他二元组时跳过
+COMMON_GRAM_FRACTION = 0.05
+SUBSTRING_BONUS = 0.5
+
+
+def bigrams(text):
+    """返回字符串去掉空白后的字符二元组集合，不足两个字符时为空集"""
+    text = "".join(text.split()).lower()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def dice(common, size_a, size_b):
+    return 2 * common / (size_a + size_b) if size_a + size_b else 0.0
+
+
+class SearchIndex:
+    """事件名称和答案的字符二元组倒排索引
+
+    每个事件分配一个整数ID，倒排表只追加ID；事件删除或修改后旧ID作废，
+    作废的ID超过有效ID数时重建倒排表。作为 DataHandler 的监听对象增量更新。
+    """
+
+    def __init__(self, data_handler):
+        self.data_handler = data_handler
+        self.rebuild()
+
+    @profiling.timed("build_search_index")
+    def rebuild(self):
+        """根据当前题库全量重建索引"""
+        self._ids = {}             # event -> id
+        self._events = []          # id -> event, None once stale
+        self._sizes = []           # id -> (name gram count, answer gram count)
+        self._name_postings = {}   # gram -> [id, ...]
+        self._answer_postings = {}
+        self._stale = 0
+        for event, date in self.data_handler.get_all_events().items():
+            self._add(event, date)
+
+    def _add(self, event, date):
+        if event in self._ids:
+            self._discard(event)
+        doc_id = len(self._events)
+        self._ids[event] = doc_id
+        self._events.append(event)
+        name_grams = bigrams(event)
+        answer_grams = bigrams(date) if isinstance(date, str) else set()
+        self._sizes.append((len(name_grams), len(answer_grams)))
+        for postings, grams in ((self._name_postings, name_grams), (self._answer_postings, answer_grams)):
+            for gram in grams:
+                posting = postings.get(gram)
+                if posting is None:
+                    postings[gram] = [doc_id]
+                else:
+                    posting.append(doc_id)
+
+    def _discard(self, event):
+        doc_id = self._ids.pop(event, None)
+        if doc_id is not None:
+            self._events[doc_id] = None
+            self._stale += 1
+
+    def _compact(self):
+        if self._stale > len(self._ids) + 1024:
+            self.rebuild()
+
+    def on_event_added(self, event, date):
+        self._add(event, date)
+        self._compact()
+
+    def on_events_added(self, events):
+        for event, date in events.items():
+            self._add(event, date)
+        self._compact()
+
+    def on_event_removed(self, event):
+        self._discard(event)
+        self._compact()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _candidates(self, postings, grams, max_skipped=0):
+        """统计每个事件与查询共有的二元组数，返回 (命中计数, 是否跳过了常见二元组)
+
+        常见二元组的倒排表很长，查询中还有较少见的二元组时只用后者召回候选事件。
+        最多跳过 max_skipped 个最常见的二元组，调用方保证只含这些二元组的事件不会入选。
+        """
+        present = sorted((postings[gram] for gram in grams if gram in postings), key=len)
+        limit = max(64, int(len(self._events) * COMMON_GRAM_FRACTION))
+        hits = Counter()
+        for i, posting in enumerate(present):
+            if i and len(posting) > limit and len(present) - i <= max_skipped:
+                return hits, True
+            hits.update(posting)
+        return hits, False
+
+    @profiling.timed("search_events")
+    def search(self, query, limit=20, offset=0, min_score=None):
+        """按相似度搜索事件，返回 (匹配总数, [(得分, 事件, 时间), ...])
+
+        得分为名称或答案二元组的 Dice 系数中较大者，名称包含查询串时额外加分。
+        """
+        min_score = config.SEARCH_MIN_SCORE if min_score is None else min_score
+        grams = bigrams(query)
+        if not grams:
+            return 0, []
+        needle = "".join(query.split()).lower()
+        events = self._events
+        sizes = self._sizes
+        all_events = self.data_handler.get_all_events()
+
+        # 只与查询共有 k 个二元组的事件得分至多为 dice(k, 查询二元组数, k)，低于 min_score 的 k 个可以跳过
+        skippable = 0
+        while skippable < len(grams) and dice(skippable + 1, len(grams), skippable + 1) < min_score:
+            skippable += 1
+        name_hits, name_pruned = self._candidates(self._name_postings, grams, skippable)
+        answer_hits, answer_pruned = self._candidates(self._answer_postings, grams, skippable)
+        scored = []
+        for doc_id in name_hits.keys() | answer_hits.keys():
+            event = events[doc_id]
+            if event is None:
+                continue
+            name_size, answer_size = sizes[doc_id]
+            # 跳过了常见二元组时重新计算候选事件的确切共有数
+            name_common = len(grams & bigrams(event)) if name_pruned else name_hits.get(doc_id, 0)
+            if answer_pruned:
+                answer_common = len(grams & bigrams(all_events[event])) if answer_size else 0
+            else:
+                answer_common = answer_hits.get(doc_id, 0)
+            score = max(dice(name_common, len(grams), name_size), dice(answer_common, len(grams), answer_size))
+            if needle in "".join(event.split()).lower():
+                score += SUBSTRING_BONUS
+            if score >= min_score:
+                scored.append((score, -doc_id, event))
+
+        # 得分相同时先加入题库的在前
+        top = heapq.nlargest(offset + limit, scored)
+        return len(scored), [(score, event, all_events[event]) for score, _, event in top[offset:]]
+
+    @profiling.timed("near_duplicates")
+    def near_duplicates(self, event, threshold=None, limit=5):
+        """返回名称与 event 相近的其他事件 [(相似度, 事件, 时间), ...]
+
+        相似度为共有二元组数除以较短名称的二元组数，因此
+        "南昌起义" 与 "南昌起义、秋收起义" 的相似度为 1。
+        较短名称只有一个二元组时改用 Dice 系数，避免两个字的名称匹配所有包含它的事件。
+        """
+        threshold = config.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+        grams = bigrams(event)
+        if not grams:
+            return []
+        # 名称很短的事件可能只含常见二元组且相似度为 1，因此不跳过常见二元组
+        hits, _ = self._candidates(self._name_postings, grams)
+        # 只有一个共有二元组时相似度至多为 1/2（较短名称的二元组不少于两个），或对只有
+        # 一个二元组的名称用 Dice 系数得 2/(len(grams)+1)；阈值更高时先筛掉大部分候选
+        if len(grams) > 1 and threshold > max(0.5, dice(1, len(grams), 1)):
+            hits = {doc_id: common for doc_id, common in hits.items() if common > 1}
+        matches = []
+        for doc_id, common in hits.items():
+            other = self._events[doc_id]
+            if other is None or other == event:
+                continue
+            other_size = self._sizes[doc_id][0]
+            shorter = min(len(grams), other_size)
+            similarity = common / shorter if shorter >= 2 else dice(common, len(grams), other_size)
+            if similarity >= threshold:
+                matches.append((similarity, -doc_id, other))
+        all_events = self.data_handler.get_all_events()
+        return [(similarity, other, all_events[other])
+                for similarity, _, other in heapq.nlargest(limit, matches)]
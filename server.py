@@ -0,0 +1,240 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+from collections import OrderedDict
+
+import config
+from data_handler import create_data_handler
+from engine import QuizEngine
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class RequestError(ValueError):
+    """无法解析的请求，status 为应答的状态码"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class QuizServer:
+    """基于 asyncio 的本地 HTTP 答题服务
+
+    多个会话共享内存中的题库；统计数据只在内存中标记为待写入，
+    由后台任务定期在线程池中批量落盘，不占用请求处理路径。闲置超过
+    session_ttl 秒或超出 max_sessions 个的会话会被回收。
+    """
+
+    def __init__(self, deck_dir=".", stats_file=config.STATS_FILE, backend=None,
+                 flush_interval=config.SERVER_FLUSH_INTERVAL, session_ttl=config.SERVER_SESSION_TTL,
+                 max_sessions=config.SERVER_MAX_SESSIONS):
+        self.deck_dir = deck_dir
+        self.stats_file = stats_file
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.engines = {}    # (user, deck name) -> QuizEngine
+        self.sessions = {}   # session id -> QuizEngine
+        self._last_used = OrderedDict()   # session id -> time.monotonic() of its last request, oldest first
+
+    def get_engine(self, deck, user=None):
+        """按学习者和题库文件名取得（必要时加载）共享的答题引擎"""
+        name = os.path.basename(deck or config.DATA_FILE)
+        engine = self.engines.get((user, name))
+        if engine is None:
+            path = os.path.join(self.deck_dir, name)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"题库文件不存在: {name}")
+            data_handler = create_data_handler(path, self.stats_file, self.backend, user)
+            data_handler.defer_writes = True
+            engine = QuizEngine(data_handler)
+            self.engines[(user, name)] = engine
+        return engine
+
+    def route(self, method, path, body):
+        """分发请求，返回 (状态码, 响应数据)"""
+        parts = [part for part in path.split("?")[0].split("/") if part]
+
+        if parts == ["sessions"]:
+            if method != "POST":
+                return 405, {"error": "method not allowed"}
+            engine = self.get_engine(body.get("deck"), body.get("user"))
+            session_id = engine.start_session(
+                min(int(body.get("num_questions", config.DEFAULT_SESSION_QUESTIONS)), config.MAX_SESSION_QUESTIONS),
+                body.get("type", "random"))
+            self.sessions[session_id] = engine
+            self._touch(session_id)
+            while len(self.sessions) > self.max_sessions:
+                self.evict_session(next(iter(self._last_used)))
+            return 200, {"session_id": session_id}
+
+        if len(parts) < 2 or parts[0] != "sessions" or parts[1] not in self.sessions:
+            return 404, {"error": "not found"}
+
+        session_id = parts[1]
+        engine = self.sessions[session_id]
+        action = parts[2] if len(parts) > 2 else None
+        self._touch(session_id)
+
+        if action is None and method == "DELETE":
+            del self.sessions[session_id]
+            del self._last_used[session_id]
+            return 200, engine.end_session(session_id)
+        if action == "question" and method == "GET":
+            question = engine.next_question(session_id)
+            return 200, {"finished": question is None, "question": question}
+        if action == "answer" and method == "POST":
+            return 200, engine.submit_answer(session_id, body.get("answer", ""), body.get("time_taken"))
+        if action == "summary" and method == "GET":
+            return 200, engine.session_summary(session_id)
+        return 404, {"error": "not found"}
+
+    def _touch(self, session_id):
+        self._last_used[session_id] = time.monotonic()
+        self._last_used.move_to_end(session_id)
+
+    def evict_session(self, session_id):
+        """回收一个会话；它的统计数据已在题库中待写入，由 flush_loop 在线程池中落盘"""
+        engine = self.sessions.pop(session_id)
+        del self._last_used[session_id]
+        engine.end_session(session_id)
+
+    def expire_sessions(self, now=None):
+        """回收闲置超过 session_ttl 秒的会话，返回回收的会话数"""
+        now = time.monotonic() if now is None else now
+        expired = []
+        for session_id, last_used in self._last_used.items():
+            if now - last_used <= self.session_ttl:
+                break
+            expired.append(session_id)
+        for session_id in expired:
+            self.evict_session(session_id)
+        return len(expired)
+
+    async def handle_client(self, reader, writer):
+        """处理一个 keep-alive 连接上的所有请求"""
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except RequestError as e:
+                    # 请求的边界已不可信，应答后关闭连接
+                    write_response(writer, e.status, {"error": str(e)}, close=True)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                try:
+                    status, payload = self.route(method, path, json.loads(body) if body else {})
+                except (ValueError, KeyError, FileNotFoundError) as e:
+                    status, payload = 400, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+                write_response(writer, status, payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def flush_loop(self):
+        """定期回收闲置的会话，并在线程池中把各题库待写入的统计数据落盘"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush_once()
+
+    async def flush_once(self, now=None):
+        """回收闲置的会话，再在线程池中把各题库待写入的统计数据落盘"""
+        loop = asyncio.get_running_loop()
+        self.expire_sessions(now)
+        for engine in list(self.engines.values()):
+            await loop.run_in_executor(None, engine.data_handler.flush)
+
+    def close(self):
+        """关闭所有题库，合并统计数据"""
+        for engine in self.engines.values():
+            engine.data_handler.close()
+
+    async def serve(self, host=config.SERVER_HOST, port=config.SERVER_PORT):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        flusher = asyncio.create_task(self.flush_loop())
+        stopped = asyncio.Event()
+        if os.name != "nt":
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+        print(f"答题服务已启动: http://{host}:{port}")
+        try:
+            async with server:
+                await stopped.wait()
+        finally:
+            flusher.cancel()
+            self.close()
+
+
+async def _read_line(reader):
+    try:
+        return await reader.readline()
+    except ValueError:
+        # 超过 StreamReader 的行长度上限
+        raise RequestError(400, "request line or header too long") from None
+
+
+async def read_request(reader, max_body=config.SERVER_MAX_BODY):
+    """读取一个 HTTP/1.1 请求，连接关闭时返回 None，请求无法解析时抛出 RequestError"""
+    request_line = await _read_line(reader)
+    if not request_line.strip():
+        return None
+    try:
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise RequestError(400, "malformed request line") from None
+
+    headers = {}
+    while True:
+        line = await _read_line(reader)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise RequestError(400, "invalid Content-Length") from None
+    if length < 0:
+        raise RequestError(400, "invalid Content-Length")
+    if length > max_body:
+        raise RequestError(413, f"request body exceeds {max_body} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+def write_response(writer, status, payload, close=False):
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(data)}\r\n"
+        f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode("latin-1") + data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"{config.APP_NAME} 答题服务")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--deck-dir", default=".", help="题库文件所在目录 (默认: 当前目录)")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default=config.STORAGE_BACKEND)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(QuizServer(args.deck_dir, config.STATS_FILE, args.backend).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n答题服务已停止。")
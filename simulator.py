@@ -0,0 +1,272 @@
+"""离线复习调度模拟器，用于调整 SM-2 参数
+
+用合成的（或根据作答历史拟合的）学习者在模拟时钟下逐天调用 ReviewSystem，
+与真实会话走同一条出题和调度路径，只是不读写任何文件。参数扫描的每种配置
+分成若干批学习者，交给进程池并行运行，最后按配置汇总每天的复习量、记忆
+保持率和工作量。
+"""
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import config
+from data_handler import MemoryDataHandler
+from review_system import ReviewSystem, performance_score
+
+# 可以扫描的参数，均为 config.py 中的常量
+TUNABLE_PARAMS = (
+    "INITIAL_EASE_FACTOR",
+    "MIN_EASE_FACTOR",
+    "INITIAL_INTERVAL",
+    "INTERVAL_AFTER_FIRST",
+    "MAX_INTERVAL",
+    "PERFORMANCE_TIME_STEP",
+)
+SIM_START = datetime(2024, 1, 1, 20, 0)   # 每天的学习在 20:00 之后一小时内开始
+LEARNERS_PER_TASK = 25
+
+
+class SimClock:
+    """可手动推进的时钟，作为 DataHandler 和 ReviewSystem 的 clock 使用"""
+
+    def __init__(self, start=SIM_START):
+        self.current = start
+
+    def __call__(self):
+        return self.current
+
+    def advance(self, days=0, seconds=0):
+        self.current += timedelta(days=days, seconds=seconds)
+
+
+class Learner:
+    """简化的记忆模型：回忆概率随时间指数衰减，每次复习后记忆稳定性变化
+
+    ability 越高记得越牢、答得越快；difficulties 是每张卡片的难度（约 0.5-3.5）。
+    第一次学习和每次答错后看到正确答案都会建立初始记忆；成功回忆时稳定性的
+    增长与回忆难度有关（越接近遗忘时复习收益越大），回忆失败时稳定性减半。
+    """
+
+    def __init__(self, rng, difficulties):
+        self.rng = rng
+        self.ability = rng.lognormvariate(0, 0.25)
+        self.prior = rng.uniform(0.1, 0.4)    # 第一次见到就答对的概率
+        self.difficulties = difficulties
+        self.stability = {}                   # card -> 稳定性（天）
+        self.last_seen = {}                   # card -> 上次复习的模拟天数
+
+    def recall_probability(self, card, day):
+        stability = self.stability.get(card)
+        if stability is None:
+            return self.prior
+        return math.exp(-(day - self.last_seen[card]) / stability)
+
+    def answer(self, card, day):
+        """返回 (是否答对, 用时秒数, 答题前的回忆概率)"""
+        rng = self.rng
+        difficulty = self.difficulties[card]
+        p = self.recall_probability(card, day)
+        correct = rng.random() < p
+        initial = 3 * self.ability / difficulty
+        stability = self.stability.get(card, initial)
+        if correct:
+            stability *= 1 + 4 * self.ability / difficulty * (1.1 - p)
+        else:
+            stability = max(initial, stability * 0.5)
+        self.stability[card] = stability
+        self.last_seen[card] = day
+
+        # 越难、越接近遗忘，想起来越慢
+        base = 2.5 * difficulty / self.ability * (1 + 2 * (1 - p))
+        time_taken = base * rng.lognormvariate(0, 0.35) * (1 if correct else 1.5)
+        return correct, time_taken, p
+
+
+def synthetic_difficulties(rng, cards):
+    return [min(3.5, max(0.5, rng.lognormvariate(0.2, 0.4))) for _ in range(cards)]
+
+
+def difficulties_from_history(log):
+    """根据作答历史中每个问题的错误率拟合卡片难度，返回难度列表
+
+    错误率用 Beta(1, 1) 先验平滑，再线性映射到 0.5-3.5。
+    """
+    per_question = {}
+    for chunk in log.iter_chunks():
+        for question, correct in zip(chunk["question"], chunk["correct"]):
+            stats = per_question.setdefault(question, [0, 0])
+            stats[0] += 1
+            stats[1] += 1 - correct
+    return [0.5 + 3.0 * (wrong + 1) / (attempts + 2) for attempts, wrong in per_question.values()]
+
+
+def simulate_learner(seed, difficulties, days, questions_per_day):
+    """模拟一名学习者 days 天的学习，返回累计指标"""
+    rng = random.Random(seed)
+    random.seed(seed)  # ReviewSystem 用全局 random 打乱问题顺序
+    clock = SimClock()
+    data_handler = MemoryDataHandler({str(card): "" for card in range(len(difficulties))}, clock)
+    review_system = ReviewSystem(data_handler)
+    learner = Learner(rng, difficulties)
+    due_index = review_system.due_index
+
+    # due_backlog: 每次会话开始时已到期（含刚好到期）的问题数之和；
+    # repeat_*: 复习已学过的问题的次数和答对次数，用于计算保持率
+    totals = {"reviews": 0, "correct": 0, "due_backlog": 0, "repeat_reviews": 0,
+              "repeat_correct": 0, "study_seconds": 0.0}
+    for day in range(days):
+        session_start = SIM_START + timedelta(days=day, seconds=rng.uniform(0, 3600))
+        clock.current = session_start
+        totals["due_backlog"] += due_index.count_due(session_start.timestamp())
+        for question in review_system.get_due_questions(questions_per_day):
+            card = int(question)
+            previously_seen = card in learner.stability
+            is_correct, time_taken, _ = learner.answer(card, day)
+            # 与 Quiz.record_answer 相同的两步更新
+            data_handler.update_question_stats(question, is_correct, time_taken, commit=False)
+            review_system.calculate_next_review(question, performance_score(is_correct, time_taken))
+            totals["reviews"] += 1
+            totals["correct"] += is_correct
+            totals["study_seconds"] += time_taken
+            if previously_seen:
+                totals["repeat_reviews"] += 1
+                totals["repeat_correct"] += is_correct
+            clock.advance(seconds=time_taken + 3)
+
+    # 模拟结束时每张学过的卡片的回忆概率，衡量实际掌握程度
+    studied = list(learner.stability)
+    totals["studied"] = len(studied)
+    totals["knowledge"] = sum(learner.recall_probability(card, days) for card in studied)
+    totals["interval_sum"] = sum(stats["interval"] for stats in data_handler.get_all_stats().values())
+    return totals
+
+
+def _run_batch(overrides, seeds, difficulties, cards, days, questions_per_day):
+    """进程池任务：应用一种配置并模拟一批学习者，返回各项指标之和"""
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    config.WRITE_BEHIND = False
+    config.COMPACT_STATS = False
+
+    result = {}
+    for seed in seeds:
+        deck = difficulties or synthetic_difficulties(random.Random(f"deck:{seed}"), cards)
+        for key, value in simulate_learner(seed, deck, days, questions_per_day).items():
+            result[key] = result.get(key, 0) + value
+    result["learners"] = len(seeds)
+    return result
+
+
+def parse_sweep(specs):
+    """把 ["MIN_EASE_FACTOR=1.3,1.5", ...] 展开为配置字典列表（笛卡尔积）"""
+    names = []
+    choices = []
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        name = name.strip().upper()
+        if name not in TUNABLE_PARAMS:
+            raise ValueError(f"不支持扫描的参数: {name}（可选: {', '.join(TUNABLE_PARAMS)}）")
+        try:
+            parsed = [json.loads(value) for value in values.split(",") if value.strip()]
+        except ValueError:
+            raise ValueError(f"参数值必须是数字: {spec}")
+        if not parsed or not all(isinstance(value, (int, float)) for value in parsed):
+            raise ValueError(f"参数值必须是数字: {spec}")
+        names.append(name)
+        choices.append(parsed)
+    return [dict(zip(names, combination)) for combination in itertools.product(*choices)]
+
+
+def run_sweep(configurations, learners=1000, days=365, cards=300,
+              questions_per_day=None, difficulties=None, workers=None, seed=0):
+    """对每种配置模拟 learners 名学习者，返回每种配置的报告列表
+
+    同一个 seed 下各配置使用相同的学习者和题库，便于直接比较。
+    """
+    questions_per_day = questions_per_day or config.DEFAULT_SESSION_QUESTIONS
+    configurations = configurations or [{}]
+    seeds = [seed * 1_000_003 + i for i in range(learners)]
+    batches = [seeds[i:i + LEARNERS_PER_TASK] for i in range(0, len(seeds), LEARNERS_PER_TASK)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [[pool.submit(_run_batch, overrides, batch, difficulties, cards, days, questions_per_day)
+                    for batch in batches] for overrides in configurations]
+        reports = []
+        for overrides, batch_futures in zip(configurations, futures):
+            totals = {}
+            for future in batch_futures:
+                for key, value in future.result().items():
+                    totals[key] = totals.get(key, 0) + value
+            reports.append(_report(overrides, totals, days))
+    elapsed = time.perf_counter() - start
+    return reports, elapsed
+
+
+def _report(overrides, totals, days):
+    learner_days = totals["learners"] * days
+    return {
+        "params": overrides,
+        "learners": totals["learners"],
+        "reviews_per_day": totals["reviews"] / learner_days,
+        "due_backlog_per_day": totals["due_backlog"] / learner_days,
+        "minutes_per_day": totals["study_seconds"] / 60 / learner_days,
+        "accuracy": totals["correct"] / totals["reviews"] if totals["reviews"] else 0,
+        "retention": totals["repeat_correct"] / totals["repeat_reviews"] if totals["repeat_reviews"] else 0,
+        "knowledge": totals["knowledge"] / totals["studied"] if totals["studied"] else 0,
+        "studied": totals["studied"] / totals["learners"],
+        "mean_interval": totals["interval_sum"] / totals["studied"] if totals["studied"] else 0,
+    }
+
+
+def print_reports(reports, elapsed, days):
+    """打印各配置的对比表"""
+    learner_years = sum(report["learners"] for report in reports) * days / 365
+    print(f"模拟 {learner_years:.0f} 学习者年，用时 {elapsed:.1f} 秒\n")
+    header = f"{'配置':<40} {'复习/天':>8} {'积压/天':>8} {'分钟/天':>8} {'正确率':>7} {'保持率':>7} {'掌握度':>7} {'已学':>7} {'平均间隔':>8}"
+    print(header)
+    print("-" * len(header))
+    for report in reports:
+        label = ", ".join(f"{name}={value}" for name, value in report["params"].items()) or "当前配置"
+        print(f"{label:<40} {report['reviews_per_day']:>8.1f} {report['due_backlog_per_day']:>8.1f} "
+              f"{report['minutes_per_day']:>8.1f} {report['accuracy'] * 100:>6.1f}% "
+              f"{report['retention'] * 100:>6.1f}% {report['knowledge'] * 100:>6.1f}% "
+              f"{report['studied']:>7.0f} {report['mean_interval']:>8.1f}")
+    print("\n积压: 每次会话开始时已到期的问题数；保持率: 复习已学过的问题时的正确率；"
+          "掌握度: 模拟结束时已学问题的平均回忆概率")
+
+
+def simulate_main(args):
+    """simulate 子命令的入口"""
+    try:
+        configurations = parse_sweep(args.param)
+    except ValueError as e:
+        print(e)
+        return
+
+    difficulties = None
+    if args.history:
+        from data_handler import profile_stats_file
+        from history_log import HistoryLog, history_dir_for
+        directory = history_dir_for(profile_stats_file(config.STATS_FILE, args.user))
+        if not os.path.isdir(directory):
+            print(f"找不到作答历史: {directory}")
+            return
+        difficulties = difficulties_from_history(HistoryLog(directory))
+        if not difficulties:
+            print("作答历史为空，无法拟合学习者")
+            return
+        print(f"根据作答历史拟合了 {len(difficulties)} 个问题的难度")
+
+    reports, elapsed = run_sweep(configurations, args.learners, args.days, args.cards,
+                                 args.questions, difficulties, args.workers, args.seed)
+    print_reports(reports, elapsed, args.days)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入: {args.json}")
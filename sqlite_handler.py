@@ -0,0 +1,370 @@
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from datetime import datetime
+
+import config
+import profiling
+from data_handler import DataHandler, apply_journal, is_lazy_deck, journal_path, profile_stats_file
+
+STATS_COLUMNS = (
+    "total_attempts",
+    "correct_attempts",
+    "wrong_attempts",
+    "avg_time",
+    "last_review",
+    "next_review",
+    "interval",
+    "ease_factor",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    source_key TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS events (
+    source_key TEXT NOT NULL,
+    event TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    PRIMARY KEY (source_key, event)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS stats (
+    user TEXT NOT NULL,
+    source_key TEXT NOT NULL,
+    question TEXT NOT NULL,
+    total_attempts INTEGER NOT NULL,
+    correct_attempts INTEGER NOT NULL,
+    wrong_attempts INTEGER NOT NULL,
+    avg_time REAL NOT NULL,
+    last_review TEXT NOT NULL,
+    next_review TEXT NOT NULL,
+    interval REAL NOT NULL,
+    ease_factor REAL NOT NULL,
+    PRIMARY KEY (user, source_key, question)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_stats_next_review ON stats (user, source_key, next_review);
+"""
+
+
+def connect(db_file):
+    """打开SQLite数据库，启用WAL模式并建表"""
+    conn = sqlite3.connect(db_file, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class SQLiteEventMap(MutableMapping):
+    """按题库划分的事件表，提供与 dict 相同的访问方式"""
+
+    def __init__(self, conn, source_key):
+        self.conn = conn
+        self.source_key = source_key
+
+    def __getitem__(self, event):
+        row = self.conn.execute(
+            "SELECT answer FROM events WHERE source_key = ? AND event = ?",
+            (self.source_key, event)).fetchone()
+        if row is None:
+            raise KeyError(event)
+        return row[0]
+
+    def __setitem__(self, event, answer):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO events (source_key, event, answer) VALUES (?, ?, ?)",
+            (self.source_key, event, answer))
+
+    def __delitem__(self, event):
+        cursor = self.conn.execute(
+            "DELETE FROM events WHERE source_key = ? AND event = ?",
+            (self.source_key, event))
+        if cursor.rowcount == 0:
+            raise KeyError(event)
+
+    def __contains__(self, event):
+        return self.conn.execute(
+            "SELECT 1 FROM events WHERE source_key = ? AND event = ?",
+            (self.source_key, event)).fetchone() is not None
+
+    def __iter__(self):
+        cursor = self.conn.execute(
+            "SELECT event FROM events WHERE source_key = ?", (self.source_key,))
+        for (event,) in cursor:
+            yield event
+
+    def __len__(self):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM events WHERE source_key = ?",
+            (self.source_key,)).fetchone()[0]
+
+    def items(self):
+        return list(self.conn.execute(
+            "SELECT event, answer FROM events WHERE source_key = ?", (self.source_key,)))
+
+    def values(self):
+        return [answer for _, answer in self.items()]
+
+
+class SQLiteStatsMap(MutableMapping):
+    """按学习者和题库划分的统计表
+
+    读取时返回普通 dict，并缓存最近取出的至多 cache_size 个条目，使调用方原地
+    修改后可以通过 commit() 写回数据库。缓存同时记住每个条目最后写入或读出时的
+    内容，只有改过的条目才会写回；改过的条目被挤出缓存前先写回。
+    """
+
+    def __init__(self, conn, source_key, user="", cache_size=None):
+        self.conn = conn
+        self.source_key = source_key
+        self.user = user
+        self.cache_size = cache_size or config.SQLITE_STATS_CACHE
+        self._live = OrderedDict()   # question -> [stats dict, row as last stored]
+
+    def _row(self, stats):
+        return tuple(stats[column] for column in STATS_COLUMNS)
+
+    def _cache(self, question, stats, stored):
+        self._live[question] = [stats, stored]
+        self._live.move_to_end(question)
+        while len(self._live) > self.cache_size:
+            evicted, (evicted_stats, evicted_row) = self._live.popitem(last=False)
+            if self._row(evicted_stats) != evicted_row:
+                self._write(evicted, evicted_stats)
+
+    def __getitem__(self, question):
+        entry = self._live.get(question)
+        if entry is not None:
+            self._live.move_to_end(question)
+            return entry[0]
+        row = self.conn.execute(
+            f"SELECT {', '.join(STATS_COLUMNS)} FROM stats WHERE user = ? AND source_key = ? AND question = ?",
+            (self.user, self.source_key, question)).fetchone()
+        if row is None:
+            raise KeyError(question)
+        stats = dict(zip(STATS_COLUMNS, row))
+        self._cache(question, stats, tuple(row))
+        return stats
+
+    def __setitem__(self, question, stats):
+        self._cache(question, stats, None)
+        self.commit(question)
+
+    def __delitem__(self, question):
+        self._live.pop(question, None)
+        cursor = self.conn.execute(
+            "DELETE FROM stats WHERE user = ? AND source_key = ? AND question = ?",
+            (self.user, self.source_key, question))
+        if cursor.rowcount == 0:
+            raise KeyError(question)
+
+    def __contains__(self, question):
+        if question in self._live:
+            return True
+        return self.conn.execute(
+            "SELECT 1 FROM stats WHERE user = ? AND source_key = ? AND question = ?",
+            (self.user, self.source_key, question)).fetchone() is not None
+
+    def __iter__(self):
+        cursor = self.conn.execute(
+            "SELECT question FROM stats WHERE user = ? AND source_key = ?",
+            (self.user, self.source_key))
+        for (question,) in cursor:
+            yield question
+
+    def __len__(self):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM stats WHERE user = ? AND source_key = ?",
+            (self.user, self.source_key)).fetchone()[0]
+
+    def _write(self, question, stats):
+        row = self._row(stats)
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO stats (user, source_key, question, {', '.join(STATS_COLUMNS)}) "
+            f"VALUES (?, ?, ?, {', '.join('?' for _ in STATS_COLUMNS)})",
+            (self.user, self.source_key, question) + row)
+        return row
+
+    def commit(self, question):
+        """把缓存中的条目写回数据库；条目已被挤出缓存时在挤出时已写回"""
+        entry = self._live.get(question)
+        if entry is not None:
+            entry[1] = self._write(question, entry[0])
+
+    def commit_all(self):
+        """只写回缓存中改过的条目"""
+        for question, entry in list(self._live.items()):
+            if self._row(entry[0]) != entry[1]:
+                entry[1] = self._write(question, entry[0])
+
+
+class SQLiteDataHandler(DataHandler):
+    """以SQLite文件为存储后端的数据处理器，接口与 DataHandler 保持一致"""
+    
+    supports_snapshot = False
+
+    def __init__(self, data_file="history_events.json", stats_file="user_stats.json", db_file=None, user=None):
+        self.db_file = db_file or config.SQLITE_FILE
+        self.conn = connect(self.db_file)
+        super().__init__(data_file, stats_file, user)
+        # 统计数据直接写入数据库，不需要追加日志
+        self.journal_enabled = False
+
+    @profiling.timed("load_data")
+    def load_data(self):
+        """从数据库加载题库，首次打开时从JSON题库迁移"""
+        registered = self.conn.execute(
+            "SELECT 1 FROM decks WHERE source_key = ?", (self.source_key,)).fetchone()
+        if registered is None and os.path.exists(self.data_file):
+            migrate_deck(self.conn, self.data_file, self.stats_file, self.user)
+        self.events = SQLiteEventMap(self.conn, self.source_key)
+
+    def save_data(self):
+        """提交题库修改"""
+        try:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO decks (source_key) VALUES (?)", (self.source_key,))
+            self.conn.commit()
+        except Exception as e:
+            print(f"保存数据时出错: {e}")
+
+    @profiling.timed("load_stats")
+    def load_stats(self):
+        """统计数据按需从数据库读取"""
+        self.user_stats = SQLiteStatsMap(self.conn, self.source_key, self.user or "")
+
+    @profiling.timed("save_stats")
+    def save_stats(self):
+        """提交所有已修改的统计数据"""
+        with self._lock:
+            try:
+                self.user_stats.commit_all()
+                self.conn.commit()
+            except Exception as e:
+                print(f"保存统计数据时出错: {e}")
+
+    @profiling.timed("write_question_stats")
+    def _write_question_stats(self, questions):
+        """只写回指定问题的统计行"""
+        with self._lock:
+            try:
+                for question in questions:
+                    self.user_stats.commit(question)
+                self.conn.commit()
+            except Exception as e:
+                print(f"保存统计数据时出错: {e}")
+
+    def close(self):
+        """提交并关闭数据库连接"""
+        self.stop_write_behind()
+        self.flush()
+        self.save_stats()
+        self.conn.close()
+
+    def query_due_questions(self, now, limit):
+        """通过索引查询待复习问题：已到期的和未学习的（后者至少占 NEW_QUESTION_SHARE），
+        不足时补充错误率高的"""
+        unstudied = [row[0] for row in self.conn.execute(
+            "SELECT e.event FROM events e LEFT JOIN stats s "
+            "ON s.user = ? AND s.source_key = e.source_key AND s.question = e.event "
+            "WHERE e.source_key = ? AND s.question IS NULL LIMIT ?",
+            (self.user_stats.user, self.source_key, limit))]
+        reserved = min(len(unstudied), int(limit * config.NEW_QUESTION_SHARE))
+        due_questions = [row[0] for row in self.conn.execute(
+            "SELECT s.question FROM stats s JOIN events e "
+            "ON e.source_key = s.source_key AND e.event = s.question "
+            "WHERE s.user = ? AND s.source_key = ? AND s.next_review <= ? "
+            "ORDER BY s.next_review LIMIT ?",
+            (self.user_stats.user, self.source_key, now.isoformat(), limit - reserved))]
+        due_questions.extend(unstudied[:limit - len(due_questions)])
+
+        if len(due_questions) < limit:
+            chosen = set(due_questions)
+            for (question,) in self.conn.execute(
+                    "SELECT s.question FROM stats s JOIN events e "
+                    "ON e.source_key = s.source_key AND e.event = s.question "
+                    "WHERE s.user = ? AND s.source_key = ? AND s.next_review > ? "
+                    "ORDER BY CAST(s.wrong_attempts AS REAL) / MAX(s.total_attempts, 1) DESC, "
+                    "s.avg_time DESC LIMIT ?",
+                    (self.user_stats.user, self.source_key, now.isoformat(), limit)):
+                if question not in chosen and len(due_questions) < limit:
+                    due_questions.append(question)
+
+        return due_questions
+
+    def get_stats_summary(self, until):
+        """用聚合查询统计已学习数、答题次数和截至 until 的待复习数"""
+        studied, total_attempts, correct_attempts, due = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(s.total_attempts), 0), "
+            "COALESCE(SUM(s.correct_attempts), 0), "
+            "COALESCE(SUM(s.next_review <= ?), 0) "
+            "FROM stats s JOIN events e "
+            "ON e.source_key = s.source_key AND e.event = s.question "
+            "WHERE s.user = ? AND s.source_key = ?",
+            (until.isoformat(), self.user_stats.user, self.source_key)).fetchone()
+        return {
+            "total_events": len(self.events),
+            "studied_events": studied,
+            "total_attempts": total_attempts,
+            "correct_attempts": correct_attempts,
+            "due": due,
+        }
+
+
+def read_json_deck(data_file, stats_file, user=None):
+    """以只读方式读取JSON后端的题库和（学习者 user 的）统计数据，返回 (events, deck_stats)
+
+    尚未合并到统计文件的日志记录也会读出。不创建示例题库、锁文件或快照，也不截断日志。
+    """
+    source_key = os.path.basename(data_file)
+    if is_lazy_deck(data_file):
+        from jsonl_deck import read_events
+        events = read_events(data_file)
+    else:
+        with open(data_file, 'r', encoding='utf-8') as f:
+            events = json.load(f)
+
+    stats_file = profile_stats_file(stats_file, user)
+    deck_stats = {}
+    if os.path.exists(stats_file):
+        with open(stats_file, 'r', encoding='utf-8') as f:
+            deck_stats = json.load(f).get(source_key, {})
+    apply_journal(journal_path(stats_file, source_key), deck_stats, truncate=False)
+    return events, deck_stats
+
+
+def migrate_deck(conn, data_file, stats_file, user=None):
+    """把一个JSON题库及其在（学习者 user 的）统计文件中的数据导入数据库"""
+    source_key = os.path.basename(data_file)
+    events, deck_stats = read_json_deck(data_file, stats_file, user)
+
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO decks (source_key) VALUES (?)", (source_key,))
+        conn.executemany(
+            "INSERT OR REPLACE INTO events (source_key, event, answer) VALUES (?, ?, ?)",
+            ((source_key, event, answer) for event, answer in events.items()))
+        now = datetime.now().isoformat()
+        conn.executemany(
+            f"INSERT OR REPLACE INTO stats (user, source_key, question, {', '.join(STATS_COLUMNS)}) "
+            f"VALUES (?, ?, ?, {', '.join('?' for _ in STATS_COLUMNS)})",
+            ((user or "", source_key, question) + tuple(
+                stats.get(column, now if column.endswith("review") else 0)
+                for column in STATS_COLUMNS)
+             for question, stats in deck_stats.items()))
+    return len(events), len(deck_stats)
+
+
+def migrate_json_to_sqlite(data_files, stats_file, db_file, user=None):
+    """一次性把现有的 JSON 题库和统计文件迁移到SQLite数据库"""
+    conn = connect(db_file)
+    try:
+        for data_file in data_files:
+            try:
+                num_events, num_stats = migrate_deck(conn, data_file, stats_file, user)
+                print(f"已迁移 {data_file}: {num_events} 个事件, {num_stats} 条统计")
+            except Exception as e:
+                print(f"迁移 {data_file} 时出错: {e}")
+    finally:
+        conn.close()
@@ -0,0 +1,219 @@
+"""终端界面：进程内的屏幕缓冲区，用 ANSI 控制序列重绘
+
+每一屏先写入缓冲区，再连同提示一次写出，不再为清屏启动子进程。答题用时从
+提示真正写到终端后开始，用 time.perf_counter() 计时；用户作答期间由后台线程
+准备下一道题。
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import profiling
+from quiz import Quiz
+
+CLEAR = "\x1b[H\x1b[2J"   # 光标移到左上角并清屏
+STATS_REFRESH = 60        # 没有数据变化时统计信息最长缓存多少秒（待复习数随时间变化）
+
+
+class Screen:
+    """一屏内容的缓冲区
+
+    输出不是终端（如重定向到文件）时不写控制序列，只用空行分隔各屏。
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.ansi = self.stream.isatty()
+        self._lines = []
+
+    def clear(self):
+        self._lines.clear()
+
+    def add(self, text=""):
+        self._lines.append(text)
+
+    def extend(self, lines):
+        self._lines.extend(lines)
+
+    def show(self, prompt=""):
+        """一次写出缓冲区和提示，返回提示显示完毕时的 perf_counter 时间"""
+        frame = (CLEAR if self.ansi else "\n") + "\n".join(self._lines) + "\n" + prompt
+        self.stream.write(frame)
+        self.stream.flush()
+        profiling.count("screen_redraws")
+        return time.perf_counter()
+
+    def ask(self, prompt):
+        """重绘整屏并读取一行输入"""
+        self.show(prompt)
+        return input()
+
+
+class StatsPanel:
+    """主菜单统计信息的缓存
+
+    作为 DataHandler 的监听对象，统计数据或题库变化时才重新生成，菜单重绘只是
+    取出缓存的文本。
+    """
+
+    def __init__(self, data_handler, dashboard, render):
+        self.data_handler = data_handler
+        self.dashboard = dashboard
+        self.render = render   # print_stats(data_handler, dashboard)
+        self._lines = None
+        self._rendered_at = 0.0
+        data_handler.add_listener(self)
+
+    def close(self):
+        self.data_handler.remove_listener(self)
+
+    def invalidate(self, *args):
+        self._lines = None
+
+    on_stats_updated = on_event_added = on_event_removed = on_events_added = invalidate
+
+    def lines(self):
+        now = time.monotonic()
+        if self._lines is None or now - self._rendered_at > STATS_REFRESH:
+            buffer = io.StringIO()
+            with contextlib.redirect_stdout(buffer):
+                self.render(self.data_handler, self.dashboard)
+            self._lines = buffer.getvalue().rstrip("\n").split("\n")
+            self._rendered_at = now
+        return self._lines
+
+
+class TerminalSession:
+    """在 Screen 上进行一次背诵会话
+
+    题目与 Quiz.start_session 相同：到期的问题依次提问，答错的题目稍后再问一次。
+    题目在轮到它之前由后台线程生成，上一题的结果显示在下一题的上方，不必再按回车。
+    也可以按预先安排好的计划提问（如跨题库复习），每道题记录到它所属的 Quiz。
+    """
+
+    def __init__(self, screen, quiz=None):
+        self.screen = screen
+        self.quiz = quiz
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._prefetched = None   # (plan entry, future)
+
+    def _prepare(self, entry, question_type):
+        # 计划中是尚未生成的问题名称，或已生成、答错后重新排入的题目
+        if isinstance(entry, dict):
+            return entry
+        return self.quiz.prepare_question(entry, self.quiz.data_handler.get_all_events()[entry], question_type)
+
+    def _next_item(self, plan, question_type):
+        entry = plan.popleft()
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched is not None and prefetched[0] is entry:
+            return prefetched[1].result()
+        return self._prepare(entry, question_type)
+
+    def _prefetch(self, plan, question_type):
+        # 答错重新排入的题目不会插到队首，因此预先生成的队首题目总是下一道题
+        if plan:
+            entry = plan[0]
+            self._prefetched = (entry, self._executor.submit(self._prepare, entry, question_type))
+
+    def _render(self, item, number, total, feedback, deck=None):
+        screen = self.screen
+        screen.clear()
+        screen.add(f"{config.APP_NAME}  第 {number}/{total} 题  (Ctrl+C 结束会话)")
+        screen.add("=" * 50)
+        screen.extend(feedback)
+        if deck is not None:
+            screen.add(f"[题库: {deck}]")
+        screen.add(item["quiz_data"]["question"])
+        if item["type"] == "multiple_choice":
+            for i, option in enumerate(item["quiz_data"]["options"]):
+                screen.add(f"{chr(65 + i)}. {option}")
+
+    def _read_answer(self, item):
+        """显示提示并读取答案，返回 (答案, 从提示显示到作答完成的秒数)"""
+        if item["type"] == "multiple_choice":
+            valid_inputs = [chr(65 + i) for i in range(len(item["quiz_data"]["options"]))]
+            prompt = f"\n请选择 ({'/'.join(valid_inputs)}): "
+        else:
+            valid_inputs = None
+            prompt = "\n请输入答案: "
+        shown_at = self.screen.show(prompt)
+        while True:
+            user_input = input()
+            if valid_inputs is None or user_input.strip().upper() in valid_inputs:
+                return user_input, time.perf_counter() - shown_at
+            self.screen.stream.write(prompt.lstrip("\n"))
+            self.screen.stream.flush()
+
+    def _ask(self, quiz, item, session):
+        """提问一道题并记录结果，返回 (是否正确, 下一屏顶部的反馈)"""
+        user_input, time_taken = self._read_answer(item)
+        is_correct = quiz.grade_answer(item, user_input)
+        result = quiz.record_answer(item, is_correct, time_taken, session)
+        next_review = result["next_review"].strftime("%Y-%m-%d %H:%M")
+        if is_correct:
+            return True, [f"✓ 上一题回答正确！（{time_taken:.1f} 秒）下次复习时间: {next_review}", ""]
+        return False, [f"✗ 上一题回答错误！正确答案是: {item['answer']}  下次复习时间: {next_review}", ""]
+
+    def run(self, num_questions=10, question_type="random", plan=None):
+        """进行会话并返回会话数据
+
+        plan 为预先安排好的 (Quiz, 题目, 题库路径) 序列时按顺序提问，最多 num_questions 道；
+        答错的题目不再重新排入，也不预先读取下一项（计划可能在取下一项时关闭上一批题库），
+        统计数据的落盘和会话总结由调用方负责。输入结束（EOF）时结束会话后重新抛出 EOFError。
+        """
+        num_questions = min(num_questions, config.MAX_SESSION_QUESTIONS)
+        session = Quiz.new_session()
+        if plan is None:
+            self.quiz.current_session = session
+            pending = deque(self.quiz.review_system.get_due_questions(limit=num_questions))
+            total = len(pending)
+        else:
+            plan = iter(plan)
+            total = num_questions
+        feedback = []
+        interrupted = end_of_input = False
+
+        try:
+            if plan is None:
+                while pending and session["questions_asked"] < num_questions:
+                    item = self._next_item(pending, question_type)
+                    self._render(item, session["questions_asked"] + 1, total, feedback)
+                    self._prefetch(pending, question_type)
+                    is_correct, feedback = self._ask(self.quiz, item, session)
+                    planned = len(pending)
+                    self.quiz.requeue_if_wrong(pending, item, is_correct)
+                    total = min(total + len(pending) - planned, num_questions)
+            else:
+                for quiz, item, path in plan:
+                    self.quiz = quiz
+                    self._render(item, session["questions_asked"] + 1, total, feedback, os.path.basename(path))
+                    _, feedback = self._ask(quiz, item, session)
+                    if session["questions_asked"] >= num_questions:
+                        break
+        except KeyboardInterrupt:
+            interrupted = True
+        except EOFError:
+            # 输入已经结束（如管道读完），不会再有回答，会话结束后退出程序
+            interrupted = end_of_input = True
+        finally:
+            self._prefetched = None
+            self._executor.shutdown(wait=True)
+
+        self.screen.clear()
+        self.screen.extend(feedback)
+        self.screen.show()
+        if interrupted:
+            print("会话已中断。")
+        if not total:
+            print("没有需要复习的问题！")
+        if plan is None:
+            self.quiz.finish_session()
+        if end_of_input:
+            raise EOFError
+        return session
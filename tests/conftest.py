@@ -0,0 +1,39 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    """每个测试在独立的临时目录中运行，题库、统计文件、日志和快照都写在这里"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "WRITE_BEHIND", False)
+    return tmp_path
+
+
+@pytest.fixture
+def write_deck(tmp_path):
+    """把 {事件: 时间} 写成 JSON 题库，返回文件路径"""
+    def write(events, name="deck.json"):
+        path = tmp_path / name
+        path.write_text(json.dumps(events, ensure_ascii=False), encoding="utf-8")
+        return str(path)
+    return write
+
+
+SAMPLE = {
+    "鸦片战争": "1840 年 - 1842 年",
+    "太平天国运动": "1851 年 - 1864 年",
+    "甲午中日战争": "1894 年 - 1895 年",
+    "戊戌变法": "1898 年",
+    "武昌起义": "1911 年",
+    "五四运动爆发": "1919 年",
+    "九一八事变": "1931 年",
+    "新中国成立": "1949 年",
+}
@@ -0,0 +1,75 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from data_handler import DataHandler
+from review_system import ReviewSystem
+
+np = pytest.importorskip("numpy")
+from batch_scheduler import BatchScheduler, from_epoch, to_epoch, verify_against_scalar  # noqa: E402
+
+EVENTS = {f"事件{i}": f"{1000 + i} 年" for i in range(50)}
+NOW = datetime(2030, 6, 1, 12, 0)
+
+
+def studied_deck(write_deck):
+    data_handler = DataHandler(write_deck(EVENTS), "stats.json")
+    data_handler.clock = lambda: NOW
+    review_system = ReviewSystem(data_handler)
+    rng = random.Random(3)
+    for question in EVENTS:
+        for _ in range(rng.randint(1, 4)):
+            data_handler.update_question_stats(question, True, 2.0, commit=False)
+            review_system.calculate_next_review(question, rng.randint(0, 5))
+    return data_handler
+
+
+def test_vectorized_sm2_matches_the_scalar_update():
+    rng = random.Random(0)
+    interval = [rng.choice([1, 2, 6, 15.0, 37.5, 90.2]) for _ in range(2000)]
+    ease_factor = [round(rng.uniform(1.1, 3.0), 2) for _ in range(2000)]
+    performance = [rng.randint(0, 5) for _ in range(2000)]
+    assert verify_against_scalar(interval, ease_factor, performance) < 1e-9
+
+
+def test_epoch_round_trip():
+    assert from_epoch(to_epoch("2030-06-01T12:00:00.500000")) == datetime(2030, 6, 1, 12, 0, 0, 500000)
+
+
+def test_batch_reviews_match_per_question_reviews(write_deck):
+    data_handler = studied_deck(write_deck)
+    scheduler = BatchScheduler(data_handler)
+    later = NOW + timedelta(days=3)
+    scheduler.apply_reviews(4, now=later)
+
+    expected = {}
+    review_system = ReviewSystem(data_handler, clock=lambda: later)
+    for question in scheduler.questions:
+        review_system.calculate_next_review(question, 4)
+        stats = data_handler.get_question_stats(question)
+        expected[question] = (stats["interval"], stats["ease_factor"], stats["next_review"])
+
+    scheduler.write_back()
+    reloaded = DataHandler(data_handler.data_file, "stats.json")
+    for question, (interval, ease_factor, next_review) in expected.items():
+        stats = reloaded.get_question_stats(question)
+        assert stats["interval"] == pytest.approx(interval)
+        assert stats["ease_factor"] == pytest.approx(ease_factor)
+        assert stats["next_review"] == next_review
+    reloaded.close()
+    data_handler.close()
+
+
+def test_shift_and_forecast(write_deck):
+    data_handler = studied_deck(write_deck)
+    scheduler = BatchScheduler(data_handler)
+    before = scheduler.due_histogram(days=400, now=NOW)
+    assert before.sum() == len(EVENTS)
+
+    scheduler.shift(7)
+    after = scheduler.due_histogram(days=400, now=NOW)
+    assert after.sum() == len(EVENTS)
+    assert list(after[7:]) == list(before[:len(before) - 7])
+    assert not after[:7].any()
+    data_handler.close()
@@ -0,0 +1,27 @@
+import json
+import os
+
+from benchmarks import compare, run
+from benchmarks.synthetic import generate_events, write_fixture
+from date_parser import parse_year_range
+
+
+def test_synthetic_decks_are_deterministic(tmp_path):
+    events = generate_events(200, seed=5)
+    assert events == generate_events(200, seed=5)
+    assert all(parse_year_range(answer) is not None for answer in events.values())
+
+    data_file, stats_file = write_fixture(str(tmp_path), 200, other_decks=2, seed=5)
+    with open(stats_file, encoding="utf-8") as f:
+        all_stats = json.load(f)
+    assert len(all_stats) == 3 and set(all_stats[os.path.basename(data_file)]) <= set(events)
+
+
+def test_small_run_and_self_comparison(capsys):
+    report = run.run(sizes=(100,), repeat=1, session_questions=5)
+    (result,) = report["results"]
+    assert result["size"] == 100 and result["operations"]
+    assert json.loads(json.dumps(report)) == report
+
+    rows = compare.compare(report, report)
+    assert rows and not any(regressed for *_, regressed in rows)
@@ -0,0 +1,89 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import config
+from compact_stats import StatsRecord, StatsStore, json_default
+from conftest import SAMPLE
+from data_handler import DataHandler
+from review_system import ReviewSystem
+
+STATS = {"total_attempts": 3, "correct_attempts": 2, "wrong_attempts": 1, "avg_time": 4.5,
+         "last_review": "2030-01-02T03:04:05", "next_review": "2030-01-08T03:04:05",
+         "interval": 6, "ease_factor": 2.36}
+
+
+def test_record_reads_and_writes_like_a_dict():
+    record = StatsRecord.from_dict(STATS)
+    assert dict(record) == STATS == record.to_dict()
+    record["next_review"] = "2030-02-01T00:00:00"
+    record["total_attempts"] += 1
+    assert record["next_review"] == "2030-02-01T00:00:00"
+    assert record.next_review_ts == int(record.next_review_ts)
+    assert record["total_attempts"] == 4
+    with pytest.raises(KeyError):
+        record["unknown"]
+
+
+def test_store_interns_questions():
+    store = StatsStore({"甲": STATS, "乙": STATS})
+    question_id = store.intern("甲")
+    assert store.name_of(question_id) == "甲" and store.record_by_id(question_id) is store["甲"]
+    del store["甲"]
+    assert "甲" not in store and len(store) == 1 and list(store) == ["乙"]
+    store["甲"] = STATS
+    assert store.intern("甲") == question_id
+    assert json.loads(json.dumps(store, default=json_default)) == {"乙": STATS, "甲": STATS}
+
+
+@pytest.mark.parametrize("compact", [True, False])
+def test_stats_files_are_the_same_with_either_representation(write_deck, monkeypatch, compact):
+    monkeypatch.setattr(config, "COMPACT_STATS", compact)
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    data_handler.clock = lambda: datetime(2030, 1, 2, 3, 4, 5)
+    review_system = ReviewSystem(data_handler)
+    for question in ("戊戌变法", "武昌起义"):
+        data_handler.update_question_stats(question, question == "戊戌变法", 3.0, commit=False)
+        review_system.calculate_next_review(question, 5 if question == "戊戌变法" else 2)
+    assert isinstance(data_handler.get_all_stats(), StatsStore) == compact
+    data_handler.close()
+
+    with open("stats.json", encoding="utf-8") as f:
+        saved = json.load(f)["deck.json"]
+    assert saved["戊戌变法"]["last_review"] == "2030-01-02T03:04:05"
+    assert saved["戊戌变法"]["interval"] == config.INTERVAL_AFTER_FIRST
+    assert saved["武昌起义"]["wrong_attempts"] == 1
+
+
+def test_record_keeps_unknown_keys():
+    record = StatsRecord.from_dict(dict(STATS, note="x"))
+    assert record["note"] == "x" and record.to_dict() == dict(STATS, note="x")
+    assert len(record) == len(STATS) + 1
+    del record["note"]
+    assert record.to_dict() == STATS
+    with pytest.raises(TypeError):
+        del record["interval"]
+
+
+def test_stats_file_with_unknown_keys_loads_and_round_trips(write_deck, monkeypatch):
+    monkeypatch.setattr(config, "DECK_SNAPSHOT", False)
+    with open("stats.json", "w", encoding="utf-8") as f:
+        json.dump({"deck.json": {"戊戌变法": dict(STATS, note="x")}}, f)
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    assert data_handler.get_question_stats("戊戌变法")["note"] == "x"
+    data_handler.update_question_stats("戊戌变法", True, 2.0)
+    data_handler.close()
+
+    with open("stats.json", encoding="utf-8") as f:
+        saved = json.load(f)["deck.json"]["戊戌变法"]
+    assert saved["note"] == "x" and saved["total_attempts"] == 4
+
+
+def test_malformed_stats_entry_does_not_crash_startup(write_deck, capsys):
+    with open("stats.json", "w", encoding="utf-8") as f:
+        json.dump({"deck.json": {"戊戌变法": dict(STATS, next_review=None)}}, f)
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    assert "加载统计数据时出错" in capsys.readouterr().out
+    assert isinstance(data_handler.get_all_stats(), StatsStore)
+    data_handler.close()
@@ -0,0 +1,98 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from cross_deck import CrossDeckQueue, DueItemsHandler, iter_due_items, study_all_due
+from data_handler import DataHandler
+from deck_manager import DeckManager
+
+
+def stats_due(days_ago, interval=1):
+    moment = (datetime.now() - timedelta(days=days_ago)).isoformat()
+    return {"total_attempts": 1, "correct_attempts": 1, "wrong_attempts": 0, "avg_time": 2.0,
+            "last_review": moment, "next_review": moment, "interval": interval, "ease_factor": 2.5}
+
+
+@pytest.fixture
+def decks(write_deck, tmp_path):
+    write_deck({"鸦片战争": "1840 年", "戊戌变法": "1898 年", "辛亥革命": "1911 年"}, "a.json")
+    write_deck({"秦统一六国": "前221年", "汉朝建立": "前202年"}, "b.json")
+    write_deck({"唐朝建立": "618 年"}, "c.json")
+    not_due = stats_due(-10)
+    (tmp_path / "user_stats.json").write_text(json.dumps({
+        "a.json": {"鸦片战争": stats_due(1), "戊戌变法": stats_due(5), "辛亥革命": not_due},
+        "b.json": {"秦统一六国": stats_due(3), "已删除的事件": stats_due(9)},
+        "c.json": {"唐朝建立": not_due},
+    }, ensure_ascii=False), encoding="utf-8")
+    return tmp_path
+
+
+def test_queue_orders_by_overdueness(decks):
+    queue = CrossDeckQueue(DeckManager("user_stats.json"), str(decks))
+    assert len(queue) == 4
+    assert queue.deck_count == 2
+    batch = queue.pop_batch(3)
+    assert [(path.rsplit("/", 1)[-1], questions) for path, questions in batch] == [
+        ("b.json", ["已删除的事件", "秦统一六国"]), ("a.json", ["戊戌变法"])]
+
+
+def test_due_items_are_answered_without_opening_decks(decks):
+    deck_manager = DeckManager("user_stats.json")
+    queue = CrossDeckQueue(deck_manager, str(decks))
+    answered = []
+    for quiz, item, path in iter_due_items(deck_manager, queue, 10, "fill_blank"):
+        assert isinstance(quiz.data_handler, DueItemsHandler)
+        assert set(quiz.data_handler.get_all_events()) <= {"鸦片战争", "戊戌变法", "秦统一六国"}
+        quiz.record_answer(item, True, 1.0)
+        answered.append(item["question"])
+    # 已删除的事件被跳过，没有任何题库被 DeckManager 完整加载
+    assert answered == ["秦统一六国", "戊戌变法", "鸦片战争"]
+    assert deck_manager.cached(str(decks / "a.json")) is None
+
+    # 正常打开题库时能看到答题结果，未到期的问题统计不变，题库文件没有被改写
+    data_handler = DataHandler(str(decks / "a.json"), "user_stats.json")
+    assert data_handler.get_question_stats("戊戌变法")["total_attempts"] == 2
+    assert data_handler.get_question_stats("辛亥革命")["total_attempts"] == 1
+    assert len(data_handler.get_all_events()) == 3
+    data_handler.close()
+    with open(decks / "b.json", encoding="utf-8") as f:
+        assert json.load(f) == {"秦统一六国": "前221年", "汉朝建立": "前202年"}
+
+
+def test_cached_deck_is_reused(decks):
+    deck_manager = DeckManager("user_stats.json")
+    deck = deck_manager.open(str(decks / "a.json"))
+    queue = CrossDeckQueue(deck_manager, str(decks))
+    quizzes = {path.rsplit("/", 1)[-1]: quiz for quiz, _, path in iter_due_items(deck_manager, queue, 10)}
+    assert quizzes["a.json"] is deck.quiz
+    assert isinstance(quizzes["b.json"].data_handler, DueItemsHandler)
+    deck_manager.close()
+
+
+def test_compaction_keeps_stats_of_questions_not_loaded(decks, monkeypatch):
+    import config
+    monkeypatch.setattr(config, "JOURNAL_COMPACT_THRESHOLD", 1)
+    deck_manager = DeckManager("user_stats.json")
+    queue = CrossDeckQueue(deck_manager, str(decks))
+    for quiz, item, _ in iter_due_items(deck_manager, queue, 10, "fill_blank"):
+        quiz.record_answer(item, False, 1.0)
+    with open(decks / "user_stats.json", encoding="utf-8") as f:
+        all_stats = json.load(f)
+    assert set(all_stats["a.json"]) == {"鸦片战争", "戊戌变法", "辛亥革命"}
+    assert all_stats["a.json"]["鸦片战争"]["wrong_attempts"] == 1
+    assert all_stats["a.json"]["辛亥革命"]["wrong_attempts"] == 0
+    assert "已删除的事件" in all_stats["b.json"]
+
+
+def test_study_all_due_returns_immediately_for_zero_questions(decks, monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda prompt="": pytest.fail("should not prompt"))
+    assert study_all_due(DeckManager("user_stats.json"), 0, directory=str(decks)) is None
+    assert study_all_due(DeckManager("user_stats.json"), -3, directory=str(decks)) is None
+
+
+def test_study_all_due_session(decks, monkeypatch):
+    answers = iter(["1840", "", "1898", ""])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+    session = study_all_due(DeckManager("user_stats.json"), 2, "fill_blank", str(decks))
+    assert session["questions_asked"] == 2
@@ -0,0 +1,76 @@
+from datetime import date, datetime, timedelta
+
+from conftest import SAMPLE
+from dashboard import Dashboard
+from data_handler import DataHandler
+from review_system import ReviewSystem
+
+
+def answer(data_handler, review_system, question, is_correct, performance):
+    data_handler.update_question_stats(question, is_correct, 3.0, commit=False)
+    review_system.calculate_next_review(question, performance)
+
+
+def test_incremental_counters_match_full_recomputation(write_deck):
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    review_system = ReviewSystem(data_handler)
+    dashboard = Dashboard(data_handler)
+    today = date.today()
+    assert dashboard.validate(today) == {}
+
+    # 答题：新问题、再次答对、答错
+    answer(data_handler, review_system, "鸦片战争", True, 5)
+    assert dashboard.validate(today) == {}
+    answer(data_handler, review_system, "鸦片战争", True, 4)
+    answer(data_handler, review_system, "戊戌变法", False, 2)
+    answer(data_handler, review_system, "武昌起义", True, 5)
+    assert dashboard.validate(today) == {}
+    assert dashboard.summary(today)["studied_events"] == 3
+
+    # 修改已学习事件的答案、添加新事件
+    data_handler.add_event("鸦片战争", "1840 年")
+    assert dashboard.validate(today) == {}
+    data_handler.add_event("南昌起义", "1927 年")
+    assert dashboard.validate(today) == {}
+
+    # 删除有统计数据的事件后，残留的统计不再计入
+    data_handler.remove_event("戊戌变法")
+    assert dashboard.validate(today) == {}
+    assert dashboard.summary(today)["studied_events"] == 2
+
+    # 批量导入，其中重新加入已删除但仍有统计数据的事件
+    data_handler.add_events({"戊戌变法": "1898 年", "红军长征": "1934 年 - 1936 年"})
+    assert dashboard.validate(today) == {}
+    assert dashboard.summary(today)["studied_events"] == 3
+
+    # 跨天：明天和之后几天到期的问题并入当天的待复习数
+    for offset in (1, 2, 7, 30):
+        day = today + timedelta(days=offset)
+        assert dashboard.validate(day) == {}, offset
+    assert dashboard.summary(today + timedelta(days=30))["due"] == 3
+    data_handler.close()
+
+
+def test_stats_edited_outside_answers_are_tracked(write_deck):
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    review_system = ReviewSystem(data_handler)
+    dashboard = Dashboard(data_handler)
+    answer(data_handler, review_system, "九一八事变", True, 5)
+
+    stats = data_handler.get_question_stats("九一八事变")
+    stats["next_review"] = (datetime.now() + timedelta(days=3)).isoformat()
+    data_handler.notify_stats_updated("九一八事变")
+    assert dashboard.validate() == {}
+    assert dashboard.summary()["due_histogram"][3] == 1
+    data_handler.close()
+
+
+def test_clock_moving_backwards_rebuilds(write_deck):
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    review_system = ReviewSystem(data_handler)
+    dashboard = Dashboard(data_handler)
+    answer(data_handler, review_system, "新中国成立", True, 5)
+    later = date.today() + timedelta(days=5)
+    assert dashboard.validate(later) == {}
+    assert dashboard.validate(date.today()) == {}
+    data_handler.close()
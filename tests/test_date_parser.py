@@ -0,0 +1,53 @@
+import pytest
+
+from conftest import SAMPLE
+from data_handler import DataHandler
+from date_parser import parse_start_year, parse_year_range
+from quiz import Quiz
+from review_system import ReviewSystem
+
+
+@pytest.mark.parametrize("answer, expected", [
+    ("1898", (1898, 1898)),
+    ("1898 年", (1898, 1898)),
+    ("1840 年 - 1842 年", (1840, 1842)),
+    ("1840-42", (1840, 1842)),
+    ("1898-02", (1898, 1902)),
+    ("1840至1842年", (1840, 1842)),
+    ("１８４０年", (1840, 1840)),
+    ("一八四〇年", (1840, 1840)),
+    ("一千八百四十年", (1840, 1840)),
+    ("公元前221年", (-221, -221)),
+    ("前206年 - 公元8年", (-206, 8)),
+    ("1927年8月1日", (1927, 1927)),
+    ("1949-10-01", (1949, 1949)),
+    ("18401842", (1840, 1842)),
+    ("不详", None),
+    ("", None),
+])
+def test_parse_year_range(answer, expected):
+    assert parse_year_range(answer) == expected
+
+
+def test_parse_start_year():
+    assert parse_start_year("1851 年 - 1864 年") == 1851
+    assert parse_start_year("不详") is None
+
+
+def test_fill_blank_grading_uses_the_year_index(write_deck):
+    data_handler = DataHandler(write_deck(dict(SAMPLE, 某事件="不详")), "stats.json")
+    quiz = Quiz(data_handler, ReviewSystem(data_handler))
+
+    def grade(question, user_input):
+        item = quiz.prepare_question(question, data_handler.get_all_events()[question], "fill_blank")
+        return quiz.grade_answer(item, user_input)
+
+    assert grade("鸦片战争", "1840-42")
+    assert grade("鸦片战争", "一八四〇年至一八四二年")
+    assert not grade("鸦片战争", "1840")
+    assert grade("戊戌变法", " １８９８ ")
+    assert not grade("戊戌变法", "1899")
+    # 无法解析为年份的答案按原文比较
+    assert grade("某事件", "不详")
+    assert data_handler.year_ranges["1840 年 - 1842 年"] == (1840, 1842)
+    data_handler.close()
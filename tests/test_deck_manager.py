@@ -0,0 +1,67 @@
+import json
+import os
+
+from conftest import SAMPLE
+from deck_manager import DeckManager, list_deck_files
+
+
+def test_list_deck_files_skips_the_stats_file(write_deck):
+    for name in ("b.json", "a.jsonl", "user_stats.json"):
+        write_deck({}, name)
+    open("notes.txt", "w").close()
+    assert list_deck_files(".") == ["a.jsonl", "b.json"]
+
+
+def test_switching_back_reuses_the_cached_deck(write_deck):
+    write_deck(SAMPLE, "a.json")
+    write_deck(SAMPLE, "b.json")
+    deck_manager = DeckManager("stats.json", capacity=2)
+    first = deck_manager.open("a.json")
+    first.data_handler.update_question_stats("戊戌变法", True, 1.0)
+    deck_manager.open("b.json")
+    assert deck_manager.open("a.json") is first
+    assert deck_manager.cached("b.json") is not None
+    deck_manager.close()
+
+
+def test_least_recently_used_deck_is_closed(write_deck):
+    for name in ("a.json", "b.json", "c.json"):
+        write_deck(SAMPLE, name)
+    deck_manager = DeckManager("stats.json", capacity=2)
+    deck_manager.open("a.json").data_handler.update_question_stats("戊戌变法", True, 1.0)
+    deck_manager.open("b.json")
+    deck_manager.open("c.json")
+    assert deck_manager.cached("a.json") is None
+    # 被淘汰的题库已经把统计数据写回
+    with open("stats.json", encoding="utf-8") as f:
+        assert json.load(f)["a.json"]["戊戌变法"]["total_attempts"] == 1
+    deck_manager.close()
+
+
+def test_externally_modified_deck_is_reloaded(write_deck):
+    write_deck(SAMPLE, "a.json")
+    write_deck(SAMPLE, "b.json")
+    deck_manager = DeckManager("stats.json", capacity=2)
+    first = deck_manager.open("a.json")
+    deck_manager.open("b.json")
+    write_deck(dict(SAMPLE, 新事件="2000 年"), "a.json")
+    os.utime("a.json", ns=(1, 1))
+
+    assert deck_manager.cached("a.json") is None
+    reopened = deck_manager.open("a.json")
+    assert reopened is not first
+    assert reopened.data_handler.get_all_events()["新事件"] == "2000 年"
+    deck_manager.close()
+
+
+def test_prefetch_fills_free_slots_only(write_deck):
+    for name in ("a.json", "b.json", "c.json"):
+        write_deck(SAMPLE, name)
+    deck_manager = DeckManager("stats.json", capacity=2)
+    current = deck_manager.open("a.json")
+    deck_manager.prefetch(["b.json", "c.json"])
+    prefetched = deck_manager.open("b.json")
+    assert deck_manager.cached("a.json") is current
+    assert deck_manager.cached("c.json") is None
+    assert prefetched.data_handler.get_all_events() == SAMPLE
+    deck_manager.close()
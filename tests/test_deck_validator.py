@@ -0,0 +1,90 @@
+import os
+import sqlite3
+
+import config
+from conftest import SAMPLE
+from deck_validator import validate_directory, validation_cache_path
+
+
+def run(directory, **kwargs):
+    results = {}
+    summary = validate_directory(str(directory), "stats.json", workers=1,
+                                 on_result=lambda name, result, cached: results.__setitem__(name, (result, cached)),
+                                 **kwargs)
+    return summary, results
+
+
+def test_results_are_cached_next_to_the_stats_file(tmp_path, write_deck):
+    decks = tmp_path / "decks"
+    decks.mkdir()
+    (decks / "good.json").write_text('{"戊戌变法": "1898 年", "武昌起义": "1911 年"}', encoding="utf-8")
+    (decks / "bad.json").write_text('{"戊戌变法": ', encoding="utf-8")
+
+    summary, results = run(decks)
+    assert (summary["checked"], summary["cached"], summary["errors"]) == (2, 0, 1)
+    assert results["bad.json"][0]["events"] is None
+    # 题库目录中不留下任何文件
+    assert sorted(os.listdir(decks)) == ["bad.json", "good.json"]
+    assert os.path.exists(validation_cache_path("stats.json"))
+
+    summary, results = run(decks)
+    assert (summary["checked"], summary["cached"]) == (0, 2)
+
+    # 只改了修改时间的文件按内容哈希仍然使用缓存
+    os.utime(decks / "good.json", ns=(1, 1))
+    summary, results = run(decks)
+    assert results["good.json"][1] and summary["cached"] == 2
+
+
+def test_duplicate_keys_and_orphaned_stats_are_reported(write_deck):
+    text = '{"戊戌变法": "1898 年", "戊戌变法": "1898 年", "某事件": "不详"}'
+    with open("dup.json", "w", encoding="utf-8") as f:
+        f.write(text)
+    with open("stats.json", "w", encoding="utf-8") as f:
+        f.write('{"dup.json": {"已删除的事件": {}}, "gone.json": {"事件": {}}}')
+
+    summary, results = run(".", use_cache=False)
+    warnings = "\n".join(results["dup.json"][0]["warnings"])
+    assert "重复的事件名称" in warnings
+    assert "无法解析为年份" in warnings
+    assert "已删除的事件" in warnings
+    assert summary["orphaned_decks"] == {"gone.json": 1}
+    assert not os.path.exists(validation_cache_path("stats.json"))
+
+
+def test_sqlite_stats_are_read_without_creating_the_database(write_deck, monkeypatch):
+    monkeypatch.setattr(config, "SQLITE_FILE", "quiz.db")
+    write_deck(SAMPLE)
+    summary, results = run(".", backend="sqlite", use_cache=False)
+    assert summary["errors"] == 0 and "deck.json" in results
+    assert not os.path.exists("quiz.db")
+
+    from sqlite_handler import connect
+    conn = connect("quiz.db")
+    conn.execute("INSERT INTO stats VALUES ('', 'deck.json', '已删除的事件', 1, 1, 0, 2.0, '', '', 1, 2.5)")
+    conn.commit()
+    conn.close()
+    before = os.path.getmtime("quiz.db")
+    summary, results = run(".", backend="sqlite", use_cache=False)
+    assert "已删除的事件" in "\n".join(results["deck.json"][0]["warnings"])
+    assert os.path.getmtime("quiz.db") == before
+    conn = sqlite3.connect("quiz.db")
+    assert conn.execute("SELECT COUNT(*) FROM stats").fetchone() == (1,)
+    conn.close()
+
+
+def test_validation_does_not_touch_the_stats_files(write_deck):
+    write_deck(SAMPLE)
+    os.makedirs("stats_journal")
+    with open("stats_journal/deck.json.log", "w", encoding="utf-8") as f:
+        f.write('{"q":"戊戌变法","s":{}}\n{"q": "torn')
+    size = os.path.getsize("stats_journal/deck.json.log")
+
+    summary, results = run(".", use_cache=False)
+    assert summary["errors"] == 0
+    assert os.path.getsize("stats_journal/deck.json.log") == size
+    assert not os.path.exists("stats.json.lock")
+
+    # 学习者的统计目录不存在时不创建它
+    summary, results = run(".", user="alice")
+    assert not os.path.exists(config.PROFILES_DIR)
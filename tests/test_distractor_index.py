@@ -0,0 +1,53 @@
+import random
+
+from conftest import SAMPLE
+from data_handler import DataHandler
+from distractor_index import DistractorIndex
+from quiz import Quiz
+from review_system import ReviewSystem
+
+DECADES = {f"事件{year}": f"{year} 年" for year in range(1800, 2000, 10)}
+
+
+def test_options_come_from_the_deck(write_deck):
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    quiz = Quiz(data_handler, ReviewSystem(data_handler))
+    for question, answer in SAMPLE.items():
+        quiz_data = quiz.prepare_question(question, answer, "multiple_choice")["quiz_data"]
+        options = quiz_data["options"]
+        assert len(options) == len(set(options)) == 4
+        assert options[quiz_data["correct_index"]] == answer
+        assert set(options) <= set(SAMPLE.values())
+    data_handler.close()
+
+
+def test_distractors_are_the_nearest_years(write_deck):
+    data_handler = DataHandler(write_deck(DECADES), "stats.json")
+    index = DistractorIndex(data_handler)
+    for _ in range(20):
+        drawn = index.draw("1900 年", 3, random.Random())
+        assert set(drawn) <= {"1870 年", "1880 年", "1890 年", "1910 年", "1920 年", "1930 年"}
+        assert "1900 年" not in drawn
+    data_handler.close()
+
+
+def test_index_follows_deck_edits(write_deck):
+    data_handler = DataHandler(write_deck(DECADES), "stats.json")
+    index = DistractorIndex(data_handler)
+    data_handler.add_listener(index)
+    data_handler.add_event("新事件", "1901 年")
+    data_handler.remove_event("事件1910")
+    data_handler.add_events({"事件1890": "1899 年"})
+
+    rebuilt = DistractorIndex(data_handler)
+    assert index._by_year == rebuilt._by_year
+    assert index._counts == rebuilt._counts
+    data_handler.close()
+
+
+def test_small_pools_are_filled_with_nearby_years(write_deck):
+    data_handler = DataHandler(write_deck({"戊戌变法": "1898 年", "武昌起义": "1911 年"}), "stats.json")
+    drawn = DistractorIndex(data_handler).draw("1898 年", 3, random.Random(1))
+    assert len(drawn) == len(set(drawn)) == 3
+    assert "1911 年" in drawn and "1898 年" not in drawn
+    data_handler.close()
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from conftest import SAMPLE
+from data_handler import DataHandler
+from history_log import HistoryLog, analyze
+from quiz import Quiz
+from review_system import ReviewSystem
+
+SIMULATED = datetime(2030, 3, 1, 9, 30)
+
+
+def test_answers_are_logged_at_the_review_clock_time(write_deck):
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    history = HistoryLog("history")
+    quiz = Quiz(data_handler, ReviewSystem(data_handler, clock=lambda: SIMULATED), history)
+    for question, is_correct in (("戊戌变法", True), ("武昌起义", False), ("戊戌变法", True)):
+        item = quiz.prepare_question(question, SAMPLE[question], "fill_blank")
+        quiz.record_answer(item, is_correct, 2.0)
+    history.flush()
+
+    (chunk,) = history.iter_chunks()
+    assert list(chunk["timestamp"]) == [SIMULATED.timestamp()] * 3
+    assert list(chunk["correct"]) == [1, 0, 1]
+    assert list(chunk["interval_before"])[2] == chunk["interval_after"][0]
+
+    report = analyze(history, min_attempts=1)
+    assert report["rows"] == 3
+    # 每天的作答量按模拟时钟的日期统计
+    assert report["daily"] == [(SIMULATED.date().isoformat(), 3, 2)]
+    data_handler.close()
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from conftest import SAMPLE
+from data_handler import DataHandler
+from date_parser import parse_year_range
+from importer import detect_format, import_events, iter_rows, normalize_date
+
+
+@pytest.mark.parametrize("text", [
+    "1840-42", "1898-02", "1927-08-01", "公元前221年", "一八四〇年", "前221年-前206年",
+    "1840-1842", "1840", "１８４０年", "1927年8月1日", "1851 年 -  1864年",
+])
+def test_normalize_date_accepts_what_grading_accepts(text):
+    normalized = normalize_date(text)
+    assert normalized is not None
+    assert parse_year_range(normalized) == parse_year_range(text)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1840-1842", "1840 年 - 1842 年"),
+    ("1898", "1898 年"),
+    ("1927年8月1日", "1927 年 8 月 1 日"),
+    ("１９１９年", "1919 年"),
+])
+def test_normalize_date_formatting(text, expected):
+    assert normalize_date(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", "   ", "不详", None, 1840])
+def test_normalize_date_rejects_dates_without_a_year(text):
+    assert normalize_date(text) is None
+
+
+def test_iter_rows_skips_header_and_blank_lines(tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text("事件,时间\n\n鸦片战争,1840-1842\n只有名称\n", encoding="utf-8")
+    assert list(iter_rows(str(path))) == [(3, "鸦片战争", "1840-1842"), (4, "只有名称", None)]
+    with pytest.raises(ValueError):
+        detect_format("rows.xlsx")
+
+
+def test_import_reports_duplicates_conflicts_and_invalid_rows(write_deck, tmp_path):
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    csv_file = tmp_path / "new.csv"
+    csv_file.write_text(
+        "event,date\n"
+        "鸦片战争,1840 年 - 1842 年\n"   # 重复
+        "戊戌变法,1899\n"                # 冲突
+        "秦统一六国,前221年\n"           # 新事件
+        "无效事件,不详\n"                # 无效
+        ",1900\n", encoding="utf-8")    # 无效
+    jsonl_file = tmp_path / "new.jsonl"
+    jsonl_file.write_text(json.dumps({"event": "南昌起义", "date": "1927-08-01"}, ensure_ascii=False)
+                          + "\nnot json\n", encoding="utf-8")
+
+    report = import_events(data_handler, [str(csv_file), str(jsonl_file)])
+    assert report["rows"] == 7
+    assert report["duplicates"] == 1
+    assert report["conflicts"] == 1
+    assert report["invalid"] == 3
+    assert report["imported"] == 2
+    events = data_handler.get_all_events()
+    assert events["戊戌变法"] == "1898 年"
+    assert parse_year_range(events["秦统一六国"]) == (-221, -221)
+    assert events["南昌起义"] == "1927-08-01"
+
+    report = import_events(data_handler, [str(csv_file)], overwrite=True)
+    assert data_handler.get_all_events()["戊戌变法"] == "1899 年"
+    data_handler.close()
+
+    # 导入的事件已写入题库文件
+    with open(data_handler.data_file, encoding="utf-8") as f:
+        assert "秦统一六国" in json.load(f)
+
+
+def test_import_reports_near_duplicates(write_deck, tmp_path):
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    tsv_file = tmp_path / "new.tsv"
+    tsv_file.write_text("五四运动\t1919\n", encoding="utf-8")
+    report = import_events(data_handler, [str(tsv_file)])
+    assert report["near_duplicate_samples"] == [("五四运动", "五四运动爆发")]
+
+    tsv_file.write_text("九一八事变爆发\t1931\n", encoding="utf-8")
+    report = import_events(data_handler, [str(tsv_file)], check_near_duplicates=False)
+    assert report["imported"] == 1 and report["near_duplicates"] == 0
+    data_handler.close()
+
+
+def test_existing_unformatted_date_counts_as_duplicate(write_deck, tmp_path):
+    data_handler = DataHandler(write_deck(dict(SAMPLE, 戊戌变法="1898年")), "stats.json")
+    csv_file = tmp_path / "new.csv"
+    csv_file.write_text("戊戌变法,1898年\n", encoding="utf-8")
+
+    report = import_events(data_handler, [str(csv_file)], overwrite=True)
+    assert report["duplicates"] == 1 and report["conflicts"] == 0 and report["imported"] == 0
+    assert data_handler.get_all_events()["戊戌变法"] == "1898年"
+    data_handler.close()
@@ -0,0 +1,75 @@
+import json
+import os
+
+import config
+from conftest import SAMPLE
+from data_handler import DataHandler, apply_journal, journal_path
+from quiz import Quiz
+from review_system import ReviewSystem
+
+
+def answer(quiz, question, is_correct=True):
+    item = quiz.prepare_question(question, SAMPLE[question], "fill_blank")
+    return quiz.record_answer(item, is_correct, 2.0, quiz.new_session())
+
+
+def journal_lines(source_key="deck.json"):
+    with open(journal_path("stats.json", source_key), encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_each_answer_appends_one_record(write_deck):
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    quiz = Quiz(data_handler, ReviewSystem(data_handler))
+    answer(quiz, "戊戌变法")
+    answer(quiz, "武昌起义", is_correct=False)
+
+    records = journal_lines()
+    assert [record["q"] for record in records] == ["戊戌变法", "武昌起义"]
+    # 记录中已包含安排好的下次复习
+    assert records[0]["s"]["interval"] == config.INTERVAL_AFTER_FIRST
+    assert records[0]["s"]["total_attempts"] == 1
+    data_handler.close()
+
+
+def test_torn_tail_is_truncated_on_replay(write_deck):
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    quiz = Quiz(data_handler, ReviewSystem(data_handler))
+    answer(quiz, "戊戌变法")
+    data_handler._journal.close()
+    data_handler._journal = None
+
+    journal_file = journal_path("stats.json", "deck.json")
+    intact = os.path.getsize(journal_file)
+    with open(journal_file, "a", encoding="utf-8") as f:
+        f.write('{"q":"武昌起义","s":{"total_att')
+
+    target = {}
+    assert apply_journal(journal_file, target) == 1
+    assert list(target) == ["戊戌变法"]
+    assert os.path.getsize(journal_file) == intact
+
+    # 重新打开时从日志恢复，之后的追加从完整的行开始
+    reopened = DataHandler(data_handler.data_file, "stats.json")
+    assert reopened.get_question_stats("戊戌变法")["total_attempts"] == 1
+    answer(Quiz(reopened, ReviewSystem(reopened)), "武昌起义")
+    assert [record["q"] for record in journal_lines()] == ["戊戌变法", "武昌起义"]
+    reopened.close()
+
+
+def test_journal_is_compacted_into_the_stats_file(write_deck, monkeypatch):
+    monkeypatch.setattr(config, "JOURNAL_COMPACT_THRESHOLD", 3)
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    quiz = Quiz(data_handler, ReviewSystem(data_handler))
+    for question in list(SAMPLE)[:4]:
+        answer(quiz, question)
+
+    with open("stats.json", encoding="utf-8") as f:
+        saved = json.load(f)["deck.json"]
+    assert sorted(saved) == sorted(list(SAMPLE)[:3])
+    assert [record["q"] for record in journal_lines()] == [list(SAMPLE)[3]]
+    data_handler.close()
+
+    with open("stats.json", encoding="utf-8") as f:
+        assert len(json.load(f)["deck.json"]) == 4
+    assert journal_lines() == []
@@ -0,0 +1,98 @@
+import json
+import os
+
+from conftest import SAMPLE
+from data_handler import DataHandler
+from jsonl_deck import INDEX_SUFFIX, JsonlDeck, convert_json_deck
+
+
+def write_lines(path, records, tail=""):
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        f.write(tail)
+
+
+def record_scans(monkeypatch):
+    starts = []
+    scan = JsonlDeck._scan
+    monkeypatch.setattr(JsonlDeck, "_scan", lambda self, start: starts.append(start) or scan(self, start))
+    return starts
+
+
+def test_edits_are_appended_and_replayed():
+    deck = JsonlDeck("deck.jsonl")
+    deck.update(SAMPLE)
+    deck["戊戌变法"] = "1898 年 6 月"
+    del deck["武昌起义"]
+    assert len(deck) == len(SAMPLE) - 1
+    deck.close()
+
+    with open("deck.jsonl", encoding="utf-8") as f:
+        assert len(f.readlines()) == len(SAMPLE) + 2
+    reopened = JsonlDeck("deck.jsonl")
+    assert reopened["戊戌变法"] == "1898 年 6 月"
+    assert "武昌起义" not in reopened
+    expected = {event: date for event, date in SAMPLE.items() if event != "武昌起义"}
+    expected["戊戌变法"] = "1898 年 6 月"
+    assert dict(reopened.items()) == expected
+    reopened.close()
+
+
+def test_offset_index_skips_the_indexed_prefix(monkeypatch):
+    write_lines("deck.jsonl", [{"event": event, "date": date} for event, date in SAMPLE.items()])
+    JsonlDeck("deck.jsonl").close()
+    size = os.path.getsize("deck.jsonl")
+    with open("deck.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps({"event": "新事件", "date": "2000 年"}, ensure_ascii=False) + "\n")
+
+    starts = record_scans(monkeypatch)
+    deck = JsonlDeck("deck.jsonl")
+    # 只扫描索引之后追加的部分
+    assert starts == [size]
+    assert deck["新事件"] == "2000 年" and deck["鸦片战争"] == "1840 年 - 1842 年"
+    deck.close()
+
+
+def test_stale_index_triggers_a_full_scan(monkeypatch):
+    write_lines("deck.jsonl", [{"event": "甲", "date": "1900 年"}, {"event": "乙", "date": "1901 年"}])
+    JsonlDeck("deck.jsonl").close()
+    # 文件被改写成同样长度的不同内容
+    write_lines("deck.jsonl", [{"event": "丙", "date": "1900 年"}, {"event": "丁", "date": "1901 年"}])
+
+    starts = record_scans(monkeypatch)
+    deck = JsonlDeck("deck.jsonl")
+    assert starts == [0]
+    assert sorted(deck) == ["丁", "丙"]
+    deck.close()
+
+
+def test_torn_tail_is_truncated():
+    write_lines("deck.jsonl", [{"event": "甲", "date": "1900 年"}], tail='{"event": "乙", "da')
+    deck = JsonlDeck("deck.jsonl")
+    assert list(deck) == ["甲"]
+    deck["丙"] = "1902 年"
+    deck.close()
+    assert list(JsonlDeck("deck.jsonl").items()) == [("甲", "1900 年"), ("丙", "1902 年")]
+
+
+def test_close_compacts_mostly_dead_files():
+    deck = JsonlDeck("deck.jsonl")
+    for year in range(1900, 1905):
+        deck["甲"] = f"{year} 年"
+    deck.close()
+    with open("deck.jsonl", encoding="utf-8") as f:
+        assert f.readlines() == ['{"event": "甲", "date": "1904 年"}\n']
+    assert os.path.exists("deck.jsonl" + INDEX_SUFFIX)
+
+
+def test_convert_json_deck_copies_stats(write_deck):
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    data_handler.update_question_stats("戊戌变法", True, 2.0)
+    data_handler.close()
+
+    jsonl_file, events, copied = convert_json_deck("deck.json", "stats.json")
+    assert (jsonl_file, events, copied) == ("deck.jsonl", len(SAMPLE), 1)
+    converted = DataHandler(jsonl_file, "stats.json")
+    assert converted.get_question_stats("戊戌变法")["total_attempts"] == 1
+    assert converted.get_all_events()["新中国成立"] == "1949 年"
+    converted.close()
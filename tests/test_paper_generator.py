@@ -0,0 +1,54 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+import paper_generator
+from conftest import SAMPLE
+from data_handler import DataHandler
+from paper_generator import PaperGenerator, generate_papers
+
+EVENTS = {f"事件{i}": f"{1000 + 7 * i} 年" for i in range(30)}
+
+
+def read_papers(directory):
+    return {path.name: path.read_text(encoding="utf-8") for path in sorted(Path(directory).iterdir())}
+
+
+def test_a_paper_depends_only_on_seed_and_number():
+    generator = PaperGenerator(EVENTS)
+    paper = generator.generate(5, 3, 4, 2)
+    assert paper == PaperGenerator(dict(reversed(list(EVENTS.items())))).generate(5, 3, 4, 2)
+    assert paper != generator.generate(5, 4, 4, 2)
+    questions = [item["question"] for item in paper["items"]]
+    assert len(set(questions)) == 6
+    assert [item["type"] for item in paper["items"]].count("multiple_choice") == 4
+
+
+def test_output_does_not_depend_on_worker_count(write_deck, monkeypatch):
+    monkeypatch.setattr(paper_generator, "PAPERS_PER_TASK", 4)
+    data_handler = DataHandler(write_deck(EVENTS), "stats.json")
+    generate_papers(data_handler, 10, 3, 2, seed=1, out_dir="one", workers=1)
+    report = generate_papers(data_handler, 10, 3, 2, seed=1, out_dir="two", workers=3, file_format="markdown")
+    generate_papers(data_handler, 10, 3, 2, seed=1, out_dir="three", workers=3)
+    assert read_papers("one") == read_papers("three")
+    assert report["papers"] == 10 and len(os.listdir("two")) == 20
+
+    document = json.loads(read_papers("one")["paper_01.json"])
+    assert len(document["questions"]) == len(document["answer_key"]) == 5
+    data_handler.close()
+
+
+def test_duplicate_papers_are_regenerated(write_deck):
+    # 5 个事件选 4 个只有 5 种组合
+    data_handler = DataHandler(write_deck(dict(list(SAMPLE.items())[:5])), "stats.json")
+    report = generate_papers(data_handler, 5, 2, 2, out_dir="papers", workers=1)
+    fingerprints = {frozenset(key["event"] for key in json.loads(content)["answer_key"])
+                    for content in read_papers("papers").values()}
+    assert len(fingerprints) == 5 and report["retried"] > 0
+    with pytest.raises(ValueError):
+        generate_papers(data_handler, 7, 2, 2, out_dir="too_many", workers=1)
+    with pytest.raises(ValueError):
+        generate_papers(data_handler, 1, 4, 2, out_dir="too_long", workers=1)
+    data_handler.close()
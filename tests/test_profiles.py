@@ -0,0 +1,78 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+import config
+from data_handler import DataHandler, profile_stats_file
+from file_lock import FileLock
+
+EVENTS = {f"事件{i}": f"{1000 + i} 年" for i in range(40)}
+
+
+def answer_every_question(args):
+    directory, data_file, user, threshold = args
+    os.chdir(directory)
+    config.JOURNAL_COMPACT_THRESHOLD = threshold
+    config.WRITE_BEHIND = False
+    data_handler = DataHandler(data_file, "stats.json", user)
+    for question in EVENTS:
+        data_handler.update_question_stats(question, True, 1.0)
+    data_handler.close()
+
+
+def test_profile_stats_files_are_separate():
+    assert profile_stats_file("stats.json", None) == "stats.json"
+    assert profile_stats_file("data/stats.json", "alice") == os.path.join(config.PROFILES_DIR, "alice", "stats.json")
+    for user in ("..", "a/b", "a b"):
+        with pytest.raises(ValueError):
+            profile_stats_file("stats.json", user)
+
+
+def test_learners_do_not_share_stats(write_deck):
+    write_deck(EVENTS)
+    alice = DataHandler("deck.json", "stats.json", "alice")
+    alice.update_question_stats("事件1", True, 1.0)
+    alice.close()
+    bob = DataHandler("deck.json", "stats.json", "bob")
+    assert bob.get_question_stats("事件1") is None
+    bob.close()
+    assert os.path.exists(os.path.join(config.PROFILES_DIR, "alice", "stats.json"))
+    assert not os.path.exists("stats.json")
+
+
+def test_file_lock_excludes_other_holders(tmp_path):
+    order = []
+    first = FileLock(str(tmp_path / "x.lock"))
+    second = FileLock(str(tmp_path / "x.lock"))
+
+    def contend():
+        with second:
+            order.append("second")
+
+    with first:
+        with first:  # 可重入
+            thread = threading.Thread(target=contend)
+            thread.start()
+            time.sleep(0.05)
+            order.append("first")
+    thread.join()
+    assert order == ["first", "second"]
+
+
+def test_concurrent_processes_keep_every_deck(write_deck, tmp_path):
+    # 两个进程同时答不同题库的题，并频繁合并日志改写共用的统计文件
+    write_deck(EVENTS, "a.json")
+    write_deck(EVENTS, "b.json")
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(2) as pool:
+        pool.map(answer_every_question, [(str(tmp_path), name, None, 7) for name in ("a.json", "b.json")])
+
+    with open("stats.json", encoding="utf-8") as f:
+        saved = json.load(f)
+    for name in ("a.json", "b.json"):
+        assert len(saved[name]) == len(EVENTS)
+        assert all(stats["total_attempts"] == 1 for stats in saved[name].values())
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from conftest import SAMPLE
+from data_handler import DataHandler
+from profiling import Profiler, profiler
+from quiz import Quiz
+from review_system import ReviewSystem
+
+
+@pytest.fixture
+def enabled_profiler():
+    profiler.reset()
+    profiler.enabled = True
+    yield profiler
+    profiler.enabled = False
+    profiler.reset()
+
+
+def test_disabled_profiler_records_nothing():
+    local = Profiler()
+    calls = local.timed("work")(lambda x: x * 2)
+    assert calls(21) == 42
+    local.count("things")
+    assert local.timers == {} and local.counters == {}
+
+
+def test_timers_and_counters(tmp_path):
+    local = Profiler()
+    local.enabled = True
+
+    @local.timed("work")
+    def work(fail=False):
+        if fail:
+            raise ValueError
+        return "done"
+
+    assert work() == "done"
+    with pytest.raises(ValueError):
+        work(fail=True)
+    local.count("answers", 2)
+    local.count("bytes_written", 100)
+
+    report = local.to_dict()
+    assert report["timers"]["work"]["calls"] == 2
+    assert report["counters"] == {"answers": 2, "bytes_written": 100}
+    assert report["per_answer"]["bytes_written"] == 50
+    local.dump_json(str(tmp_path / "profile.json"))
+    assert json.loads((tmp_path / "profile.json").read_text(encoding="utf-8")) == json.loads(json.dumps(report))
+
+
+def test_answers_are_instrumented(write_deck, enabled_profiler):
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    quiz = Quiz(data_handler, ReviewSystem(data_handler))
+    for item in quiz.plan_session(3, "fill_blank"):
+        quiz.record_answer(item, True, 1.0)
+    data_handler.close()
+
+    report = enabled_profiler.to_dict()
+    assert report["counters"]["answers"] == 3
+    assert report["counters"]["journal_appends"] == 3
+    assert report["per_answer"]["journal_appends"] == 1
+    for name in ("plan_session", "calculate_next_review", "write_question_stats"):
+        assert name in report["timers"]
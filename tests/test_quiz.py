@@ -0,0 +1,55 @@
+import builtins
+from collections import deque
+
+import config
+from conftest import SAMPLE
+from data_handler import DataHandler
+from quiz import Quiz
+from review_system import ReviewSystem
+
+
+def make_quiz(write_deck, events=SAMPLE):
+    data_handler = DataHandler(write_deck(events), "stats.json")
+    return Quiz(data_handler, ReviewSystem(data_handler))
+
+
+def test_plan_session_prepares_every_question(write_deck):
+    quiz = make_quiz(write_deck)
+    plan = quiz.plan_session(5, "fill_blank")
+    assert len(plan) == 5 and len({item["question"] for item in plan}) == 5
+    assert all(item["answer"] == SAMPLE[item["question"]] and item["requeues"] == 0 for item in plan)
+    quiz.data_handler.close()
+
+
+def test_wrong_answers_are_requeued_a_few_questions_later(write_deck, monkeypatch):
+    monkeypatch.setattr(config, "REQUEUE_GAP", 2)
+    quiz = make_quiz(write_deck)
+    plan = deque(["a", "b", "c", "d"])
+    item = {"requeues": 0}
+    quiz.requeue_if_wrong(plan, item, False)
+    assert list(plan) == ["a", "b", item, "c", "d"]
+    for _ in range(config.MAX_SESSION_REQUEUES + 2):
+        quiz.requeue_if_wrong(plan, item, False)
+    assert item["requeues"] == config.MAX_SESSION_REQUEUES
+    quiz.requeue_if_wrong(plan, {"requeues": 0}, True)
+    assert len(plan) == 5 + config.MAX_SESSION_REQUEUES - 1
+    quiz.data_handler.close()
+
+
+def test_start_session_asks_up_to_num_questions(write_deck, monkeypatch):
+    quiz = make_quiz(write_deck)
+    asked = []
+
+    def fake_input(prompt=""):
+        if "答案" in prompt:
+            asked.append(prompt)
+            return "错误的答案"
+        return ""
+
+    monkeypatch.setattr(builtins, "input", fake_input)
+    quiz.start_session(3, "fill_blank")
+    # 答错的题目重新排入，但总题数不超过 num_questions
+    assert len(asked) == 3
+    assert quiz.current_session["wrong_answers"] == 3
+    quiz.data_handler.close()
+
@@ -0,0 +1,92 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+import config
+from data_handler import DataHandler, create_data_handler
+from review_system import DueIndex, ReviewSystem, sm2_update
+
+EVENTS = {f"事件{i}": f"{1000 + i} 年" for i in range(60)}
+
+
+def snapshot(index, now):
+    return (index.top_due(now, 15), index.top_unstudied(15), index.top_weak(15), index.count_due(now))
+
+
+def test_sm2_update():
+    assert sm2_update(1, 2.5, 5) == (config.INTERVAL_AFTER_FIRST, 2.6)
+    interval, ease_factor = sm2_update(10, 2.5, 3)
+    assert interval == 25 and round(ease_factor, 2) == 2.36
+    interval, ease_factor = sm2_update(10, 2.5, 2)
+    assert interval == 1 and round(ease_factor, 2) == 2.3
+    assert sm2_update(10, config.MIN_EASE_FACTOR, 3)[1] == config.MIN_EASE_FACTOR
+
+
+def test_incremental_due_index_matches_a_rebuild(write_deck):
+    rng = random.Random(7)
+    data_handler = DataHandler(write_deck(EVENTS), "stats.json")
+    now = datetime(2030, 1, 1)
+    data_handler.clock = lambda: now
+    review_system = ReviewSystem(data_handler)
+    index = review_system.due_index
+
+    for step in range(400):
+        action = rng.random()
+        events = list(data_handler.get_all_events())
+        if action < 0.05:
+            data_handler.add_event(f"新事件{step}", f"{1900 + step % 100} 年")
+        elif action < 0.1 and events:
+            data_handler.remove_event(rng.choice(events))
+        else:
+            question = rng.choice(events)
+            is_correct = rng.random() < 0.7
+            data_handler.update_question_stats(question, is_correct, rng.uniform(1, 20), commit=False)
+            review_system.calculate_next_review(question, rng.randint(3, 5) if is_correct else 2)
+        now += timedelta(hours=rng.randint(1, 30))
+        if step % 20 == 0:
+            assert snapshot(index, now.timestamp()) == snapshot(DueIndex(data_handler), now.timestamp())
+
+    due = review_system.get_due_questions(limit=10)
+    assert len(due) == len(set(due)) == 10
+    data_handler.close()
+
+
+def test_due_questions_prefer_overdue_then_unstudied(write_deck):
+    data_handler = DataHandler(write_deck(EVENTS), "stats.json")
+    review_system = ReviewSystem(data_handler)
+    # 全部学习一遍后，让其中三个问题已经到期
+    for question in EVENTS:
+        data_handler.update_question_stats(question, True, 2.0, commit=False)
+        review_system.calculate_next_review(question, 5)
+    overdue = ["事件3", "事件7", "事件11"]
+    for days, question in enumerate(overdue, 1):
+        stats = dict(data_handler.get_question_stats(question))
+        stats["next_review"] = (datetime.now() - timedelta(days=days)).isoformat()
+        data_handler.get_all_stats()[question] = stats
+        data_handler.commit_question_stats(question)
+    data_handler.add_event("新事件", "2000 年")
+
+    assert review_system.due_index.top_due(datetime.now().timestamp(), 10) == ["事件11", "事件7", "事件3"]
+    assert sorted(review_system.get_due_questions(limit=4)) == sorted(overdue + ["新事件"])
+    data_handler.close()
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_large_due_backlog_still_introduces_new_questions(write_deck, backend):
+    data_handler = create_data_handler(write_deck(EVENTS), "stats.json", backend)
+    review_system = ReviewSystem(data_handler)
+    studied = list(EVENTS)[:40]
+    for question in studied:
+        data_handler.update_question_stats(question, False, 2.0, commit=False)
+        review_system.calculate_next_review(question, 2)
+    later = datetime.now() + timedelta(days=2)
+    review_system = ReviewSystem(data_handler, clock=lambda: later)
+
+    due = review_system.get_due_questions(limit=10)
+    new = [question for question in due if question not in studied]
+    assert len(due) == 10 and len(new) == int(10 * config.NEW_QUESTION_SHARE)
+
+    # 到期的问题不够时，未学习的问题补齐剩余名额
+    assert sorted(review_system.get_due_questions(limit=60)) == sorted(EVENTS)
+    data_handler.close()
@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from conftest import SAMPLE
+from data_handler import MemoryDataHandler
+from search_index import SUBSTRING_BONUS, SearchIndex, bigrams, dice
+
+SYLLABLES = "南北东西上下中华国民革命战争运动会议条约起义成立建立变法改革"
+
+
+def brute_force(events, query, min_score=0.3):
+    grams = bigrams(query)
+    needle = "".join(query.split()).lower()
+    scored = []
+    for position, (event, date) in enumerate(events.items()):
+        name, answer = bigrams(event), bigrams(date)
+        score = max(dice(len(grams & name), len(grams), len(name)),
+                    dice(len(grams & answer), len(grams), len(answer)))
+        if needle in "".join(event.split()).lower():
+            score += SUBSTRING_BONUS
+        if score >= min_score:
+            scored.append((score, -position, event))
+    scored.sort(reverse=True)
+    return len(scored), [event for _, _, event in scored]
+
+
+def random_deck(size, seed=0):
+    rng = random.Random(seed)
+    events = {}
+    while len(events) < size:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 8)))
+        events[name] = f"{rng.randint(1000, 2000)} 年"
+    return events
+
+
+def test_bigrams_ignore_whitespace_and_case():
+    assert bigrams("A b") == {"ab"}
+    assert bigrams("甲") == set()
+
+
+@pytest.mark.parametrize("query", ["南昌起义", "中华民国成立", "革命", "国民革命战争", "1911"])
+def test_search_matches_brute_force(query):
+    events = random_deck(3000)
+    index = SearchIndex(MemoryDataHandler(events))
+    total, results = index.search(query, limit=50)
+    expected_total, expected = brute_force(events, query)
+    assert total == expected_total
+    assert [event for _, event, _ in results] == expected[:50]
+    _, page = index.search(query, limit=10, offset=10)
+    assert [event for _, event, _ in page] == expected[10:20]
+
+
+def test_incremental_updates_match_a_rebuild():
+    data_handler = MemoryDataHandler(dict(SAMPLE))
+    index = data_handler.get_search_index()
+    data_handler.add_event("南昌起义、秋收起义", "1927 年")
+    data_handler.add_event("武昌起义", "1911 年 10 月")
+    data_handler.remove_event("鸦片战争")
+    data_handler.add_events({"第二次鸦片战争": "1856 年 - 1860 年"})
+
+    rebuilt = SearchIndex(data_handler)
+    assert len(index) == len(rebuilt) == len(data_handler.get_all_events())
+    for query in ("起义", "鸦片战争", "1911"):
+        assert [result[1:] for result in index.search(query)[1]] == [result[1:] for result in rebuilt.search(query)[1]]
+
+
+def test_near_duplicates():
+    data_handler = MemoryDataHandler(dict(SAMPLE, **{"南昌起义、秋收起义": "1927 年", "五四运动": "1919 年"}))
+    index = data_handler.get_search_index()
+    assert [event for _, event, _ in index.near_duplicates("南昌起义")] == ["南昌起义、秋收起义"]
+    assert [event for _, event, _ in index.near_duplicates("五四运动")] == ["五四运动爆发"]
+    assert index.near_duplicates("辛亥革命") == []
+
+
+def test_near_duplicates_with_low_thresholds():
+    index = MemoryDataHandler({"甲乙丙": "1900 年", "乙丙丁": "1901 年", "戊己庚": "1902 年"}).get_search_index()
+    # 两个二元组的名称只共有一个，相似度 0.5
+    assert [event for _, event, _ in index.near_duplicates("甲乙丙", 0.5)] == ["乙丙丁"]
+    assert index.near_duplicates("甲乙丙", 0.6) == []
+
+
+@pytest.mark.parametrize("threshold", [0.8, 0.5, 0.3])
+def test_near_duplicates_match_brute_force(threshold):
+    events = random_deck(2000, seed=4)
+    index = SearchIndex(MemoryDataHandler(events))
+    for event in list(events)[:50]:
+        grams = bigrams(event)
+        expected = []
+        for position, other in enumerate(events):
+            if other == event:
+                continue
+            other_grams = bigrams(other)
+            common = len(grams & other_grams)
+            shorter = min(len(grams), len(other_grams))
+            similarity = common / shorter if shorter >= 2 else dice(common, len(grams), len(other_grams))
+            if similarity >= threshold:
+                expected.append((similarity, -position, other))
+        expected.sort(reverse=True)
+        assert [other for _, other, _ in index.near_duplicates(event, threshold)] == [other for _, _, other in expected[:5]]
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from conftest import SAMPLE
+from server import QuizServer, read_request
+
+
+@pytest.fixture
+def server(write_deck):
+    write_deck(SAMPLE, "history_events.json")
+    quiz_server = QuizServer(".", "stats.json", session_ttl=60, max_sessions=3)
+    yield quiz_server
+    quiz_server.close()
+
+
+def start(server, num_questions=3, question_type="fill_blank"):
+    status, payload = server.route("POST", "/sessions", {"num_questions": num_questions, "type": question_type})
+    assert status == 200
+    return payload["session_id"]
+
+
+def answer_all(server, session_id):
+    while True:
+        status, payload = server.route("GET", f"/sessions/{session_id}/question", {})
+        assert status == 200
+        if payload["finished"]:
+            return
+        question = payload["question"]["question"]
+        status, result = server.route("POST", f"/sessions/{session_id}/answer", {"answer": SAMPLE[question]})
+        assert status == 200 and result["is_correct"]
+
+
+def test_session_lifecycle(server):
+    session_id = start(server)
+    answer_all(server, session_id)
+    assert server.route("GET", f"/sessions/{session_id}/summary", {})[1]["questions_asked"] == 3
+    status, summary = server.route("DELETE", f"/sessions/{session_id}", {})
+    assert status == 200 and summary["correct_answers"] == 3
+    assert server.route("GET", f"/sessions/{session_id}/question", {})[0] == 404
+    assert server.route("GET", "/nowhere", {})[0] == 404
+
+
+def test_idle_sessions_expire_after_flushing(server):
+    idle = start(server)
+    answer_all(server, idle)
+    data_handler = server.sessions[idle].data_handler
+    assert data_handler._pending
+
+    time.sleep(0.01)
+    active = start(server)
+    cutoff = server._last_used[idle] + server.session_ttl + 0.005
+    asyncio.run(server.flush_once(now=cutoff))
+    assert server.route("GET", f"/sessions/{idle}/question", {})[0] == 404
+    assert active in server.sessions
+    # 回收前统计数据已经落盘
+    assert not data_handler._pending
+    assert not server.engines[(None, "history_events.json")].sessions.get(idle)
+
+
+def test_session_count_is_capped(server):
+    sessions = [start(server) for _ in range(3)]
+    # 访问最早的会话后，最久未使用的变成第二个
+    server.route("GET", f"/sessions/{sessions[0]}/question", {})
+    newest = start(server)
+    assert set(server.sessions) == {sessions[0], sessions[2], newest}
+    assert len(server.engines[(None, "history_events.json")].sessions) == 3
+
+
+def test_answers_racing_the_flush_thread(server, capsys):
+    stop = threading.Event()
+    engine = server.get_engine(None)
+
+    def flush_loop():
+        while not stop.is_set():
+            engine.data_handler.flush()
+
+    flusher = threading.Thread(target=flush_loop)
+    flusher.start()
+    try:
+        for _ in range(20):
+            session_id = start(server, len(SAMPLE))
+            answer_all(server, session_id)
+            server.route("DELETE", f"/sessions/{session_id}", {})
+    finally:
+        stop.set()
+        flusher.join()
+    engine.data_handler.flush()
+    assert "出错" not in capsys.readouterr().out
+    stats = engine.data_handler.get_all_stats()
+    assert sum(stats[question]["total_attempts"] for question in stats) == 20 * len(SAMPLE)
+
+
+def exchange(server, raw):
+    """把原始请求发给 handle_client，返回服务端写回的全部内容"""
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        written = bytearray()
+
+        class Writer:
+            def write(self, data):
+                written.extend(data)
+
+            async def drain(self):
+                pass
+
+            def close(self):
+                pass
+
+        await server.handle_client(reader, Writer())
+        return bytes(written)
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("raw, status", [
+    (b"GARBAGE\r\n\r\n", b"400"),
+    (b"POST /sessions HTTP/1.1\r\nContent-Length: abc\r\n\r\n", b"400"),
+    (b"POST /sessions HTTP/1.1\r\nContent-Length: 99999999999\r\n\r\n", b"413"),
+])
+def test_malformed_requests_get_an_error_response(server, raw, status):
+    response = exchange(server, raw + b"GET /sessions/x/question HTTP/1.1\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 " + status)
+    assert b"Connection: close" in response
+    # 连接随即关闭，后面的请求不再处理
+    assert response.count(b"HTTP/1.1") == 1
+
+
+def test_well_formed_request_round_trip(server):
+    body = b'{"num_questions": 2}'
+    response = exchange(server, b"POST /sessions HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+    assert response.startswith(b"HTTP/1.1 200") and b"session_id" in response
+
+
+def test_read_request_returns_none_at_end_of_stream():
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_eof()
+        return await read_request(reader)
+    assert asyncio.run(run()) is None
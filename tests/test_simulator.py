@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+import config
+from simulator import parse_sweep, run_sweep, simulate_learner, synthetic_difficulties
+
+
+def test_parse_sweep_expands_the_product():
+    assert parse_sweep(["min_ease_factor=1.3,1.5", "INTERVAL_AFTER_FIRST=1,3"]) == [
+        {"MIN_EASE_FACTOR": 1.3, "INTERVAL_AFTER_FIRST": 1},
+        {"MIN_EASE_FACTOR": 1.3, "INTERVAL_AFTER_FIRST": 3},
+        {"MIN_EASE_FACTOR": 1.5, "INTERVAL_AFTER_FIRST": 1},
+        {"MIN_EASE_FACTOR": 1.5, "INTERVAL_AFTER_FIRST": 3},
+    ]
+    with pytest.raises(ValueError):
+        parse_sweep(["DATA_FILE=1"])
+    with pytest.raises(ValueError):
+        parse_sweep(["MIN_EASE_FACTOR=abc"])
+
+
+def test_a_learner_is_deterministic_for_a_seed():
+    difficulties = synthetic_difficulties(random.Random(1), 40)
+    first = simulate_learner(7, difficulties, 30, 10)
+    assert first == simulate_learner(7, difficulties, 30, 10)
+    assert 0 < first["reviews"] <= 30 * 10
+    assert first["studied"] <= 40
+    # 第一天还没有学过的问题，积压为 0
+    assert simulate_learner(7, difficulties, 1, 10)["due_backlog"] == 0
+    # 每张学过的卡片只有第一次作答不算复习
+    assert first["repeat_reviews"] == first["reviews"] - first["studied"]
+
+
+def test_sweep_results_do_not_depend_on_workers():
+    interval_after_first = config.INTERVAL_AFTER_FIRST
+    configurations = [{}, {"INTERVAL_AFTER_FIRST": 6}]
+    serial, _ = run_sweep(configurations, learners=4, days=20, cards=30, workers=1, seed=3)
+    parallel, _ = run_sweep(configurations, learners=4, days=20, cards=30, workers=2, seed=3)
+    assert serial == parallel
+    assert serial[0]["params"] == {} and serial[1]["params"] == {"INTERVAL_AFTER_FIRST": 6}
+    assert serial[0]["learners"] == 4
+    # 参数改变时模拟结果也随之改变，而本进程的配置不受影响
+    assert serial[0]["mean_interval"] != serial[1]["mean_interval"]
+    assert config.INTERVAL_AFTER_FIRST == interval_after_first
@@ -0,0 +1,113 @@
+import json
+
+import config
+from conftest import SAMPLE
+from data_handler import DataHandler
+from review_system import ReviewSystem
+
+STATS = {"total_attempts": 1, "correct_attempts": 1, "wrong_attempts": 0, "avg_time": 2.0,
+         "last_review": "2030-01-02T03:04:05", "next_review": "2030-01-08T03:04:05",
+         "interval": 6, "ease_factor": 2.5}
+OTHER = {f"事件{i}": f"{1500 + i} 年" for i in range(10)}
+
+
+def answer(data_handler, question):
+    data_handler.update_question_stats(question, True, 2.0, commit=False)
+    ReviewSystem(data_handler).calculate_next_review(question, 5)
+
+
+def reopen(data_handler, monkeypatch):
+    """重新打开题库，返回 (DataHandler, 是否直接从快照加载)"""
+    loads = []
+    load_data = DataHandler.load_data
+    monkeypatch.setattr(DataHandler, "load_data", lambda self: loads.append(self) or load_data(self))
+    reopened = DataHandler(data_handler.data_file, "stats.json")
+    monkeypatch.setattr(DataHandler, "load_data", load_data)
+    return reopened, not loads
+
+
+def test_compacting_one_deck_keeps_other_snapshots(write_deck, monkeypatch):
+    first = DataHandler(write_deck(SAMPLE, "first.json"), "stats.json")
+    second = DataHandler(write_deck(OTHER, "second.json"), "stats.json")
+    answer(second, "事件3")
+    second.close()
+
+    answer(first, "戊戌变法")
+    first.save_stats()
+
+    reopened, from_snapshot = reopen(second, monkeypatch)
+    assert from_snapshot
+    assert reopened.get_question_stats("事件3")["total_attempts"] == 1
+    reopened.close()
+    first.close()
+
+
+def test_snapshot_is_stale_after_its_deck_changes_elsewhere(write_deck, monkeypatch):
+    deck = DataHandler(write_deck(SAMPLE), "stats.json")
+    deck.close()
+
+    # 不使用快照的进程（如跨题库复习）改写了本题库的统计数据
+    monkeypatch.setattr(config, "DECK_SNAPSHOT", False)
+    other_process = DataHandler(deck.data_file, "stats.json")
+    answer(other_process, "武昌起义")
+    other_process.close()
+    monkeypatch.setattr(config, "DECK_SNAPSHOT", True)
+
+    reopened, from_snapshot = reopen(deck, monkeypatch)
+    assert not from_snapshot
+    assert reopened.get_question_stats("武昌起义")["total_attempts"] == 1
+    reopened.close()
+
+    _, from_snapshot = reopen(deck, monkeypatch)
+    assert from_snapshot
+
+
+def test_snapshot_is_stale_when_the_deck_file_changes(write_deck, monkeypatch):
+    deck = DataHandler(write_deck(SAMPLE), "stats.json")
+    deck.close()
+    write_deck(dict(SAMPLE, 新事件="2000 年"))
+
+    reopened, from_snapshot = reopen(deck, monkeypatch)
+    assert not from_snapshot
+    assert reopened.get_all_events()["新事件"] == "2000 年"
+    reopened.close()
+
+
+def test_snapshot_is_stale_after_the_stats_file_is_replaced(write_deck, monkeypatch):
+    deck = DataHandler(write_deck(SAMPLE), "stats.json")
+    answer(deck, "戊戌变法")
+    deck.save_stats()
+    with open("stats.json", encoding="utf-8") as f:
+        backup = f.read()
+    answer(deck, "戊戌变法")
+    deck.close()
+
+    # 恢复备份
+    with open("stats.json", "w", encoding="utf-8") as f:
+        f.write(backup)
+    reopened, from_snapshot = reopen(deck, monkeypatch)
+    assert not from_snapshot
+    assert reopened.get_question_stats("戊戌变法")["total_attempts"] == 1
+    reopened.close()
+
+    # 手工编辑
+    with open("stats.json", encoding="utf-8") as f:
+        edited = f.read().replace('"total_attempts": 1', '"total_attempts": 99')
+    with open("stats.json", "w", encoding="utf-8") as f:
+        f.write(edited)
+    reopened, from_snapshot = reopen(deck, monkeypatch)
+    assert not from_snapshot
+    assert reopened.get_question_stats("戊戌变法")["total_attempts"] == 99
+    reopened.close()
+
+
+def test_snapshot_keeps_unknown_stats_keys(write_deck, monkeypatch):
+    with open("stats.json", "w", encoding="utf-8") as f:
+        json.dump({"deck.json": {"戊戌变法": dict(STATS, note="x")}}, f)
+    deck = DataHandler(write_deck(SAMPLE), "stats.json")
+    deck.close()
+
+    reopened, from_snapshot = reopen(deck, monkeypatch)
+    assert from_snapshot
+    assert reopened.get_question_stats("戊戌变法")["note"] == "x"
+    reopened.close()
@@ -0,0 +1,119 @@
+import os
+from datetime import datetime, timedelta
+
+from conftest import SAMPLE
+from data_handler import DataHandler
+from quiz import Quiz
+from review_system import ReviewSystem
+from sqlite_handler import SQLiteDataHandler, SQLiteStatsMap, connect, migrate_json_to_sqlite
+
+
+def answer(data_handler, question, is_correct=True):
+    quiz = Quiz(data_handler, ReviewSystem(data_handler))
+    item = quiz.prepare_question(question, SAMPLE[question], "fill_blank")
+    return quiz.record_answer(item, is_correct, 2.0, quiz.new_session())
+
+
+def test_json_deck_is_migrated_on_first_open(write_deck):
+    json_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    answer(json_handler, "戊戌变法")
+    json_handler.close()
+
+    data_handler = SQLiteDataHandler("deck.json", "stats.json", "quiz.db")
+    assert dict(data_handler.get_all_events().items()) == SAMPLE
+    assert data_handler.get_question_stats("戊戌变法")["total_attempts"] == 1
+    data_handler.close()
+
+
+def test_answers_persist_per_user(write_deck):
+    write_deck(SAMPLE)
+    for user, question in (("alice", "戊戌变法"), ("bob", "武昌起义")):
+        data_handler = SQLiteDataHandler("deck.json", "stats.json", "quiz.db", user)
+        answer(data_handler, question)
+        data_handler.close()
+
+    alice = SQLiteDataHandler("deck.json", "stats.json", "quiz.db", "alice")
+    assert alice.get_question_stats("戊戌变法")["total_attempts"] == 1
+    assert alice.get_question_stats("武昌起义") is None
+    alice.close()
+
+
+def test_due_query_orders_by_next_review(write_deck):
+    write_deck(SAMPLE)
+    data_handler = SQLiteDataHandler("deck.json", "stats.json", "quiz.db")
+    for question in SAMPLE:
+        answer(data_handler, question)
+    stats = data_handler.get_all_stats()
+    now = datetime.now()
+    for days, question in ((3, "武昌起义"), (5, "戊戌变法")):
+        row = dict(stats[question])
+        row["next_review"] = (now - timedelta(days=days)).isoformat()
+        stats[question] = row
+        data_handler.commit_question_stats(question)
+
+    assert data_handler.query_due_questions(now, 2) == ["戊戌变法", "武昌起义"]
+    assert sorted(ReviewSystem(data_handler).get_due_questions(limit=2)) == ["戊戌变法", "武昌起义"]
+    summary = data_handler.get_stats_summary(now)
+    assert (summary["studied_events"], summary["total_attempts"], summary["due"]) == (len(SAMPLE), len(SAMPLE), 2)
+    data_handler.close()
+
+
+def test_migrate_json_to_sqlite(write_deck, capsys):
+    write_deck(SAMPLE, "a.json")
+    write_deck({"秦统一六国": "前221年"}, "b.json")
+    migrate_json_to_sqlite(["a.json", "b.json"], "stats.json", "quiz.db")
+    assert "已迁移 b.json: 1 个事件" in capsys.readouterr().out
+    data_handler = SQLiteDataHandler("b.json", "stats.json", "quiz.db")
+    assert data_handler.get_all_events()["秦统一六国"] == "前221年"
+    data_handler.close()
+
+
+def test_migration_only_reads_the_json_files(write_deck, capsys):
+    json_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    json_handler.update_question_stats("戊戌变法", True, 2.0)
+    json_handler._journal.close()
+    with open(json_handler.journal_file, "a", encoding="utf-8") as f:
+        f.write('{"q": "torn')
+    journal_size = os.path.getsize(json_handler.journal_file)
+    before = set(os.listdir("."))
+
+    migrate_json_to_sqlite(["deck.json", "missing.json"], "stats.json", "quiz.db")
+    assert "迁移 missing.json 时出错" in capsys.readouterr().out
+    # 只多出数据库文件，不创建示例题库或快照，也不截断日志
+    assert {name for name in set(os.listdir(".")) - before if not name.startswith("quiz.db")} == set()
+    assert os.path.getsize(json_handler.journal_file) == journal_size
+
+    data_handler = SQLiteDataHandler("deck.json", "stats.json", "quiz.db")
+    assert data_handler.get_question_stats("戊戌变法")["total_attempts"] == 1
+    data_handler.close()
+
+
+def test_stats_cache_is_bounded_and_writes_only_changed_rows(write_deck):
+    write_deck(SAMPLE)
+    data_handler = SQLiteDataHandler("deck.json", "stats.json", "quiz.db")
+    for question in SAMPLE:
+        answer(data_handler, question)
+    data_handler.close()
+
+    conn = connect("quiz.db")
+    stats = SQLiteStatsMap(conn, "deck.json", cache_size=2)
+    writes = []
+    conn.set_trace_callback(lambda sql: writes.append(sql) if sql.startswith("INSERT") else None)
+    questions = list(SAMPLE)
+    stats[questions[0]]["total_attempts"] = 10
+    for question in questions[1:]:
+        stats[question]
+    # 改过的条目被挤出缓存时写回，其余只读的条目不写
+    assert len(stats._live) == 2 and len(writes) == 1
+    stats.commit_all()
+    assert len(writes) == 1
+    stats[questions[-1]]["total_attempts"] = 20
+    stats.commit_all()
+    assert len(writes) == 2
+    conn.commit()
+    conn.close()
+
+    data_handler = SQLiteDataHandler("deck.json", "stats.json", "quiz.db")
+    assert data_handler.get_question_stats(questions[0])["total_attempts"] == 10
+    assert data_handler.get_question_stats(questions[-1])["total_attempts"] == 20
+    data_handler.close()
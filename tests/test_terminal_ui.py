@@ -0,0 +1,100 @@
+import builtins
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import SAMPLE
+from cross_deck import study_all_due
+from data_handler import DataHandler
+from deck_manager import DeckManager
+from quiz import Quiz
+from review_system import ReviewSystem
+from terminal_ui import Screen, TerminalSession
+
+
+def feed(monkeypatch, answers):
+    """按顺序把 answers 作为输入，用完后与读到文件末尾一样抛出 EOFError"""
+    answers = iter(answers)
+
+    def fake_input(prompt=""):
+        try:
+            return next(answers)
+        except StopIteration:
+            raise EOFError from None
+
+    monkeypatch.setattr(builtins, "input", fake_input)
+
+
+def stats_due(days_ago):
+    moment = (datetime.now() - timedelta(days=days_ago)).isoformat()
+    return {"total_attempts": 1, "correct_attempts": 1, "wrong_attempts": 0, "avg_time": 2.0,
+            "last_review": moment, "next_review": moment, "interval": 1, "ease_factor": 2.5}
+
+
+def test_session_requeues_wrong_answers(write_deck, monkeypatch):
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    quiz = Quiz(data_handler, ReviewSystem(data_handler))
+    feed(monkeypatch, ["错误的答案"] * 4)
+    stream = io.StringIO()
+
+    session = TerminalSession(Screen(stream), quiz).run(4, "fill_blank")
+    assert (session["questions_asked"], session["wrong_answers"]) == (4, 4)
+    assert "正确答案是" in stream.getvalue()
+    data_handler.close()
+
+
+def test_end_of_input_finishes_the_session_and_quits(write_deck, monkeypatch):
+    data_handler = DataHandler(write_deck(SAMPLE), "stats.json")
+    quiz = Quiz(data_handler, ReviewSystem(data_handler))
+    data_handler.start_write_behind(interval=60)
+    feed(monkeypatch, ["1840"])
+
+    with pytest.raises(EOFError):
+        TerminalSession(Screen(io.StringIO()), quiz).run(5, "fill_blank")
+    # 会话结束时已把后台尚未写入的统计数据落盘
+    assert quiz.current_session["questions_asked"] == 1
+    assert not data_handler._pending
+    data_handler.close()
+
+
+def test_cross_deck_review_uses_the_screen(write_deck, tmp_path, monkeypatch, capsys):
+    write_deck({"鸦片战争": "1840 年", "戊戌变法": "1898 年"}, "a.json")
+    write_deck({"秦统一六国": "前221年"}, "b.json")
+    (tmp_path / "stats.json").write_text(json.dumps({
+        "a.json": {"鸦片战争": stats_due(1), "戊戌变法": stats_due(5)},
+        "b.json": {"秦统一六国": stats_due(3)},
+    }, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(Quiz, "ask_question", lambda *args, **kwargs: pytest.fail("不应使用控制台提问"))
+    feed(monkeypatch, ["1898 年"] * 3)
+    stream = io.StringIO()
+
+    deck_manager = DeckManager("stats.json")
+    session = study_all_due(deck_manager, 10, "fill_blank", screen=Screen(stream))
+    deck_manager.close()
+    assert session["questions_asked"] == 3
+    assert "[题库: b.json]" in stream.getvalue()
+    assert "会话总结" in capsys.readouterr().out
+
+    for name, question in (("a.json", "戊戌变法"), ("b.json", "秦统一六国")):
+        data_handler = DataHandler(name, "stats.json")
+        assert data_handler.get_question_stats(question)["total_attempts"] == 2
+        data_handler.close()
+
+
+def test_cross_deck_review_stops_at_end_of_input(write_deck, tmp_path, monkeypatch):
+    write_deck({"鸦片战争": "1840 年", "戊戌变法": "1898 年"}, "a.json")
+    (tmp_path / "stats.json").write_text(json.dumps({
+        "a.json": {"鸦片战争": stats_due(1), "戊戌变法": stats_due(5)},
+    }, ensure_ascii=False), encoding="utf-8")
+    feed(monkeypatch, ["1898 年"])
+
+    deck_manager = DeckManager("stats.json")
+    with pytest.raises(EOFError):
+        study_all_due(deck_manager, 10, "fill_blank", screen=Screen(io.StringIO()))
+    deck_manager.close()
+    data_handler = DataHandler("a.json", "stats.json")
+    assert data_handler.get_question_stats("戊戌变法")["total_attempts"] == 2
+    assert data_handler.get_question_stats("鸦片战争")["total_attempts"] == 1
+    data_handler.close()
@@ -0,0 +1,70 @@
+import json
+import threading
+
+import config
+from data_handler import DataHandler
+from review_system import ReviewSystem
+
+EVENTS = {f"事件{i}": f"{1000 + i} 年" for i in range(200)}
+
+
+def test_write_behind_persists_on_close(write_deck):
+    data_handler = DataHandler(write_deck(EVENTS), "stats.json")
+    data_handler.start_write_behind(interval=60)
+    data_handler.update_question_stats("事件1", True, 2.0)
+    assert data_handler._pending
+    data_handler.close()
+
+    reloaded = DataHandler(data_handler.data_file, "stats.json")
+    assert reloaded.get_question_stats("事件1")["total_attempts"] == 1
+    reloaded.close()
+
+
+def test_answers_racing_the_writer_thread_are_not_lost(write_deck, monkeypatch, capsys):
+    # 频繁合并日志，让后台线程在答题的同时反复遍历 _modified
+    monkeypatch.setattr(config, "JOURNAL_COMPACT_THRESHOLD", 3)
+    monkeypatch.setattr(config, "WRITE_BEHIND_MAX_PENDING", 1)
+    data_handler = DataHandler(write_deck(EVENTS), "stats.json")
+    review_system = ReviewSystem(data_handler)
+    data_handler.start_write_behind(interval=0.0005)
+
+    def answer_all(offset):
+        for i in range(offset, len(EVENTS), 2):
+            question = f"事件{i}"
+            data_handler.update_question_stats(question, i % 3 != 0, 1.0, commit=False)
+            review_system.calculate_next_review(question, 4)
+
+    threads = [threading.Thread(target=answer_all, args=(offset,)) for offset in (0, 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    data_handler.close()
+
+    assert "出错" not in capsys.readouterr().out
+    with open("stats.json", encoding="utf-8") as f:
+        saved = json.load(f)["deck.json"]
+    assert len(saved) == len(EVENTS)
+    assert all(stats["total_attempts"] == 1 and stats["interval"] == config.INTERVAL_AFTER_FIRST
+               for stats in saved.values())
+
+
+def test_stats_changes_wait_while_the_writer_holds_the_lock(write_deck):
+    data_handler = DataHandler(write_deck(EVENTS), "stats.json")
+    review_system = ReviewSystem(data_handler)
+    data_handler.update_question_stats("事件5", True, 1.0)
+    data_handler.save_stats()
+    stats = data_handler.get_question_stats("事件5")
+    before = dict(stats)
+
+    # 模拟后台线程正在序列化统计数据
+    with data_handler._lock:
+        answering = threading.Thread(target=review_system.calculate_next_review, args=("事件5", 5))
+        answering.start()
+        answering.join(0.1)
+        assert answering.is_alive()
+        assert dict(stats) == before
+        assert "事件5" not in data_handler._modified
+    answering.join()
+    assert stats["interval"] == config.INTERVAL_AFTER_FIRST
+    data_handler.close()